@@ -0,0 +1,90 @@
+import asyncio
+import contextvars
+
+import Cancellation
+
+
+def _call(token, function, args):
+    """Run the function in the executor's thread with the Token active, so the kernels check it"""
+    with token:
+        # A computation cancelled (or out of time) before it started isn't started at all
+        Cancellation.checkpoint()
+        result = function(*args)
+    token.finish()
+    return result
+
+
+def _reporter(loop, progress):
+    """A progress callback for the worker thread that hands each report to the event loop, so progress is called in
+    the same thread as the coroutines"""
+    def report(fraction):
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(progress, fraction)
+    return report
+
+
+async def run(function, *args, timeout=None, deadline=None, progress=None, token=None, executor=None):
+    """Call function(*args) in an executor (the event loop's default thread pool, unless another is given) and wait
+    for the result without blocking the event loop
+
+    The matrix kernels check for cancellation and report their progress at the boundaries of their blocks of work,
+    and let the event loop's thread run there. So:
+
+    - cancelling the awaiting task stops the computation at its next block boundary,
+    - the computation is stopped with a Cancellation.DeadlineExceeded (a TimeoutError) after timeout seconds, or at
+      the time deadline (as given by time.monotonic()),
+    - progress is called on the event loop with the fraction of the work done, from 0 to 1.
+
+    A Cancellation.Token can be given instead of the timeout and deadline, to cancel the computation from elsewhere
+    with token.cancel(), which raises Cancellation.Cancelled here. Work the kernels hand to NumPy can't be
+    interrupted, the wait for it still ends at the deadline but the thread finishes it first. The operands mustn't be
+    changed until the call returns, since they are read from another thread."""
+    loop = asyncio.get_running_loop()
+    if token is None:
+        token = Cancellation.Token(timeout, deadline)
+    elif timeout is not None or deadline is not None:
+        raise ValueError("The timeout and deadline are set on the Token when one is given.")
+    if progress is not None:
+        token.progress = _reporter(loop, progress)
+
+    # The worker runs in a copy of the caller's context, so a Memo active in the awaiting task is used there too
+    context = contextvars.copy_context()
+    future = loop.run_in_executor(executor, context.run, _call, token, function, args)
+    try:
+        return await asyncio.wait_for(future, token.remaining())
+    except Cancellation.DeadlineExceeded:
+        raise
+    except asyncio.TimeoutError:
+        token.cancel()
+        raise Cancellation.DeadlineExceeded("The computation did not finish before its deadline") from None
+    except asyncio.CancelledError:
+        token.cancel()
+        raise
+
+
+async def determinant(matrix, method="lu", **options):
+    """Compute matrix.determinant(method) without blocking the event loop, the options are those of run
+
+    The LU and fraction-free eliminations stop and report progress at each pivot, and Laplace expansion at each
+    minor. The "exact" method can't be stopped once it has started."""
+    return await run(matrix.determinant, method, **options)
+
+
+async def inverse(matrix, **options):
+    """Compute matrix.inverse() without blocking the event loop, the options are those of run"""
+    return await run(matrix.inverse, **options)
+
+
+async def matmul(a, b, method="classic", workers=None, **options):
+    """Compute a.multiply(b, method, workers) without blocking the event loop, the options are those of run
+
+    The product stops and reports progress at each block of rows, or with workers processes each time a process
+    finishes its share."""
+    return await run(a.multiply, b, method, workers, **options)
+
+
+async def power(matrix, power, **options):
+    """Compute matrix.matrix_power(power) without blocking the event loop, the options are those of run
+
+    Each product of the repeated squaring is an equal share of the progress, and stops at each block of its rows."""
+    return await run(matrix.matrix_power, power, **options)
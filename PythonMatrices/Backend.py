@@ -0,0 +1,314 @@
+import Cancellation
+import Eigen
+import Kernels
+import Parallel
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class PythonBackend(object):
+    """The reference backend, which computes everything with plain Python loops
+
+    Matrices are given as lists of rows, where each row is any sequence of numbers (a list, or a view of a compact
+    Matrix buffer), and results are returned as lists of lists. The linear algebra operations are given the Matrix
+    itself, so they can reuse its cached factorisation."""
+
+    name = "python"
+
+    def dot(self, x, y):
+        """The sum of the products of the entries of x and y"""
+        dot = 0
+        for i in range(len(x)):
+            dot += x[i] * y[i]
+        return dot
+
+    def vector_add(self, x, y):
+        """Add the entries of y to the entries of x"""
+        entries = []
+        for i in range(len(x)):
+            entries.append(x[i] + y[i])
+        return entries
+
+    def vector_sub(self, x, y):
+        """Subtract the entries of y from the entries of x"""
+        entries = []
+        for i in range(len(x)):
+            entries.append(x[i] - y[i])
+        return entries
+
+    def vector_axpy(self, alpha, x, y):
+        """Add alpha times the entries of x to the entries of y, in one pass"""
+        entries = []
+        for i in range(len(x)):
+            entries.append(alpha * x[i] + y[i])
+        return entries
+
+    def add(self, a, b):
+        """Add the entries of the matrix b to the entries of the matrix a"""
+        rows = []
+        for i in range(len(a)):
+            rows.append(self.vector_add(a[i], b[i]))
+        return rows
+
+    def sub(self, a, b):
+        """Subtract the entries of the matrix b from the entries of the matrix a"""
+        rows = []
+        for i in range(len(a)):
+            rows.append(self.vector_sub(a[i], b[i]))
+        return rows
+
+    def axpy(self, alpha, a, b):
+        """Add alpha times the entries of the matrix a to the entries of the matrix b"""
+        rows = []
+        for i in range(len(a)):
+            rows.append(self.vector_axpy(alpha, a[i], b[i]))
+        return rows
+
+    def combine(self, coefficients, matrices):
+        """The sum of each coefficient times the matrix with the same index, in one pass over the entries without a
+        temporary matrix for each term"""
+        rows = []
+        for i in range(len(matrices[0])):
+            terms = [matrix[i] for matrix in matrices]
+            if len(terms) == 1:
+                c = coefficients[0]
+                rows.append([c * x for x in terms[0]])
+            elif len(terms) == 2:
+                c, d = coefficients
+                rows.append([c * x + d * y for x, y in zip(terms[0], terms[1])])
+            else:
+                rows.append([sum(c * x for c, x in zip(coefficients, entries)) for entries in zip(*terms)])
+        return rows
+
+    def scale(self, a, scalar):
+        """Multiply every entry of the matrix a by scalar"""
+        rows = []
+        for row in a:
+            entries = []
+            for entry in row:
+                entries.append(entry * scalar)
+            rows.append(entries)
+        return rows
+
+    def transpose(self, a):
+        """Swap the rows and columns of the matrix a"""
+        columns = []
+        row_length = len(a[0]) if len(a) > 0 else 0
+        for j in range(row_length):
+            entries = []
+            for row in a:
+                entries.append(row[j])
+            columns.append(entries)
+        return columns
+
+    def matmul(self, a, b, method="classic", workers=None):
+        """Multiply the matrix a by the matrix b, the dot product of every row of a with every column of b
+
+        The "classic" method uses the tiled i-k-j kernel that reads b row by row rather than building its columns,
+        "strassen" uses Strassen's method for two square matrices, and "auto" uses Strassen's method only when both
+        are square and larger than Kernels.STRASSEN_CROSSOVER. The classic method spreads the rows of the product
+        over workers processes (by default the amount set with Parallel.set_workers)."""
+        square = len(a) == len(b) and len(a) > 0 and len(a[0]) == len(a) and len(b[0]) == len(b)
+        if method == "auto":
+            method = "strassen" if square and len(a) > Kernels.STRASSEN_CROSSOVER else "classic"
+
+        if method == "strassen":
+            if not square:
+                raise ValueError("Strassen's method can only multiply two square matrices of the same size.")
+            return Kernels.strassen_rows(a, b)
+        elif method == "classic":
+            return Parallel.matmul_rows(a, b, workers)
+
+        raise ValueError("Unknown multiplication method: " + str(method))
+
+    def matvec(self, a, x):
+        """Multiply the matrix a by the entries x, the dot product of every row of a with x"""
+        entries = []
+        for row in a:
+            total = 0
+            for entry, value in zip(row, x):
+                total += entry * value
+            entries.append(total)
+        return entries
+
+    def determinant(self, matrix):
+        """The determinant of the square Matrix, from its cached LU decomposition"""
+        return matrix.lu().determinant()
+
+    def inverse(self, matrix):
+        """The rows of the inverse of the square Matrix, from its cached LU decomposition"""
+        # Factorising is about a quarter of the work, solving against the identity the rest
+        with Cancellation.part(0, 1, 4):
+            decomposition = matrix.lu()
+        if decomposition.is_singular():
+            raise ZeroDivisionError("Cannot compute the inverse of a singular matrix")
+        with Cancellation.part(1, 4, 4):
+            return decomposition.inverse_rows()
+
+    def eigenvalues(self, a):
+        """The eigenvalues of the square matrix a, from the largest magnitude to the smallest, complex ones as complex
+        numbers"""
+        return Eigen.eigenvalue_rows(a)
+
+
+class NumpyBackend(PythonBackend):
+    """A backend that hands the work to NumPy, so products and factorisations run in BLAS and LAPACK
+
+    Operands with fewer than min_size entries are left to the reference backend, since copying them into arrays
+    costs more than the loops do."""
+
+    name = "numpy"
+
+    def __init__(self, min_size=64):
+        if numpy is None:
+            raise ImportError("The numpy backend requires NumPy to be installed")
+        self.min_size = min_size
+
+    def _is_small(self, a):
+        """Check whether a matrix (a list of rows) has fewer than min_size entries"""
+        return len(a) == 0 or len(a) * len(a[0]) < self.min_size
+
+    @staticmethod
+    def _array(a):
+        """Copy a matrix (a list of rows) into a 2 dimensional float64 array"""
+        return numpy.array([numpy.asarray(row, dtype=numpy.float64) for row in a], dtype=numpy.float64)
+
+    def dot(self, x, y):
+        if len(x) < self.min_size:
+            return PythonBackend.dot(self, x, y)
+        return float(numpy.dot(numpy.asarray(x, dtype=numpy.float64), numpy.asarray(y, dtype=numpy.float64)))
+
+    def vector_add(self, x, y):
+        if len(x) < self.min_size:
+            return PythonBackend.vector_add(self, x, y)
+        return (numpy.asarray(x, dtype=numpy.float64) + numpy.asarray(y, dtype=numpy.float64)).tolist()
+
+    def vector_sub(self, x, y):
+        if len(x) < self.min_size:
+            return PythonBackend.vector_sub(self, x, y)
+        return (numpy.asarray(x, dtype=numpy.float64) - numpy.asarray(y, dtype=numpy.float64)).tolist()
+
+    def vector_axpy(self, alpha, x, y):
+        if len(x) < self.min_size:
+            return PythonBackend.vector_axpy(self, alpha, x, y)
+        return (alpha * numpy.asarray(x, dtype=numpy.float64) + numpy.asarray(y, dtype=numpy.float64)).tolist()
+
+    def add(self, a, b):
+        if self._is_small(a):
+            return PythonBackend.add(self, a, b)
+        return (self._array(a) + self._array(b)).tolist()
+
+    def sub(self, a, b):
+        if self._is_small(a):
+            return PythonBackend.sub(self, a, b)
+        return (self._array(a) - self._array(b)).tolist()
+
+    def axpy(self, alpha, a, b):
+        if self._is_small(a):
+            return PythonBackend.axpy(self, alpha, a, b)
+        return (alpha * self._array(a) + self._array(b)).tolist()
+
+    def combine(self, coefficients, matrices):
+        if self._is_small(matrices[0]):
+            return PythonBackend.combine(self, coefficients, matrices)
+        total = float(coefficients[0]) * self._array(matrices[0])
+        for c, matrix in zip(coefficients[1:], matrices[1:]):
+            total += float(c) * self._array(matrix)
+        return total.tolist()
+
+    def scale(self, a, scalar):
+        if self._is_small(a):
+            return PythonBackend.scale(self, a, scalar)
+        return (self._array(a) * scalar).tolist()
+
+    def transpose(self, a):
+        if self._is_small(a):
+            return PythonBackend.transpose(self, a)
+        return self._array(a).T.tolist()
+
+    def matmul(self, a, b, method="classic", workers=None):
+        # BLAS is faster than any of the methods written in Python (and runs its own threads), so the method only
+        # matters for small operands
+        if self._is_small(a) and self._is_small(b):
+            return PythonBackend.matmul(self, a, b, method, workers)
+        return numpy.matmul(self._array(a), self._array(b)).tolist()
+
+    def matvec(self, a, x):
+        if self._is_small(a):
+            return PythonBackend.matvec(self, a, x)
+        return numpy.dot(self._array(a), numpy.asarray(x, dtype=numpy.float64)).tolist()
+
+    def determinant(self, matrix):
+        rows = [row.entries for row in matrix.row_vectors()]
+        if self._is_small(rows):
+            return PythonBackend.determinant(self, matrix)
+        return float(numpy.linalg.det(self._array(rows)))
+
+    def inverse(self, matrix):
+        rows = [row.entries for row in matrix.row_vectors()]
+        if self._is_small(rows):
+            return PythonBackend.inverse(self, matrix)
+        try:
+            return numpy.linalg.inv(self._array(rows)).tolist()
+        except numpy.linalg.LinAlgError:
+            raise ZeroDivisionError("Cannot compute the inverse of a singular matrix")
+
+    def eigenvalues(self, a):
+        if self._is_small(a):
+            return PythonBackend.eigenvalues(self, a)
+        values = [float(value.real) if value.imag == 0 else complex(value) for value in numpy.linalg.eigvals(
+            self._array(a))]
+        values.sort(key=abs, reverse=True)
+        return values
+
+
+# The backend every Matrix and Vector operation is computed with
+_backend = None
+# The backend for exact entries, which have to stay Python numbers
+_exact_backend = PythonBackend()
+
+
+def available_backends():
+    """The names of the backends that can be used in this environment"""
+    names = [PythonBackend.name]
+    if numpy is not None:
+        names.append(NumpyBackend.name)
+    return names
+
+
+def set_backend(backend="auto"):
+    """Select the backend by name ("python", "numpy", or "auto" to use NumPy when it can be imported), or pass a
+    backend object to use it directly"""
+    global _backend
+
+    if backend == "auto":
+        backend = NumpyBackend.name if numpy is not None else PythonBackend.name
+
+    if backend == PythonBackend.name:
+        _backend = PythonBackend()
+    elif backend == NumpyBackend.name:
+        _backend = NumpyBackend()
+    elif isinstance(backend, str):
+        raise ValueError("Unknown backend: " + backend)
+    else:
+        _backend = backend
+
+    return _backend
+
+
+def for_dtype(dtype):
+    """Get the backend to compute with entries of type dtype, the NumPy backend only handles floats so exact entries
+    (ints and Fractions) always use the reference backend"""
+    if dtype is float:
+        return get_backend()
+    return _exact_backend
+
+
+def get_backend():
+    """Get the backend in use, choosing one automatically the first time"""
+    if _backend is None:
+        return set_backend("auto")
+    return _backend
@@ -0,0 +1,146 @@
+from fractions import Fraction
+
+import Cancellation
+
+
+class Bareiss(object):
+    """Fraction-free Gaussian elimination (Bareiss' algorithm) of a matrix of exact entries (ints or Fractions)
+
+    Each step of the elimination cross-multiplies by the pivot and divides by the previous pivot, and the division is
+    always exact: every intermediate entry is a minor of the original matrix. So integer entries stay integers, their
+    size only grows polynomially (unlike plain Gaussian elimination on Fractions, or Laplace expansion), and the
+    determinant, rank and inverse come out exactly in O(n^3) operations."""
+
+    def __init__(self, rows):
+        """Eliminate the matrix given as a list of rows, any shape"""
+        self.row_count = len(rows)
+        self.column_count = len(rows[0]) if self.row_count > 0 else 0
+        # Integers are divided exactly with //, anything else is made a Fraction so / is exact
+        self.exact_int = all(isinstance(entry, int) for row in rows for entry in row)
+        if self.exact_int:
+            self.rows = [list(row) for row in rows]
+        else:
+            self.rows = [[Fraction(entry) for entry in row] for row in rows]
+
+        # The echelon form, the columns the pivots were found in, and the sign of the row swaps
+        self.echelon, self.pivot_columns, self.sign = self._eliminate([list(row) for row in self.rows],
+                                                                      self.column_count)
+
+    def _divide(self, a, b):
+        return a // b if self.exact_int else a / b
+
+    def _eliminate(self, m, width, reduce=False):
+        """Eliminate the rows m in place over the first width columns, with reduce set the rows above each pivot are
+        eliminated as well (fraction-free Gauss-Jordan). Returns the rows, the pivot columns and the sign of the row
+        swaps"""
+        height = len(m)
+        previous = 1
+        sign = 1
+        pivots = []
+        # Eliminating from column k on is about (width - k)^3 of the width^3 work
+        cube = width ** 3
+        r = 0
+        for k in range(width):
+            if r == height:
+                break
+            Cancellation.checkpoint(cube - (width - k) ** 3, cube)
+            # Any non-zero pivot will do, since nothing is rounded
+            p = r
+            while p < height and m[p][k] == 0:
+                p += 1
+            if p == height:
+                continue
+            if p != r:
+                m[p], m[r] = m[r], m[p]
+                sign = -sign
+
+            pivot_row = m[r]
+            pivot = pivot_row[k]
+            for i in range(0 if reduce else r + 1, height):
+                if i == r:
+                    continue
+                row = m[i]
+                factor = row[k]
+                # Every other entry is cross-multiplied by the pivot, even in rows that already have a zero in column
+                # k, so all the rows keep the same scale
+                for j in range(k + 1, len(row)):
+                    row[j] = self._divide(pivot * row[j] - factor * pivot_row[j], previous)
+                if reduce:
+                    # The entries left of the pivot are also rescaled, those are the earlier pivots
+                    for j in range(k):
+                        row[j] = self._divide(pivot * row[j] - factor * pivot_row[j], previous)
+                row[k] = 0
+            previous = pivot
+            pivots.append(k)
+            r += 1
+        return m, pivots, sign
+
+    def rank(self):
+        """The amount of linearly independent rows (or columns)"""
+        return len(self.pivot_columns)
+
+    def is_singular(self):
+        """Check whether the (square) matrix has no inverse"""
+        return self.rank() < self.row_count
+
+    def determinant(self):
+        """The determinant of the square matrix, which is the last pivot of the elimination"""
+        if self.row_count != self.column_count:
+            raise ArithmeticError("Cannot compute the determinant of a non-square matrix")
+        if self.row_count == 0:
+            return 1
+        if self.is_singular():
+            return 0
+        return self.sign * self.echelon[-1][-1]
+
+    def solve_rows(self, right):
+        """Solve the square system A * X = B exactly, where right holds the rows of B, returning the rows of X as
+        Fractions
+
+        The augmented matrix [A | B] is reduced with fraction-free Gauss-Jordan, which leaves d * I on the left (d
+        being the last pivot) and d * X on the right, so the only division is by d at the very end."""
+        n = self.row_count
+        if self.row_count != self.column_count:
+            raise ArithmeticError("Can only solve linear systems with a square matrix")
+        if self.is_singular():
+            raise ZeroDivisionError("Cannot solve a linear system with a singular matrix")
+        convert = int if self.exact_int and all(isinstance(entry, int) for b in right for entry in b) else Fraction
+        if convert is Fraction and self.exact_int:
+            # Mixing in Fractions means switching to exact division with / for the whole elimination
+            return Bareiss([[Fraction(entry) for entry in row] for row in self.rows]).solve_rows(right)
+
+        augmented = [row + [convert(entry) for entry in b] for row, b in zip(self.rows, right)]
+        reduced, _, _ = self._eliminate(augmented, n, reduce=True)
+        d = reduced[-1][n - 1]
+        if self.exact_int:
+            return [[Fraction(entry, d) for entry in row[n:]] for row in reduced]
+        return [[entry / d for entry in row[n:]] for row in reduced]
+
+    def inverse_rows(self):
+        """The rows of the inverse of the square matrix, as Fractions"""
+        n = self.row_count
+        if self.row_count == self.column_count and self.is_singular():
+            raise ZeroDivisionError("Cannot compute the inverse of a singular matrix")
+        return self.solve_rows([[1 if i == j else 0 for j in range(n)] for i in range(n)])
+
+    def cofactor_rows(self):
+        """The rows of the cofactor matrix of the square matrix, which is the determinant times the transposed inverse
+        unless the matrix is singular, then each minor is eliminated on its own"""
+        n = self.row_count
+        if not self.is_singular():
+            determinant = self.determinant()
+            inverse = self.inverse_rows()
+            rows = [[determinant * inverse[j][i] for j in range(n)] for i in range(n)]
+        else:
+            rows = []
+            for i in range(n):
+                others = [row for r, row in enumerate(self.rows) if r != i]
+                entries = []
+                for j in range(n):
+                    minor = Bareiss([row[:j] + row[j + 1:] for row in others]).determinant()
+                    entries.append(minor if (i + j) % 2 == 0 else -minor)
+                rows.append(entries)
+        # The cofactors of an integer matrix are integers
+        if self.exact_int:
+            rows = [[int(entry) for entry in row] for row in rows]
+        return rows
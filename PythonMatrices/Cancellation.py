@@ -0,0 +1,158 @@
+import threading
+import time
+
+# Progress is only reported when it has grown by at least this much since the last report, or has finished
+PROGRESS_STEP = 0.01
+
+
+class Cancelled(Exception):
+    """Raised inside a computation at its next checkpoint once its Token has been cancelled"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised inside a computation at its next checkpoint once the deadline of its Token has passed"""
+
+
+class _Local(threading.local):
+    # The Token of the computation running in this thread, None when nothing can cancel it
+    token = None
+
+
+_local = _Local()
+
+
+class Token(object):
+    """Lets a long computation be cancelled, stopped at a deadline, and report how far it has got
+
+    While a Token is active in a thread (entered as a context manager), the kernels of the matrix operations check it
+    at the boundaries of their blocks of work (each pivot of a factorisation, each block of rows of a product...), and
+    raise Cancelled or DeadlineExceeded from there, so nothing is left half written. The progress callback is called
+    with the fraction of the work done so far (from 0 to 1) from the thread doing the work. For example:
+
+        token = Cancellation.Token(timeout=30, progress=print)
+        with token:
+            matrix.determinant()
+
+    A Token belongs to one computation at a time. Outside a Token the checks cost a single attribute lookup."""
+
+    def __init__(self, timeout=None, deadline=None, progress=None):
+        """Stop the computation timeout seconds from now, or at the time deadline (as given by time.monotonic()),
+        whichever comes first"""
+        if timeout is not None:
+            limit = time.monotonic() + timeout
+            deadline = limit if deadline is None else min(deadline, limit)
+        self.deadline = deadline
+        self.progress = progress
+        # The fraction of the work done, as of the latest checkpoint
+        self.fraction = 0.0
+        self._cancelled = threading.Event()
+        self._reported = 0.0
+        # The share of the whole computation that the part of it running now makes up, innermost last
+        self._ranges = [(0.0, 1.0)]
+        self._previous = []
+
+    def cancel(self):
+        """Stop the computation at its next checkpoint, this can be called from any thread"""
+        self._cancelled.set()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def remaining(self):
+        """The seconds left until the deadline, or None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """Raise Cancelled or DeadlineExceeded if the computation should stop"""
+        if self._cancelled.is_set():
+            raise Cancelled("The computation was cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded("The computation did not finish before its deadline")
+
+    def _checkpoint(self, done, total):
+        self.check()
+        if total:
+            start, stop = self._ranges[-1]
+            fraction = start + (stop - start) * done / total
+            # Parts that report less than an earlier part never move the progress backwards
+            if fraction > self.fraction:
+                self.fraction = fraction
+                if self.progress is not None and fraction >= self._reported + PROGRESS_STEP:
+                    self._reported = fraction
+                    self.progress(fraction)
+        # Let the other threads run, such as an event loop waiting on this computation
+        time.sleep(0)
+
+    def finish(self):
+        """Report the computation as complete"""
+        self.fraction = 1.0
+        if self.progress is not None and self._reported < 1.0:
+            self._reported = 1.0
+            self.progress(1.0)
+
+    def __enter__(self):
+        self._previous.append(_local.token)
+        _local.token = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.token = self._previous.pop()
+        return False
+
+
+class _Part(object):
+    """The part of a computation that makes up the fraction start / total to stop / total of the work of the part
+    enclosing it"""
+
+    def __init__(self, token, start, stop, total):
+        self.token = token
+        self.start = start
+        self.stop = stop
+        self.total = total
+
+    def __enter__(self):
+        low, high = self.token._ranges[-1]
+        width = high - low
+        self.token._ranges.append((low + width * self.start / self.total, low + width * self.stop / self.total))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.token._ranges.pop()
+        return False
+
+
+class _NoPart(object):
+    """A part of a computation that no Token is following"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_no_part = _NoPart()
+
+
+def current():
+    """The Token active in this thread, or None"""
+    return _local.token
+
+
+def checkpoint(done=None, total=None):
+    """Mark a boundary between blocks of work, where done out of total units of the work of the current part are
+    finished: stops the computation if the active Token says to, and reports the progress"""
+    token = _local.token
+    if token is not None:
+        token._checkpoint(done, total)
+
+
+def part(start, stop, total):
+    """A context in which the progress reported by checkpoints covers just the share start / total to stop / total
+    of the work of the enclosing part, for operations made up of several others"""
+    token = _local.token
+    if token is None:
+        return _no_part
+    return _Part(token, start, stop, total)
@@ -0,0 +1,53 @@
+from fractions import Fraction
+
+# The types entries can be stored as, from the narrowest to the widest. Combining entries of two types gives the
+# wider one, so exact entries stay exact until they meet a float
+DTYPES = (int, Fraction, float)
+
+
+def check(dtype):
+    """Make sure dtype is one of the supported entry types, and return it"""
+    if dtype not in DTYPES:
+        raise ValueError("Unsupported entry type: " + str(dtype) + ", must be int, Fraction or float")
+    return dtype
+
+
+def is_exact(dtype):
+    """Check whether arithmetic on entries of this type is exact (no rounding)"""
+    return dtype is not float
+
+
+def _to_int(value):
+    """Convert a value to an int, refusing to round off a fractional part"""
+    if isinstance(value, int):
+        return int(value)
+    converted = int(value)
+    if converted != value:
+        raise ValueError("Cannot store the non integer value " + str(value) + " as an int entry")
+    return converted
+
+
+def converter(dtype):
+    """Get the function that converts a value to an entry of the given type"""
+    if dtype is int:
+        return _to_int
+    return check(dtype)
+
+
+def of(value):
+    """The entry type a single number would be stored as"""
+    if isinstance(value, int):
+        return int
+    if isinstance(value, Fraction):
+        return Fraction
+    return float
+
+
+def promote(*dtypes):
+    """The narrowest entry type that can hold entries of all the given types"""
+    return DTYPES[max(DTYPES.index(dtype) for dtype in dtypes)]
+
+
+def quotient(dtype):
+    """The entry type of the result of dividing entries of the given type, ints divide into Fractions"""
+    return Fraction if dtype is int else dtype
@@ -0,0 +1,319 @@
+import math
+import random
+
+import LUDecomposition
+
+# The QR iteration gives up on an eigenvalue after this many sweeps, exceptional shifts are tried after 10 and 20
+MAX_ITERATIONS = 30
+# Balancing scales rows and columns by powers of the floating point radix, so it doesn't round anything
+RADIX = 2.0
+
+
+def _sign(a, b):
+    """The magnitude of a with the sign of b, where a zero b counts as positive"""
+    return abs(a) if b >= 0 else -abs(a)
+
+
+def balance_rows(rows):
+    """Get a copy of the square matrix rows, scaled by a similarity transform so that each row and the matching column
+    have about the same norm, which has the same eigenvalues but makes computing them more accurate"""
+    a = [[float(entry) for entry in row] for row in rows]
+    n = len(a)
+    square_radix = RADIX * RADIX
+    done = False
+    while not done:
+        done = True
+        for i in range(n):
+            r = 0.0
+            c = 0.0
+            for j in range(n):
+                if j != i:
+                    c += abs(a[j][i])
+                    r += abs(a[i][j])
+            if c == 0 or r == 0:
+                continue
+            g = r / RADIX
+            f = 1.0
+            s = c + r
+            while c < g:
+                f *= RADIX
+                c *= square_radix
+            g = r * RADIX
+            while c > g:
+                f /= RADIX
+                c /= square_radix
+            # Only scale when it reduces the norm noticeably, so the loop ends
+            if (c + r) / f < 0.95 * s:
+                done = False
+                g = 1.0 / f
+                a[i] = [entry * g for entry in a[i]]
+                for row in a:
+                    row[i] *= f
+    return a
+
+
+def hessenberg_rows(rows):
+    """Reduce the square matrix rows to upper Hessenberg form (zero below the first subdiagonal) with Householder
+    reflections, a similarity transform so the eigenvalues are the same, returning the rows of the result"""
+    a = [[float(entry) for entry in row] for row in rows]
+    n = len(a)
+    for k in range(n - 2):
+        # The reflection maps the column below the subdiagonal onto its first entry
+        x = [a[i][k] for i in range(k + 1, n)]
+        norm = math.sqrt(sum(entry * entry for entry in x))
+        if norm == 0:
+            continue
+        v = x
+        v[0] += _sign(norm, x[0])
+        scale = sum(entry * entry for entry in v)
+        if scale == 0:
+            continue
+        scale = 2.0 / scale
+
+        # From the left: the rows k + 1 onwards lose their component along v
+        w = [0.0] * (n - k)
+        for vi, i in zip(v, range(k + 1, n)):
+            if vi != 0:
+                w = [total + vi * entry for total, entry in zip(w, a[i][k:])]
+        for vi, i in zip(v, range(k + 1, n)):
+            if vi != 0:
+                factor = scale * vi
+                a[i][k:] = [entry - factor * total for entry, total in zip(a[i][k:], w)]
+
+        # From the right: the columns k + 1 onwards, row by row
+        for row in a:
+            total = sum(entry * vi for entry, vi in zip(row[k + 1:], v)) * scale
+            if total != 0:
+                row[k + 1:] = [entry - total * vi for entry, vi in zip(row[k + 1:], v)]
+
+        # The entries the reflection zeroed are only zero up to rounding, so make them exactly zero
+        for i in range(k + 2, n):
+            a[i][k] = 0.0
+    return a
+
+
+def hessenberg_eigenvalues(h):
+    """The eigenvalues of an upper Hessenberg matrix (as rows) by the shifted QR algorithm
+
+    Each sweep is an implicit QR step with Francis' double shift, which keeps complex conjugate pairs of eigenvalues
+    in real arithmetic, and the matrix is deflated each time a subdiagonal entry becomes negligible. Real eigenvalues
+    are returned as floats and the others as complex numbers."""
+    n = len(h)
+    # Work with 1-based indices, which keeps the bounds of the classic formulation of the algorithm
+    a = [[0.0] * (n + 1)] + [[0.0] + [float(entry) for entry in row] for row in h]
+    real = [0.0] * (n + 1)
+    imaginary = [0.0] * (n + 1)
+
+    norm = 0.0
+    for i in range(1, n + 1):
+        for j in range(max(i - 1, 1), n + 1):
+            norm += abs(a[i][j])
+
+    nn = n
+    # The sum of the exceptional shifts applied to the diagonal
+    t = 0.0
+    while nn >= 1:
+        iterations = 0
+        while True:
+            # Look for a negligible subdiagonal entry, which splits off the block l to nn
+            l = nn
+            while l >= 2:
+                s = abs(a[l - 1][l - 1]) + abs(a[l][l])
+                if s == 0:
+                    s = norm
+                if abs(a[l][l - 1]) + s == s:
+                    a[l][l - 1] = 0.0
+                    break
+                l -= 1
+
+            x = a[nn][nn]
+            if l == nn:
+                # A single eigenvalue has split off
+                real[nn] = x + t
+                imaginary[nn] = 0.0
+                nn -= 1
+            else:
+                y = a[nn - 1][nn - 1]
+                w = a[nn][nn - 1] * a[nn - 1][nn]
+                if l == nn - 1:
+                    # A 2*2 block has split off, its eigenvalues are a real or complex pair
+                    p = 0.5 * (y - x)
+                    q = p * p + w
+                    z = math.sqrt(abs(q))
+                    x += t
+                    if q >= 0:
+                        z = p + _sign(z, p)
+                        real[nn - 1] = real[nn] = x + z
+                        if z != 0:
+                            real[nn] = x - w / z
+                        imaginary[nn - 1] = imaginary[nn] = 0.0
+                    else:
+                        real[nn - 1] = real[nn] = x + p
+                        imaginary[nn - 1] = -z
+                        imaginary[nn] = z
+                    nn -= 2
+                else:
+                    if iterations == MAX_ITERATIONS:
+                        raise ArithmeticError("The QR algorithm did not converge")
+                    if iterations == 10 or iterations == 20:
+                        # An exceptional shift, to break out of a cycle
+                        t += x
+                        for i in range(1, nn + 1):
+                            a[i][i] -= x
+                        s = abs(a[nn][nn - 1]) + abs(a[nn - 1][nn - 2])
+                        x = y = 0.75 * s
+                        w = -0.4375 * s * s
+                    iterations += 1
+
+                    # Find where the double shift step can start, at two small consecutive subdiagonal entries
+                    m = nn - 2
+                    while m >= l:
+                        z = a[m][m]
+                        r = x - z
+                        s = y - z
+                        p = (r * s - w) / a[m + 1][m] + a[m][m + 1]
+                        q = a[m + 1][m + 1] - z - r - s
+                        r = a[m + 2][m + 1]
+                        s = abs(p) + abs(q) + abs(r)
+                        p /= s
+                        q /= s
+                        r /= s
+                        if m == l:
+                            break
+                        u = abs(a[m][m - 1]) * (abs(q) + abs(r))
+                        v = abs(p) * (abs(a[m - 1][m - 1]) + abs(z) + abs(a[m + 1][m + 1]))
+                        if u + v == v:
+                            break
+                        m -= 1
+
+                    for i in range(m + 2, nn + 1):
+                        a[i][i - 2] = 0.0
+                        if i != m + 2:
+                            a[i][i - 3] = 0.0
+
+                    # Chase the bulge down the block with 3*3 Householder reflections
+                    for k in range(m, nn):
+                        if k != m:
+                            p = a[k][k - 1]
+                            q = a[k + 1][k - 1]
+                            r = a[k + 2][k - 1] if k != nn - 1 else 0.0
+                            x = abs(p) + abs(q) + abs(r)
+                            if x != 0:
+                                p /= x
+                                q /= x
+                                r /= x
+                        s = _sign(math.sqrt(p * p + q * q + r * r), p)
+                        if s == 0:
+                            continue
+                        if k == m:
+                            if l != m:
+                                a[k][k - 1] = -a[k][k - 1]
+                        else:
+                            a[k][k - 1] = -s * x
+                        p += s
+                        x = p / s
+                        y = q / s
+                        z = r / s
+                        q /= p
+                        r /= p
+
+                        # The rows k to k + 2, over the columns of the block
+                        row0 = a[k]
+                        row1 = a[k + 1]
+                        if k != nn - 1:
+                            row2 = a[k + 2]
+                            sums = [e0 + q * e1 + r * e2
+                                    for e0, e1, e2 in zip(row0[k:nn + 1], row1[k:nn + 1], row2[k:nn + 1])]
+                            row2[k:nn + 1] = [e2 - total * z for e2, total in zip(row2[k:nn + 1], sums)]
+                        else:
+                            sums = [e0 + q * e1 for e0, e1 in zip(row0[k:nn + 1], row1[k:nn + 1])]
+                        row1[k:nn + 1] = [e1 - total * y for e1, total in zip(row1[k:nn + 1], sums)]
+                        row0[k:nn + 1] = [e0 - total * x for e0, total in zip(row0[k:nn + 1], sums)]
+
+                        # The columns k to k + 2, over the rows of the block
+                        for i in range(l, min(nn, k + 3) + 1):
+                            row = a[i]
+                            total = x * row[k] + y * row[k + 1]
+                            if k != nn - 1:
+                                total += z * row[k + 2]
+                                row[k + 2] -= total * r
+                            row[k + 1] -= total * q
+                            row[k] -= total
+
+            # Carry on with this block until it has split up
+            if l >= nn - 1:
+                break
+
+    return [real[i] if imaginary[i] == 0 else complex(real[i], imaginary[i]) for i in range(1, n + 1)]
+
+
+def eigenvalue_rows(rows):
+    """The eigenvalues of the square matrix rows, by balancing, Hessenberg reduction and shifted QR, ordered from the
+    largest magnitude to the smallest"""
+    values = hessenberg_eigenvalues(hessenberg_rows(balance_rows(rows)))
+    values.sort(key=abs, reverse=True)
+    return values
+
+
+def inverse_iteration(rows, eigenvalue, iterations=3):
+    """An eigenvector (as a list of entries of unit length) of the square matrix rows for the given real eigenvalue,
+    by solving against the matrix shifted by a little more than the eigenvalue a few times"""
+    n = len(rows)
+    scale = max([abs(entry) for row in rows for entry in row] + [abs(eigenvalue), 1.0])
+    offset = scale * 1e-10
+    # Shifting exactly onto the eigenvalue would make the system singular
+    while True:
+        shift = eigenvalue + offset
+        shifted = [[entry - shift if i == j else entry for j, entry in enumerate(row)] for i, row in enumerate(rows)]
+        decomposition = LUDecomposition.LUDecomposition(shifted)
+        if not decomposition.is_singular():
+            break
+        offset *= 10
+
+    x = [1.0] * n
+    for _ in range(iterations):
+        x = decomposition.solve(x)
+        norm = math.sqrt(sum(entry * entry for entry in x))
+        x = [entry / norm for entry in x]
+    return _normalise_sign(x)
+
+
+def _normalise_sign(x):
+    """Flip the sign of a vector so its largest entry is positive, an eigenvector is only defined up to sign"""
+    largest = max(x, key=abs) if len(x) > 0 else 0
+    return [-entry for entry in x] if largest < 0 else x
+
+
+def power_iteration(rows, start=None, tolerance=1e-10, max_iterations=1000):
+    """The eigenvalue of largest magnitude of the square matrix rows and an eigenvector of it (as a list of entries of
+    unit length), by repeatedly multiplying a vector by the matrix, starting from the entries start (random by
+    default, pass the last result to warm start)
+
+    Returns (eigenvalue, entries), or raises an ArithmeticError if the vector hasn't settled to within tolerance after
+    max_iterations multiplications, which happens when two eigenvalues of largest magnitude differ (such as a complex
+    pair, or a and -a)."""
+    n = len(rows)
+    if start is None:
+        x = [random.uniform(0.5, 1.5) for _ in range(n)]
+    else:
+        x = [float(entry) for entry in start]
+    norm = math.sqrt(sum(entry * entry for entry in x))
+    if norm == 0:
+        raise ValueError("The starting vector of the power iteration can't be zero.")
+    x = _normalise_sign([entry / norm for entry in x])
+
+    for _ in range(max_iterations):
+        y = [sum(a * b for a, b in zip(row, x)) for row in rows]
+        # The Rayleigh quotient of the current vector estimates the eigenvalue
+        eigenvalue = sum(a * b for a, b in zip(x, y))
+        norm = math.sqrt(sum(entry * entry for entry in y))
+        if norm == 0:
+            # The vector is in the null space, so it is an eigenvector for 0
+            return 0.0, x
+        y = _normalise_sign([entry / norm for entry in y])
+        change = max(abs(a - b) for a, b in zip(x, y))
+        x = y
+        if change <= tolerance:
+            return eigenvalue, x
+
+    raise ArithmeticError("The power iteration did not converge in " + str(max_iterations) + " iterations")
@@ -0,0 +1,259 @@
+from fractions import Fraction
+
+import Backend
+import Dtypes
+import Matrix
+
+
+class Expression(object):
+    """A Matrix that hasn't been computed yet, built up from other Matrices with +, - and *
+
+    Each operator only adds a node to the expression graph, nothing is computed until evaluate() is called. Then the
+    chains of products are multiplied in the cheapest order, each sum of scaled matrices is computed in one pass over
+    the entries, and any part of the expression that appears more than once is only computed once."""
+
+    # The amount of rows and columns of the result, and the type its entries are stored as
+    shape = (0, 0)
+    dtype = float
+
+    def key(self):
+        """A hashable description of what this expression computes, equal for any two expressions that compute the
+        same thing from the same matrices"""
+        raise NotImplementedError()
+
+    def _compute(self, memo):
+        """Compute the rows of the result, where memo holds the rows of the expressions already computed"""
+        raise NotImplementedError()
+
+    def _rows(self, memo):
+        """Get the rows of the result, computing them only if this expression hasn't been computed already"""
+        key = self.key()
+        rows = memo.get(key)
+        if rows is None:
+            rows = self._compute(memo)
+            memo[key] = rows
+        return rows
+
+    def evaluate(self):
+        """Compute the expression, as a new Matrix"""
+        return evaluate_all(self)[0]
+
+    def __add__(self, other):
+        other = _wrap(other)
+        if other is None:
+            return NotImplemented
+        return Sum(_terms(self) + _terms(other))
+
+    def __radd__(self, other):
+        other = _wrap(other)
+        if other is None:
+            return NotImplemented
+        return Sum(_terms(other) + _terms(self))
+
+    def __sub__(self, other):
+        other = _wrap(other)
+        if other is None:
+            return NotImplemented
+        # Subtracting is adding the terms with their coefficients negated, so no negated copy is ever made
+        return Sum(_terms(self) + [(-c, e) for c, e in _terms(other)])
+
+    def __rsub__(self, other):
+        other = _wrap(other)
+        if other is None:
+            return NotImplemented
+        return Sum(_terms(other) + [(-c, e) for c, e in _terms(self)])
+
+    def __neg__(self):
+        return Sum([(-c, e) for c, e in _terms(self)])
+
+    def __mul__(self, value):
+        if _is_scalar(value):
+            return Sum([(c * value, e) for c, e in _terms(self)])
+        value = _wrap(value)
+        if value is None:
+            return NotImplemented
+        return _product(self, value)
+
+    def __rmul__(self, value):
+        if _is_scalar(value):
+            return Sum([(value * c, e) for c, e in _terms(self)])
+        value = _wrap(value)
+        if value is None:
+            return NotImplemented
+        return _product(value, self)
+
+
+class Leaf(Expression):
+    """A Matrix that has already been computed"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.shape = matrix.shape
+        self.dtype = matrix.dtype
+
+    def key(self):
+        # The same Matrix can appear any number of times in an expression
+        return ("matrix", id(self.matrix))
+
+    def _compute(self, memo):
+        return self.matrix._row_entries()
+
+
+class Sum(Expression):
+    """A sum of scaled matrices, c1 * A1 + c2 * A2 + ..., where none of the terms is a sum itself"""
+
+    def __init__(self, terms):
+        """terms is a list of (coefficient, Expression) pairs, the coefficients of any terms that compute the same
+        thing are added together"""
+        coefficients = {}
+        expressions = {}
+        for c, expression in terms:
+            key = expression.key()
+            if key in coefficients:
+                coefficients[key] = coefficients[key] + c
+            else:
+                coefficients[key] = c
+                expressions[key] = expression
+        self.terms = [(coefficients[key], expressions[key]) for key in expressions]
+
+        self.shape = self.terms[0][1].shape
+        for _, expression in self.terms:
+            if expression.shape != self.shape:
+                raise ValueError("Can only add two Matrices of equal dimensions.")
+        self.dtype = Dtypes.promote(*[Dtypes.promote(Dtypes.of(c), e.dtype) for c, e in self.terms])
+        self._key = ("sum", tuple((c, e.key()) for c, e in self.terms))
+
+    def key(self):
+        return self._key
+
+    def _compute(self, memo):
+        coefficients = [c for c, _ in self.terms]
+        matrices = [e._rows(memo) for _, e in self.terms]
+        return Backend.for_dtype(self.dtype).combine(coefficients, matrices)
+
+
+class Product(Expression):
+    """A chain of matrix products, A1 * A2 * ... * An, where none of the factors is a product itself"""
+
+    def __init__(self, factors):
+        self.factors = factors
+        for left, right in zip(factors, factors[1:]):
+            if left.shape[1] != right.shape[0]:
+                raise ValueError("Cannot multiply a Matrix with " + str(left.shape[1]) + " columns by a Matrix with "
+                                 + str(right.shape[0]) + " rows")
+        self.shape = (factors[0].shape[0], factors[-1].shape[1])
+        self.dtype = Dtypes.promote(*[factor.dtype for factor in factors])
+        self._key = ("product", tuple(factor.key() for factor in factors))
+
+    def key(self):
+        return self._key
+
+    def _split(self):
+        """Find the cheapest order to multiply the chain in, by dynamic programming over the sub-chains
+
+        Multiplying a p*q matrix by a q*r matrix takes p*q*r multiplications, so the cost of a sub-chain is the
+        cheapest over the places it can be split in two. Returns the table of the best split for every sub-chain and
+        the least amount of multiplications for the whole chain."""
+        n = len(self.factors)
+        dimensions = [self.factors[0].shape[0]] + [factor.shape[1] for factor in self.factors]
+        cost = [[0] * n for _ in range(n)]
+        split = [[0] * n for _ in range(n)]
+        for length in range(2, n + 1):
+            for i in range(n - length + 1):
+                j = i + length - 1
+                best = None
+                for k in range(i, j):
+                    total = cost[i][k] + cost[k + 1][j] + dimensions[i] * dimensions[k + 1] * dimensions[j + 1]
+                    if best is None or total < best:
+                        best = total
+                        split[i][j] = k
+                cost[i][j] = best
+        return split, cost[0][n - 1]
+
+    def order(self):
+        """The order the chain is multiplied in, as nested pairs of the indices of the factors"""
+        split, _ = self._split()
+
+        def parenthesize(i, j):
+            if i == j:
+                return i
+            return parenthesize(i, split[i][j]), parenthesize(split[i][j] + 1, j)
+        return parenthesize(0, len(self.factors) - 1)
+
+    def cost(self):
+        """The amount of multiplications of entries it takes to compute the chain in the cheapest order"""
+        return self._split()[1]
+
+    def _compute(self, memo):
+        split, _ = self._split()
+        keys = [factor.key() for factor in self.factors]
+
+        def chain(i, j):
+            if i == j:
+                return self.factors[i]._rows(memo)
+            # A sub-chain is remembered like any other expression, so chains that start or end the same way share it
+            key = ("product", tuple(keys[i:j + 1]))
+            rows = memo.get(key)
+            if rows is None:
+                dtype = Dtypes.promote(*[factor.dtype for factor in self.factors[i:j + 1]])
+                # The worker processes share the operands as doubles, so exact entries are multiplied in this process
+                workers = 1 if Dtypes.is_exact(dtype) else None
+                rows = Backend.for_dtype(dtype).matmul(chain(i, split[i][j]), chain(split[i][j] + 1, j), "classic",
+                                                       workers)
+                memo[key] = rows
+            return rows
+        return chain(0, len(self.factors) - 1)
+
+
+def _is_scalar(value):
+    return isinstance(value, float) or isinstance(value, int) or isinstance(value, Fraction)
+
+
+def _wrap(value):
+    """Make a Matrix into an expression, or None if the value can't be part of one"""
+    if isinstance(value, Expression):
+        return value
+    if isinstance(value, Matrix.Matrix):
+        return Leaf(value)
+    return None
+
+
+def _terms(expression):
+    """The (coefficient, Expression) terms of an expression, as it would appear in a sum"""
+    if isinstance(expression, Sum):
+        return list(expression.terms)
+    return [(1, expression)]
+
+
+def _product(left, right):
+    """Multiply two expressions, the coefficients of scaled factors are moved outside the chain of products"""
+    factors = []
+    coefficient = 1
+    scaled = False
+    for expression in (left, right):
+        if isinstance(expression, Sum) and len(expression.terms) == 1:
+            c, expression = expression.terms[0]
+            coefficient = coefficient * c
+            scaled = True
+        if isinstance(expression, Product):
+            factors += expression.factors
+        else:
+            factors.append(expression)
+    product = Product(factors)
+    return Sum([(coefficient, product)]) if scaled else product
+
+
+def lazy(matrix):
+    """Start an expression from a Matrix, operators on it build up the expression rather than computing it"""
+    return Leaf(matrix)
+
+
+def evaluate_all(*expressions):
+    """Compute several expressions together as a list of new Matrices, anything they have in common is only computed
+    once"""
+    memo = {}
+    results = []
+    for expression in expressions:
+        # The rows are copied into the new Matrix, so it never shares them with a Matrix in the expression
+        results.append(Matrix.Matrix._from_entries(expression._rows(memo), expression.dtype))
+    return results
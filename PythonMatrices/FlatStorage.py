@@ -0,0 +1,89 @@
+from array import array
+
+
+class FlatStorage(object):
+    """A single block of float64 entries, laid out by a shape and strides, that the compact Matrix storage shares
+    between its row and column Vectors"""
+
+    def __init__(self, buffer, shape: tuple, strides: tuple = None):
+        """Wrap any buffer of doubles (an array('d'), a memoryview, a mmap...) without copying it"""
+        view = memoryview(buffer)
+        # Reinterpret raw bytes as doubles
+        if view.format != "d":
+            view = view.cast("B").cast("d")
+        self.buffer = view
+
+        # The shape is (rows, columns), and the strides are the distance in entries between consecutive rows and
+        # consecutive columns, so the default is row-major
+        self.shape = (shape[0], shape[1])
+        if strides is None:
+            strides = (shape[1], 1)
+        self.strides = (strides[0], strides[1])
+
+        if self.shape[0] > 0 and self.shape[1] > 0 and self.offset(self.shape[0] - 1, self.shape[1] - 1) >= len(view):
+            raise ValueError("The buffer is too small for a " + str(shape[0]) + "*" + str(shape[1]) + " matrix.")
+
+    @staticmethod
+    def from_rows(rows: list):
+        """Copy a list of rows (lists or Vectors) into a new row-major buffer"""
+        buffer = array("d")
+        columns = len(rows[0]) if len(rows) > 0 else 0
+        for row in rows:
+            # Make sure the matrix has even dimensions
+            if len(row) != columns:
+                raise BaseException("Matrix must have row vectors of equal length.")
+            # A Vector is copied straight from its entries
+            buffer.extend(getattr(row, "entries", row))
+        return FlatStorage(buffer, (len(rows), columns))
+
+    @staticmethod
+    def zeros(rows: int, columns: int):
+        """Create a row-major buffer of the given dimensions, filled with zeros"""
+        return FlatStorage(array("d", bytes(8 * rows * columns)), (rows, columns))
+
+    def offset(self, i, j):
+        """The position in the buffer of the entry in row i and column j"""
+        return i * self.strides[0] + j * self.strides[1]
+
+    def index(self, i, j):
+        """The position in the buffer of the entry in row i and column j, allowing negative indices like a list"""
+        rows, columns = self.shape
+        if i < 0:
+            i += rows
+        if j < 0:
+            j += columns
+        if i < 0 or i >= rows or j < 0 or j >= columns:
+            raise IndexError()
+        return self.offset(i, j)
+
+    def _line(self, start, length, step):
+        """A view of length entries in the buffer, starting at start and spaced step apart"""
+        if length == 0:
+            return self.buffer[0:0]
+        return self.buffer[start:start + (length - 1) * step + 1:step]
+
+    def row(self, i):
+        """A view of the entries in row i, writes to it go straight to the buffer"""
+        return self._line(i * self.strides[0], self.shape[1], self.strides[1])
+
+    def column(self, j):
+        """A view of the entries in column j, writes to it go straight to the buffer"""
+        return self._line(j * self.strides[1], self.shape[0], self.strides[0])
+
+    def transpose(self):
+        """The same buffer viewed with the rows and columns swapped"""
+        return FlatStorage(self.buffer, (self.shape[1], self.shape[0]), (self.strides[1], self.strides[0]))
+
+    def is_contiguous(self):
+        """Check whether the entries are laid out row by row with no gaps"""
+        return self.strides == (self.shape[1], 1) and len(self.buffer) == self.shape[0] * self.shape[1]
+
+    def copy(self):
+        """Copy the entries into a new row-major buffer"""
+        if self.is_contiguous():
+            return FlatStorage(array("d", self.buffer), self.shape)
+        return FlatStorage.from_rows([self.row(i) for i in range(self.shape[0])])
+
+    def nbytes(self):
+        """The amount of memory the entries take up"""
+        return self.shape[0] * self.shape[1] * self.buffer.itemsize
@@ -0,0 +1,69 @@
+import Matrix
+from FrozenVector import FrozenVector as FrozenVector
+
+
+class FrozenMatrix(Matrix.Matrix):
+    """A Matrix whose entries can never change, so it can be hashed and used as a dictionary or cache key
+
+    Each row is a FrozenVector, the rows are kept in a tuple, and the hash is computed from the rows the first time
+    it's needed, then remembered. Since the rows never change, results cached on the matrix (its LU decomposition,
+    eigenvalues...) stay valid for as long as it exists. Operations that would change the entries raise a TypeError,
+    except +=, -= and *=, which give a new Matrix like they do for a tuple."""
+
+    _hash = None
+
+    def __init__(self, rows, dtype=None):
+        """Create a FrozenMatrix from a Matrix, or from rows like the Matrix constructor, the entries are copied and
+        stored as dtype (by default the type of the Matrix)"""
+        if not isinstance(rows, Matrix.Matrix):
+            rows = Matrix.Matrix(list(rows), dtype=dtype)
+        elif dtype is not None and dtype is not rows.dtype:
+            rows = Matrix.Matrix._from_entries(rows._row_entries(), dtype)
+        dtype = rows.dtype
+        self.rows = tuple(FrozenVector._frozen(row.entries, dtype) for row in rows.rows)
+        self._shape = rows.shape
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self.shape, tuple(hash(row) for row in self.rows)))
+        return self._hash
+
+    def __eq__(self, other):
+        """Check whether another Matrix has the same dimensions and entries"""
+        if not isinstance(other, Matrix.Matrix):
+            return False
+        if self is other:
+            return True
+        if self.shape != other.shape:
+            return False
+        for row, other_row in zip(self.rows, other.rows):
+            if row != other_row:
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def _refuse(self, *args):
+        raise TypeError("A FrozenMatrix can't be modified")
+
+    set_row_vector = _refuse
+    delete_row_vector = _refuse
+    set_column_vector = _refuse
+    delete_column_vector = _refuse
+    __setitem__ = _refuse
+    __delitem__ = _refuse
+    _assign_rows = _refuse
+
+    def __iadd__(self, matrix):
+        return NotImplemented
+
+    def __isub__(self, matrix):
+        return NotImplemented
+
+    def __imul__(self, value):
+        return NotImplemented
+
+    def thaw(self):
+        """Get a Matrix with a copy of the entries, which can be modified"""
+        return self.copy()
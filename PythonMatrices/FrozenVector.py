@@ -0,0 +1,55 @@
+from Vector import Vector as Vector
+
+
+class FrozenVector(Vector):
+    """A Vector whose entries can never change, so it can be hashed and used as a dictionary or cache key
+
+    The entries are kept in a tuple and the hash is computed from them the first time it's needed, then remembered.
+    Operations that would change the entries raise a TypeError, except +=, -= and *=, which give a new Vector like
+    they do for a tuple."""
+
+    __slots__ = ("_hash",)
+
+    def __init__(self, values: list, dtype=float):
+        Vector.__init__(self, values, dtype)
+        self.entries = tuple(self.entries)
+        self._hash = None
+
+    @staticmethod
+    def _frozen(entries, dtype=float):
+        """Create a FrozenVector holding a copy of entries that are already of type dtype, without converting them"""
+        vector = FrozenVector.__new__(FrozenVector)
+        vector.entries = tuple(entries)
+        vector.dtype = dtype
+        vector._version = 0
+        vector._watchers = None
+        vector._hash = None
+        return vector
+
+    def __hash__(self):
+        # Equal Vectors have equal entries, and numbers that are equal hash the same whatever their type
+        if self._hash is None:
+            self._hash = hash(self.entries)
+        return self._hash
+
+    def __setitem__(self, i, value):
+        raise TypeError("A FrozenVector can't be modified")
+
+    def __delitem__(self, i):
+        raise TypeError("A FrozenVector can't be modified")
+
+    def _assign(self, values, dtype):
+        raise TypeError("A FrozenVector can't be modified")
+
+    def __iadd__(self, vector):
+        return NotImplemented
+
+    def __isub__(self, vector):
+        return NotImplemented
+
+    def __imul__(self, value):
+        return NotImplemented
+
+    def thaw(self):
+        """Get a Vector with a copy of the entries, which can be modified"""
+        return Vector.view(list(self.entries), self.dtype)
@@ -0,0 +1,159 @@
+from array import array
+
+import Cancellation
+import LUDecomposition
+
+# The amount of rows of the product that are computed together before they are handed back
+BLOCK_SIZE = 64
+
+# Square products larger than this are split up by Strassen's method, smaller ones (including the quarters of a
+# split) use the classic kernel. See benchmarks/strassen_crossover.py for how it was chosen
+STRASSEN_CROSSOVER = 96
+
+
+def matmul_rows(a, b, block_size=None):
+    """Multiply the matrix a by the matrix b, both given as lists of rows, and return the rows of the product
+
+    The loops run in i-k-j order: each row of the product accumulates scaled rows of b, so b is only ever read row by
+    row and never transposed into columns. For every entry the products are summed in the same order as a dot
+    product of a row and a column would."""
+    result = []
+    for rows in matmul_row_blocks(a, b, block_size):
+        result.extend(rows)
+    return result
+
+
+def matmul_row(a_row, b, width):
+    """Multiply a single row by the matrix b, with width columns, in i-k-j order"""
+    # An int zero keeps exact entries exact, and adding it to a float gives the same float
+    acc = [0] * width
+    inner = len(b)
+    # Four rows of b are accumulated per pass, which quarters the amount of intermediate lists. The additions are
+    # still evaluated left to right, one k at a time, so the result is identical to adding them one by one
+    unrolled = inner - inner % 4
+    for k in range(0, unrolled, 4):
+        s0 = a_row[k]
+        s1 = a_row[k + 1]
+        s2 = a_row[k + 2]
+        s3 = a_row[k + 3]
+        acc = [x + s0 * y0 + s1 * y1 + s2 * y2 + s3 * y3
+               for x, y0, y1, y2, y3 in zip(acc, b[k], b[k + 1], b[k + 2], b[k + 3])]
+    for k in range(unrolled, inner):
+        scalar = a_row[k]
+        acc = [x + scalar * y for x, y in zip(acc, b[k])]
+    return acc
+
+
+def matmul_row_blocks(a, b, block_size=None, start=0, stop=None):
+    """Multiply the rows start to stop of a by b, yielding the rows of the product one tile of rows at a time"""
+    if block_size is None:
+        block_size = BLOCK_SIZE
+    if stop is None:
+        stop = len(a)
+
+    width = len(b[0]) if len(b) > 0 else 0
+
+    for i in range(start, stop, block_size):
+        Cancellation.checkpoint(i - start, stop - start)
+        yield [matmul_row(a_row, b, width) for a_row in a[i:min(i + block_size, stop)]]
+
+
+def _add(a, b):
+    """Add the matrix b to the matrix a, both lists of rows"""
+    return [[x + y for x, y in zip(row_a, row_b)] for row_a, row_b in zip(a, b)]
+
+
+def _sub(a, b):
+    """Subtract the matrix b from the matrix a, both lists of rows"""
+    return [[x - y for x, y in zip(row_a, row_b)] for row_a, row_b in zip(a, b)]
+
+
+def strassen_rows(a, b, crossover=None):
+    """Multiply the square matrices a and b, both given as lists of rows, by Strassen's method
+
+    Each level splits the operands into quarters and forms the product from seven products of quarters instead of
+    eight, so the work grows as n^2.81 rather than n^3. Quarters no larger than crossover use the classic kernel. An
+    odd sized matrix is padded with a zero row and column for the split, which are dropped from the result."""
+    if crossover is None:
+        crossover = STRASSEN_CROSSOVER
+    n = len(a)
+    if n <= max(crossover, 1):
+        return matmul_rows(a, b)
+
+    # Pad odd sizes up to the next even size, the padding doesn't change the product
+    if n % 2 == 1:
+        a = [list(row) + [0] for row in a] + [[0] * (n + 1)]
+        b = [list(row) + [0] for row in b] + [[0] * (n + 1)]
+        product = strassen_rows(a, b, crossover)
+        return [row[:n] for row in product[:n]]
+
+    h = n // 2
+    a11 = [row[:h] for row in a[:h]]
+    a12 = [row[h:] for row in a[:h]]
+    a21 = [row[:h] for row in a[h:]]
+    a22 = [row[h:] for row in a[h:]]
+    b11 = [row[:h] for row in b[:h]]
+    b12 = [row[h:] for row in b[:h]]
+    b21 = [row[:h] for row in b[h:]]
+    b22 = [row[h:] for row in b[h:]]
+
+    m1 = _strassen_part(0, _add(a11, a22), _add(b11, b22), crossover)
+    m2 = _strassen_part(1, _add(a21, a22), b11, crossover)
+    m3 = _strassen_part(2, a11, _sub(b12, b22), crossover)
+    m4 = _strassen_part(3, a22, _sub(b21, b11), crossover)
+    m5 = _strassen_part(4, _add(a11, a12), b22, crossover)
+    m6 = _strassen_part(5, _sub(a21, a11), _add(b11, b12), crossover)
+    m7 = _strassen_part(6, _sub(a12, a22), _add(b21, b22), crossover)
+
+    # Combine the seven products into the quarters of the result
+    c11 = _add(_sub(_add(m1, m4), m5), m7)
+    c12 = _add(m3, m5)
+    c21 = _add(m2, m4)
+    c22 = _add(_add(_sub(m1, m2), m3), m6)
+
+    return [left + right for left, right in zip(c11, c12)] + [left + right for left, right in zip(c21, c22)]
+
+
+def _strassen_part(index, a, b, crossover):
+    """One of the seven products of a level of Strassen's method, which is a seventh of the work of the level"""
+    with Cancellation.part(index, index + 1, 7):
+        return strassen_rows(a, b, crossover)
+
+
+def determinant_rows(rows):
+    """The determinant of a square matrix given as a list of rows, in closed form up to 2*2 and from its LU
+    decomposition otherwise"""
+    n = len(rows)
+    if n == 0:
+        return 1.0
+    if n == 1:
+        return rows[0][0]
+    if n == 2:
+        # Det = ad - bc
+        return rows[0][0] * rows[1][1] - rows[0][1] * rows[1][0]
+    return LUDecomposition.LUDecomposition(rows).determinant()
+
+
+def cofactor_row(rows, i):
+    """Row i of the cofactor matrix of a square matrix given as a list of rows: the signed determinants of the minors
+    left after deleting row i and each column in turn"""
+    others = [row for r, row in enumerate(rows) if r != i]
+    entries = []
+    for j in range(len(rows)):
+        minor = [list(row[:j]) + list(row[j + 1:]) for row in others]
+        cofactor = determinant_rows(minor)
+        cofactor *= (-1)**(i + j)
+        entries.append(cofactor)
+    return entries
+
+
+def write_row(entries, values):
+    """Overwrite a row's entries (a list, a view of a compact buffer, or a Views.EntriesView) in place with the given
+    values"""
+    if isinstance(entries, list):
+        entries[:] = values
+    elif getattr(entries, "contiguous", False):
+        entries[:] = array("d", values)
+    else:
+        for j in range(len(values)):
+            entries[j] = values[j]
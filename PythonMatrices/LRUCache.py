@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """A dictionary holding at most maxsize entries, where adding one more evicts the least recently used one
+
+    It counts its hits, misses and evictions, so how well a cache is working can be checked with stats()."""
+
+    def __init__(self, maxsize=128):
+        """Create an empty cache, a maxsize of None lets it grow without bound"""
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Get the value stored for key, marking it as the most recently used, or default if it isn't stored"""
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        """Store a value for key, evicting the least recently used entry if the cache is full"""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if self.maxsize is not None and len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key):
+        """Check whether a value is stored for key, without counting it as a use"""
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        """Remove every entry, the stats are kept"""
+        self.entries.clear()
+
+    def stats(self):
+        """Get the hits, misses, evictions, current size and maxsize of the cache, and the fraction of lookups that
+        were hits"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+        }
@@ -0,0 +1,225 @@
+import sys
+
+import Cancellation
+import Matrix
+from Vector import Vector as Vector
+
+
+class LUDecomposition(object):
+    """An LU factorisation with partial pivoting, so that P * A = L * U"""
+
+    def __init__(self, rows: list):
+        """Factorise the given list of row entries (a list of lists of numbers) in O(n^3)"""
+
+        # A private copy of the entries, so the source matrix is never modified and rank() can eliminate them again
+        self._rows = [list(row) for row in rows]
+        self.row_count = len(self._rows)
+        self.column_count = len(self._rows[0]) if self.row_count > 0 else 0
+
+        # When finding the rank, pivots smaller than this are treated as zero, after every row and column has been
+        # scaled to a largest entry of 1
+        self.tolerance = max(self.row_count, self.column_count) * sys.float_info.epsilon
+        self._rank = None
+
+        # Only a column that is exactly zero below the pivots is skipped, however small the other entries are, so
+        # the determinant, solutions and inverse of a matrix with widely different scales stay correct
+        self.factors, self.permutation, self.sign, self.pivot_columns = self._eliminate(
+            [list(row) for row in self._rows], 0.0)
+
+    def _eliminate(self, a, tolerance):
+        """Eliminate the rows a in place with partial pivoting, treating pivots no larger than tolerance as zero
+
+        Returns the combined factors (L is stored below the pivots and U on and above them), the permutation of the
+        rows, the sign of the permutation and the columns in which a pivot was found."""
+        # The permutation stores which row of the original matrix ended up in each row of U
+        permutation = list(range(self.row_count))
+        # Each row swap flips the sign of the determinant
+        sign = 1
+        # The columns in which a pivot was found
+        pivot_columns = []
+
+        # Eliminating from column k on is about (n - k)^3 of the n^3 work
+        cube = self.column_count ** 3
+
+        # r is the row the next pivot is placed in, it only advances when a pivot is found
+        r = 0
+        for k in range(self.column_count):
+            if r >= self.row_count:
+                break
+            Cancellation.checkpoint(cube - (self.column_count - k) ** 3, cube)
+
+            # Find the row with the largest entry in this column to use as the pivot
+            pivot_row = r
+            pivot_value = abs(a[r][k])
+            for i in range(r + 1, self.row_count):
+                value = abs(a[i][k])
+                if value > pivot_value:
+                    pivot_row = i
+                    pivot_value = value
+
+            # If the whole column is zero below row r there is no pivot in it
+            if pivot_value <= tolerance:
+                continue
+
+            # Swap the pivot row into place
+            if pivot_row != r:
+                a[r], a[pivot_row] = a[pivot_row], a[r]
+                permutation[r], permutation[pivot_row] = permutation[pivot_row], permutation[r]
+                sign = -sign
+
+            # Eliminate the entries below the pivot, storing the multipliers where the zeros would go
+            pivot = a[r]
+            pivot_entry = pivot[k]
+            for i in range(r + 1, self.row_count):
+                row = a[i]
+                factor = row[k] / pivot_entry
+                row[k] = factor
+                if factor != 0:
+                    for j in range(k + 1, self.column_count):
+                        row[j] -= factor * pivot[j]
+
+            pivot_columns.append(k)
+            r += 1
+
+        return a, permutation, sign, pivot_columns
+
+    def rank(self):
+        """The amount of linearly independent rows in the factorised matrix, where rows that only differ from a
+        combination of the others by rounding errors count as dependent"""
+        if self._rank is None:
+            # Rounding errors leave tiny pivots where there should be none, so the rows are eliminated again with
+            # pivots within tolerance treated as zero. Scaling the rows and columns doesn't change the rank, and
+            # scaling them all to a largest entry of 1 first makes the tolerance mean the same at any scale
+            a = [list(row) for row in self._rows]
+            for row in a:
+                largest = max([abs(entry) for entry in row] + [0.0])
+                if largest > 0:
+                    row[:] = [entry / largest for entry in row]
+            for j in range(self.column_count):
+                largest = max(abs(row[j]) for row in a)
+                if largest > 0:
+                    for row in a:
+                        row[j] /= largest
+            self._rank = len(self._eliminate(a, self.tolerance)[3])
+        return self._rank
+
+    def is_singular(self):
+        """Check whether the factorised matrix is square and has no inverse, which is only when a pivot is exactly
+        zero"""
+        return self.row_count != self.column_count or len(self.pivot_columns) < self.row_count
+
+    def determinant(self):
+        """The determinant is the product of the pivots, with the sign of the row permutation"""
+        if self.row_count != self.column_count:
+            raise ArithmeticError("Cannot compute the determinant of a non-square matrix")
+
+        # A matrix without a full set of pivots is singular
+        if self.is_singular():
+            return 0.0
+
+        det = float(self.sign)
+        for i in range(self.row_count):
+            det *= self.factors[i][i]
+        return det
+
+    def solve_rows(self, rows: list):
+        """Solve A * X = B, where B is given as a list of its rows, and return the rows of X"""
+        if self.is_singular():
+            raise ArithmeticError("Cannot solve a linear system with a singular matrix")
+
+        n = self.row_count
+        if len(rows) != n:
+            raise ValueError("The right hand side must have as many rows as the matrix.")
+
+        factors = self.factors
+        # Apply the row permutation to B, copying the rows as they are overwritten with the solution
+        x = [list(rows[p]) for p in self.permutation]
+        width = len(x[0]) if n > 0 else 0
+
+        # Forward substitution, L * Y = P * B, where L has a unit diagonal. Each substitution is half the work, and
+        # the first i rows of one are about i^2 of its n^2
+        for i in range(1, n):
+            Cancellation.checkpoint(i * i, 2 * n * n)
+            row = x[i]
+            multipliers = factors[i]
+            for k in range(i):
+                factor = multipliers[k]
+                if factor != 0:
+                    solved = x[k]
+                    for j in range(width):
+                        row[j] -= factor * solved[j]
+
+        # Back substitution, U * X = Y
+        for i in range(n - 1, -1, -1):
+            Cancellation.checkpoint(n * n + (n - 1 - i) ** 2, 2 * n * n)
+            row = x[i]
+            upper = factors[i]
+            for k in range(i + 1, n):
+                factor = upper[k]
+                if factor != 0:
+                    solved = x[k]
+                    for j in range(width):
+                        row[j] -= factor * solved[j]
+            pivot = upper[i]
+            for j in range(width):
+                row[j] /= pivot
+
+        return x
+
+    def solve(self, b: list):
+        """Solve A * x = b for a single right hand side b, given as a list of numbers"""
+        return [row[0] for row in self.solve_rows([[entry] for entry in b])]
+
+    def inverse_rows(self):
+        """Get the rows of the inverse of the factorised matrix, by solving against the identity"""
+        n = self.row_count
+        identity = []
+        for i in range(n):
+            entries = [0.0] * n
+            entries[i] = 1.0
+            identity.append(entries)
+        return self.solve_rows(identity)
+
+    def _multiplier_rows(self):
+        """Get the rows of L (row_count * row_count), with the unit diagonal filled in"""
+        rows = []
+        for i in range(self.row_count):
+            entries = [0.0] * self.row_count
+            # Only the rows below a pivot have multipliers for that pivot
+            for r in range(min(i, len(self.pivot_columns))):
+                entries[r] = self.factors[i][self.pivot_columns[r]]
+            entries[i] = 1.0
+            rows.append(entries)
+        return rows
+
+    def _upper_rows(self):
+        """Get the rows of U (row_count * column_count), with the stored multipliers cleared"""
+        rows = []
+        for i in range(self.row_count):
+            entries = [0.0] * self.column_count
+            if i < len(self.pivot_columns):
+                # Everything from the pivot to the right belongs to U
+                for j in range(self.pivot_columns[i], self.column_count):
+                    entries[j] = self.factors[i][j]
+            rows.append(entries)
+        return rows
+
+    @property
+    def P(self):
+        """The permutation Matrix, such that P * A = L * U"""
+        rows = []
+        for i in range(self.row_count):
+            entries = [0.0] * self.row_count
+            entries[self.permutation[i]] = 1.0
+            rows.append(Vector(entries))
+        return Matrix.Matrix(rows)
+
+    @property
+    def L(self):
+        """The unit lower triangular Matrix of multipliers"""
+        return Matrix.Matrix([Vector(entries) for entries in self._multiplier_rows()])
+
+    @property
+    def U(self):
+        """The upper triangular (row echelon) Matrix"""
+        return Matrix.Matrix([Vector(entries) for entries in self._upper_rows()])
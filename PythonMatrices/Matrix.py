@@ -1,14 +1,56 @@
+import math
+import mmap
+import weakref
+from array import array
+from fractions import Fraction
+
+import Async
+import Backend
+import Bareiss
+import Cancellation
+import Dtypes
+import Eigen
+import Expression
+import Kernels
+import LUDecomposition
+import MatrixFile
+import MinorExpansion
+import Parallel
+import Views
+from FlatStorage import FlatStorage
 from Vector import Vector as Vector
 
 
+# The amount of text from_csv reads and parses at a time
+CSV_CHUNK_SIZE = 1 << 20
+
+
 class Matrix(object):
     """A Matrix is effectively a table of values or a list of Vectors"""
 
     # The rows stores each row of the matrix as a vector
     rows = []
 
-    def __init__(self, rows: list):
-        """Create a new Matrix where rows is an arbitrary amount of Vector objects"""
+    # Results derived from the entries (such as the LU decomposition), and the state of the rows they were computed
+    # from
+    _cache = None
+    _cache_state = None
+
+    # In compact mode every entry lives in one flat buffer of doubles, and the row Vectors are views of it
+    _storage = None
+
+    # The (rows, columns) dimensions, worked out the first time they're needed and then kept up to date by the
+    # methods that add or remove rows and columns
+    _shape = None
+
+    # The views taken of this matrix that still read through to it, which are given copies of what they show before
+    # the matrix is changed
+    _views = None
+
+    def __init__(self, rows: list, compact=False, dtype=None):
+        """Create a new Matrix where rows is an arbitrary amount of Vector objects, if compact is set the entries are
+        stored in a single flat buffer instead of a list per row. The entries are stored as dtype (int, Fraction or
+        float), by default the widest type of the row Vectors, or float"""
 
         # If no row vectors were provided stop
         if len(rows) == 0:
@@ -21,15 +63,26 @@ class Matrix(object):
             # list
             rows = rows[0]
 
-        # Make sure each row is a Vector
+        # In compact mode the entries are copied straight into the buffer, without making a Vector for each row first
+        if compact:
+            if dtype is not None and dtype is not float:
+                raise ValueError("A compact Matrix can only store float entries.")
+            self._set_storage(FlatStorage.from_rows(rows))
+            return
+
+        if dtype is None:
+            dtypes = [row.dtype for row in rows if isinstance(row, Vector)]
+            dtype = Dtypes.promote(*dtypes) if len(dtypes) > 0 else float
+
+        # Make sure each row is a Vector, of the entry type
         for i in range(len(rows)):
             # Unpack the row into the constructor
             row = rows[i]
             vector = None
             if isinstance(row, list):
-                vector = Vector(row)
+                vector = Vector(row, dtype)
             elif isinstance(row, Vector):
-                vector = row
+                vector = row if row.dtype is dtype else Vector(list(row.entries), dtype)
             rows[i] = vector
 
         # In order to ensure that the matrix has even dimensions, make sure all
@@ -41,46 +94,256 @@ class Matrix(object):
                     raise BaseException("Matrix must have row vectors of equal length.")
 
         self.rows = rows
+        self._shape = (len(rows), len(rows[0]) if len(rows) > 0 else 0)
+
+    @staticmethod
+    def from_storage(storage: FlatStorage):
+        """Create a compact Matrix that uses the given FlatStorage for its entries, without copying them"""
+        matrix = Matrix([])
+        matrix._set_storage(storage)
+        return matrix
+
+    @staticmethod
+    def _from_entries(rows, dtype=float):
+        """Create a Matrix from the lists of entries that a backend computed"""
+        return Matrix([Vector(entries, dtype) for entries in rows])
+
+    @property
+    def dtype(self):
+        """The type every entry is stored as: int, Fraction or float"""
+        return self.rows[0].dtype if len(self.rows) > 0 else float
+
+    def _row_entries(self):
+        """Get the raw sequence of entries of every row, which is what the backend computes with"""
+        return [row.entries for row in self.rows]
+
+    def _shares_entries(self, other):
+        """Check whether any row of this matrix is stored in the same place as a row of the other matrix"""
+        if self.is_compact() and other.is_compact():
+            return self._storage.buffer.obj is other._storage.buffer.obj
+        # A view shares the entries of the matrix it reads from
+        if isinstance(other, MatrixView):
+            return other._shares_entries(self)
+        entries = set(id(row.entries) for row in other.rows)
+        for row in self.rows:
+            if id(row.entries) in entries:
+                return True
+        return False
+
+    def _set_storage(self, storage):
+        """Switch to compact mode with the given storage, the rows become Vector views of it"""
+        self._detach_views()
+        self._storage = storage
+        self.rows = [Vector.view(storage.row(i)) for i in range(storage.shape[0])]
+        self._shape = storage.shape
+
+    def is_compact(self):
+        """A check to see whether the entries are stored in a single flat buffer"""
+        return self._storage is not None
+
+    def to_compact(self):
+        """Get a copy of this matrix with its entries stored in a single flat buffer"""
+        if self.is_compact():
+            return Matrix.from_storage(self._storage.copy())
+        return Matrix.from_storage(FlatStorage.from_rows(self.rows))
+
+    def save(self, path):
+        """Write the matrix to a binary file at path, every entry is kept at full float64 precision. The file only
+        holds float64 entries, so a matrix of exact entries (ints or Fractions) is refused rather than silently coming
+        back as floats"""
+        if Dtypes.is_exact(self.dtype):
+            raise ValueError("Matrix files only hold float entries, save a float copy of the matrix with "
+                             "matrix.astype(float).save(path)")
+        if self.is_compact():
+            MatrixFile.save(path, self._storage)
+            return
+        with open(path, "wb") as file:
+            MatrixFile.write_header(file, self.shape)
+            MatrixFile.write_rows(file, self.rows)
+
+    @staticmethod
+    def load(path, mmap_mode=None):
+        """Read a matrix written by save, as a compact Matrix
+
+        With an mmap_mode of "r" (read only), "r+" (writes go to the file) or "c" (writes stay in memory) the file is
+        memory-mapped rather than read, so even a matrix larger than memory opens instantly and its rows are paged in
+        as they are used."""
+        return Matrix.from_storage(MatrixFile.load(path, mmap_mode))
+
+    @staticmethod
+    def load_rows(path, start, stop):
+        """Read only the rows start to stop of a matrix written by save, as a compact Matrix"""
+        return Matrix.from_storage(MatrixFile.load_rows(path, start, stop))
+
+    @staticmethod
+    def _from_lists(rows, dtype=float):
+        """Create a Matrix that adopts the given lists of entries as its rows, which must already be of type dtype and
+        of equal length, so nothing is checked or converted"""
+        matrix = Matrix([])
+        matrix.rows = [Vector.view(row, dtype) for row in rows]
+        matrix._shape = (len(rows), len(rows[0]) if len(rows) > 0 else 0)
+        return matrix
+
+    @staticmethod
+    def from_buffer(buffer, shape: tuple = None):
+        """Create a compact Matrix of the given (rows, columns) shape that uses a writable buffer of doubles (an
+        array('d'), a memoryview, a NumPy array...) or of raw bytes holding doubles (a bytearray, a mmap...) as its
+        entries without copying them, a 2 dimensional buffer gives its own shape. A buffer of any other type of number
+        (such as an array('i') or array('B')) is copied into doubles, and so is a read-only buffer (such as bytes),
+        since the entries of a Matrix can be written to"""
+        view = memoryview(buffer)
+        if shape is None:
+            if view.ndim != 2:
+                raise ValueError("The shape of a 1 dimensional buffer must be given.")
+            shape = view.shape
+        if view.ndim > 1:
+            view = view.cast("B").cast(view.format)
+        # Only untyped byte buffers hold the bytes of doubles, a typed array of bytes holds a number in each
+        owner = view.obj if isinstance(buffer, memoryview) else buffer
+        raw = view.format == "B" and isinstance(owner, (bytes, bytearray, mmap.mmap))
+        if raw and view.readonly:
+            view = array("d", view.tobytes())
+        elif not raw and (view.format != "d" or view.readonly):
+            view = array("d", view)
+        return Matrix.from_storage(FlatStorage(view, shape))
+
+    @staticmethod
+    def from_iterable(rows, dtype=float):
+        """Create a Matrix from an iterable of rows (each an iterable of numbers), reading one row at a time so the
+        rows never have to be held in a list first, float entries are streamed into a single compact buffer"""
+        if dtype is float:
+            buffer = array("d")
+            height = 0
+            width = None
+            for row in rows:
+                start = len(buffer)
+                # A Vector is read straight from its entries
+                row = getattr(row, "entries", row)
+                # The array converts and checks the entries itself, without a call per entry
+                if isinstance(row, list):
+                    buffer.fromlist(row)
+                elif isinstance(row, array) and row.typecode == "d":
+                    buffer.extend(row)
+                else:
+                    buffer.fromlist(list(row))
+                if width is None:
+                    width = len(buffer) - start
+                elif len(buffer) - start != width:
+                    raise BaseException("Matrix must have row vectors of equal length.")
+                height += 1
+            return Matrix.from_storage(FlatStorage(buffer, (height, width or 0)))
+
+        lists = []
+        convert = Dtypes.converter(dtype)
+        for row in rows:
+            entries = [convert(value) for value in getattr(row, "entries", row)]
+            if len(lists) > 0 and len(entries) != len(lists[0]):
+                raise BaseException("Matrix must have row vectors of equal length.")
+            lists.append(entries)
+        return Matrix._from_lists(lists, dtype)
+
+    @staticmethod
+    def from_csv(path, delimiter=",", dtype=float, skip_rows=0, chunk_size=CSV_CHUNK_SIZE):
+        """Read a Matrix from a text file with one row per line and the entries separated by delimiter, after skipping
+        skip_rows lines (such as a header), float entries go into a single compact buffer
+
+        The file is read and parsed about chunk_size bytes at a time, so memory holds the parsed entries and one
+        chunk of text, rather than every line of the file."""
+        # Each type parses its own text, such as "3", "1/3" or "2.5e-3"
+        convert = Dtypes.check(dtype)
+
+        def lines():
+            with open(path, "r") as file:
+                skipped = 0
+                while True:
+                    chunk = file.readlines(chunk_size)
+                    if len(chunk) == 0:
+                        return
+                    for line in chunk:
+                        if skipped < skip_rows:
+                            skipped += 1
+                            continue
+                        line = line.strip()
+                        if len(line) > 0:
+                            yield map(convert, line.split(delimiter))
+        return Matrix.from_iterable(lines(), dtype)
+
+    @staticmethod
+    def zeros(rows: int, columns: int = None, dtype=float):
+        """Create a Matrix of the given dimensions (square if columns isn't given) filled with zeros of type dtype"""
+        return Matrix.full(rows, rows if columns is None else columns, 0, dtype)
+
+    @staticmethod
+    def full(rows: int, columns: int, value, dtype=None):
+        """Create a Matrix of the given dimensions with every entry set to value, stored as dtype (by default the type
+        of value)"""
+        if dtype is None:
+            dtype = Dtypes.of(value)
+        value = Dtypes.converter(dtype)(value)
+        # Each row is a list of its own, so writing to one row doesn't change the others
+        return Matrix._from_lists([[value] * columns for _ in range(rows)], dtype)
+
+    @staticmethod
+    def diag(values, dtype=None):
+        """Create a square Matrix with the given values (a Vector or any iterable of numbers) on its diagonal and zeros
+        everywhere else, stored as dtype (by default the type of the Vector, or float)"""
+        if dtype is None:
+            dtype = values.dtype if isinstance(values, Vector) else float
+        convert = Dtypes.converter(dtype)
+        values = [convert(value) for value in getattr(values, "entries", values)]
+        zero = convert(0)
+        rows = []
+        for i, value in enumerate(values):
+            row = [zero] * len(values)
+            row[i] = value
+            rows.append(row)
+        return Matrix._from_lists(rows, dtype)
 
     def copy(self):
+        # A compact matrix is copied as one block
+        if self.is_compact():
+            return Matrix.from_storage(self._storage.copy())
+
+        # Writes to the rows of this matrix can't be intercepted, so the copy can't share them, but each row is
+        # copied in one go rather than entry by entry
         new_rows = []
         for row_vector in self.rows:
-            new_entries = []
-            for entry in row_vector:
-                new_entries += [entry]
-            new_rows += [Vector(new_entries)]
+            new_rows += [Vector.view(list(row_vector.entries), row_vector.dtype)]
         return Matrix(new_rows)
 
-    @staticmethod
-    def identity(size):
-        """Create a square identity matrix of the given dimensions"""
-
-        # Initialise the list of rows to be he desired length
-        rows = [[0] * size] * size
-        # Iterate over every new row in the matrix
-        for i in range(size):
-            for j in range(size):
-                if i == j:
-                    rows[i][j] = 1
+    def astype(self, dtype):
+        """Get a copy of this matrix with every entry converted to dtype (int, Fraction or float), this matrix and its
+        rows are left as they are"""
+        return Matrix._from_entries(self._row_entries(), dtype)
 
-        for i in range(size):
-            rows[i] = Vector(rows[i])
-        return Matrix(rows)
+    @staticmethod
+    def identity(size, dtype=float):
+        """Create a square identity matrix of the given dimensions, with entries of type dtype"""
+        convert = Dtypes.converter(dtype)
+        return Matrix.diag([convert(1)] * size, dtype)
+
+    @property
+    def shape(self):
+        """The (rows, columns) dimensions of the matrix, a check that costs nothing however large the matrix is"""
+        if self._shape is None:
+            rows = self.rows
+            self._shape = (len(rows), len(rows[0]) if len(rows) > 0 else 0)
+        return self._shape
 
     def row_length(self):
         """Return the amount of horizontal entries in the matrix (assuming symmetry)"""
-        return len(self.column_vectors())
+        return self.shape[1]
 
     def __len__(self):
-        return self.row_length()
+        return self.shape[1]
 
     def column_length(self):
         """Return the amount of vertical entries in the matrix (assuming symmetry)"""
-        return len(self.row_vectors())
+        return self.shape[0]
 
     def is_square(self):
         """A check to see whether the matrix has equal column and row dimensions"""
-        return self.row_length() == self.column_length()
+        return self.shape[0] == self.shape[1]
 
     def is_zero(self):
         """A Check to see whether the Matrix has all zero entries"""
@@ -96,26 +359,53 @@ class Matrix(object):
         return self.rows
 
     def column_vectors(self):
-        """Get all the columns vectors in the matrix"""
-
-        # Get the row_vectors and the length of the first row
-        # It is assumed that all rows have equal length
-        rows = self.row_vectors()
-        row_length = len(rows[0])
-        # Create an empty list for the column Vectors
-        column_vectors = []
-        # Iterate over all the indices in the row length
-        for i in range(row_length):
-            # Create an empty list for the entries in this column vector
-            entries = []
-            # Iterate over all rows vertically and grab the ith entry in it and add this to the entries list
-            for row in rows:
-                entries.append(row[i])
-            # unpack and convert the list to a vector and add it to the column vectors list
-            column = Vector(entries)
-            column_vectors.append(column)
-
-        return column_vectors
+        """Get all the columns vectors in the matrix, as new Vectors"""
+        # The transposed rows are new lists, so they are adopted without another copy
+        dtype = self.dtype
+        return [Vector.view(entries, dtype) for entries in Backend.for_dtype(dtype).transpose(self._row_entries())]
+
+    def _track(self, view):
+        """Remember a view that reads through to this matrix, so it can be given its own copy before the matrix changes
+        """
+        if self._views is None:
+            self._views = weakref.WeakSet()
+            # Writes straight to the row Vectors (m[i][j] = x) detach the views too
+            for row in self.rows:
+                row._watch(self)
+        self._views.add(view)
+        return view
+
+    def _detach_views(self):
+        """Give every view still reading through to this matrix a copy of the entries it shows, so changing the matrix
+        doesn't change them (or leave them indexing rows and columns that are gone)"""
+        if self._views is not None:
+            views = self._views
+            self._views = None
+            for view in list(views):
+                view._detach()
+            for row in self.rows:
+                row._unwatch(self)
+
+    def row_view(self, column_index):
+        """Get a copy-on-write view of a row vector, which reads through to this matrix until either is changed"""
+        entries = Views.RowEntries(self.rows, column_index, range(len(self.rows[column_index])))
+        return Vector.view(self._track(entries), self.dtype)
+
+    def column_view(self, row_index):
+        """Get a copy-on-write view of a column vector, which reads through to this matrix until either is changed"""
+        entries = Views.ColumnEntries(self.rows, row_index, range(len(self.rows)))
+        return Vector.view(self._track(entries), self.dtype)
+
+    def _view(self, rows, columns, transposed=False):
+        """Get a copy-on-write view of the rows and columns picked out by the selections rows and columns (slices or
+        Views.Omit), with them swapped if transposed is set. It isn't tracked, so it must not outlive a change to
+        this matrix unless it is passed to _track"""
+        height, width = self.shape
+        return MatrixView(self, Views.select(range(height), rows), Views.select(range(width), columns), transposed)
+
+    def minor(self, row_index, column_index):
+        """Get a copy-on-write view of the matrix with a row and a column left out"""
+        return self._track(self._view(Views.Omit(row_index), Views.Omit(column_index)))
 
     def get_row_vector(self, column_index):
         """Get the row vector columnIndex rows from the first row"""
@@ -134,16 +424,28 @@ class Matrix(object):
             return
 
         # Make sure column_index is in range
-        rows = self.row_vectors()
-        if column_index > len(rows):
+        if column_index > self.shape[0]:
             return
 
         # Make sure that the length of vector is the same as the other row
         # vectors:
-        if len(vector) != self.row_length():
+        if len(vector) != self.shape[1]:
             return
 
-        # Set the vector
+        # A compact matrix copies the entries into its buffer, the row stays a view of it
+        if self.is_compact():
+            self._detach_views()
+            row = self.rows[column_index]
+            if row is not vector:
+                for j in range(len(vector)):
+                    row.entries[j] = float(vector[j])
+                row._version += 1
+            return
+
+        self._detach_views()
+        # Set the vector, converted if its entries are of another type
+        if vector.dtype is not self.dtype:
+            vector = Vector(list(vector.entries), self.dtype)
         self.rows[column_index] = vector
 
     def delete_row_vector(self, column_index):
@@ -153,30 +455,61 @@ class Matrix(object):
         # check
         # whether it is
         # Negative, we can allow for negative indexing
-        if column_index > len(self):
+        height, width = self.shape
+        if column_index > height:
+            return
+        self._detach_views()
+
+        # The buffer of a compact matrix can't shrink, so the remaining rows are copied into a new one
+        if self.is_compact():
+            rows = list(self.rows)
+            del rows[column_index]
+            self._set_storage(FlatStorage.from_rows(rows))
             return
 
         del self.rows[column_index]
+        # Without any rows there are no columns either
+        self._shape = (height - 1, width if height > 1 else 0)
 
     def __getitem__(self, column_index):
-        """Equivalent to getRowVector(), but allows for indexing shorthand"""
+        """Equivalent to getRowVector(), but allows for indexing shorthand, m[i, j] gets a single entry, and slices
+        such as m[1:5, 2:8] or m[1:5] get a copy-on-write view of part of the matrix"""
+        if isinstance(column_index, slice):
+            return self._track(self._view(column_index, slice(None)))
+        if isinstance(column_index, tuple):
+            i, j = column_index
+            if isinstance(i, slice) or isinstance(j, slice):
+                # A single row or column in a slice is kept as a row or column of the view
+                if not isinstance(i, slice):
+                    i = slice(i, i + 1) if i != -1 else slice(i, None)
+                if not isinstance(j, slice):
+                    j = slice(j, j + 1) if j != -1 else slice(j, None)
+                return self._track(self._view(i, j))
+            # A compact matrix reads the entry straight out of its buffer
+            if self.is_compact():
+                return self._storage.buffer[self._storage.index(i, j)]
+            return self.rows[i].entries[j]
         return self.get_row_vector(column_index)
 
     def __setitem__(self, column_index, value):
-        """Equivalent to setRowVector(), but allows for indexing shorthand"""
+        """Equivalent to setRowVector(), but allows for indexing shorthand, m[i, j] = x sets a single entry"""
+        if isinstance(column_index, tuple):
+            i, j = column_index
+            self._detach_views()
+            self.rows[i][j] = value
+            return
         self.set_row_vector(column_index, value)
 
     def __delitem__(self, column_index):
         self.delete_row_vector(column_index)
 
     def get_column_vector(self, row_index):
-        """Get the column vector row_index units horizontally from the first column"""
+        """Get the column vector row_index units horizontally from the first column, as a new Vector"""
         # Make sure the index is not out of range
-        columns = self.column_vectors()
-        if row_index > len(columns):
+        if self.shape[0] == 0 or row_index > self.shape[1]:
             return None
-        # Return the value
-        return columns[row_index]
+        # Only the one column is copied out, rather than every column
+        return Vector.view([row.entries[row_index] for row in self.rows], self.dtype)
 
     def set_column_vector(self, row_index, vector):
         """Get the column vector row_index units horizontally from the first column"""
@@ -185,18 +518,18 @@ class Matrix(object):
             return
 
         # Make sure row_index is in range
-        columns = self.column_vectors()
-        if row_index > len(columns):
+        if row_index > self.shape[1]:
             return
 
         # Make sure vector vector has the same length as the column vectors:
-        if len(vector) != self.column_length():
+        if len(vector) != self.shape[0]:
             return
+        self._detach_views()
 
         # Get all rows in the matrix
         rows = self.rows
         # Iterate vertically over row indices
-        for i in range(self.column_length()):
+        for i in range(self.shape[0]):
             # Get the current row
             row = rows[i]
             # Set the vector at row index to be this vertical index vector from
@@ -208,66 +541,213 @@ class Matrix(object):
     def delete_column_vector(self, row_index):
         """Delete the column vector row_index units horizontally from the first column"""
         # Make sure the index is not out of range
-        if row_index > self.row_length():
+        height, width = self.shape
+        if row_index > width:
+            return
+        self._detach_views()
+
+        # The buffer of a compact matrix can't shrink, so the remaining columns are copied into a new one
+        if self.is_compact():
+            rows = []
+            for row in self.rows:
+                entries = list(row.entries)
+                del entries[row_index]
+                rows.append(entries)
+            self._set_storage(FlatStorage.from_rows(rows))
             return
 
         for rowVector in self.row_vectors():
             del rowVector[row_index]
+        self._shape = (height, width - 1)
 
-    def determinant(self):
+    def _results_cache(self):
+        """Get the dictionary of cached results, clearing it if the matrix was modified since they were computed"""
+        rows = self.rows
+        state = self._cache_state
+        stale = state is None or len(state) != len(rows)
+        if not stale:
+            # Every row must still be the same Vector object, and not have been written to since
+            for (row, version), current in zip(state, rows):
+                if row is not current or version != current._version:
+                    stale = True
+                    break
+
+        if stale:
+            self._cache = {}
+            self._cache_state = [(row, row._version) for row in rows]
+        return self._cache
+
+    def lu(self):
+        """Get the LU decomposition with partial pivoting of this matrix, it is cached until the matrix changes"""
+        cache = self._results_cache()
+        if "lu" not in cache:
+            cache["lu"] = LUDecomposition.LUDecomposition([row.entries for row in self.rows])
+        return cache["lu"]
+
+    def bareiss(self):
+        """Get the fraction-free elimination of this matrix, which gives exact results for int and Fraction entries,
+        it is cached until the matrix changes"""
+        cache = self._results_cache()
+        if "bareiss" not in cache:
+            cache["bareiss"] = Bareiss.Bareiss(self._row_entries())
+        return cache["bareiss"]
+
+    def _elimination(self):
+        """The factorisation the linear algebra is done with, exact entries are eliminated fraction-free so they stay
+        exact, floats are decomposed with pivoting"""
+        if Dtypes.is_exact(self.dtype):
+            return self.bareiss()
+        return self.lu()
+
+    def rank(self):
+        """The amount of linearly independent rows (or columns) in the matrix"""
+        return self._elimination().rank()
+
+    def is_invertible(self):
+        """A check to see whether the matrix is square and has full rank"""
+        return self.is_square() and not self._elimination().is_singular()
+
+    def minors(self):
+        """Get the exact minor expansion of this matrix, which remembers the determinant and cofactors it has
+        computed, it is cached until the matrix changes"""
+        cache = self._results_cache()
+        if "minors" not in cache:
+            cache["minors"] = MinorExpansion.MinorExpansion(self._row_entries())
+        return cache["minors"]
+
+    def determinant(self, method="lu"):
+        """Compute the determinant, using the LU decomposition, exactly by Laplace expansion if method is "laplace"
+        (only feasible for small matrices), or exactly by Laplace expansion with every minor computed once if method
+        is "exact" (O(2^n * n) time and 2^n minors of memory, about a second at n = 18 and doubling with each size
+        after that)"""
 
         if not self.is_square():
             raise ArithmeticError("Cannot compute the determinant of a non-square matrix")
 
-        if self.row_length() == 2 and self.column_length() == 2:
+        if method not in ("lu", "laplace", "exact"):
+            raise ValueError("Unknown determinant method: " + str(method))
+
+        if self.shape == (2, 2):
 
             # Det = ad - bc
             return self[0][0] * self[1][1] - self[0][1] * self[1][0]
 
+        elif method == "lu":
+
+            # Exact entries are eliminated fraction-free, which is exact and still O(n^3)
+            if Dtypes.is_exact(self.dtype):
+                return self.bareiss().determinant()
+
+            # The product of the pivots of the LU decomposition, O(n^3)
+            return Backend.get_backend().determinant(self)
+
+        elif method == "exact":
+
+            # Division free, so the result is exact, and the minors are kept for the cofactor matrix
+            return self.minors().determinant()
+
         else:
 
+            n = self.shape[1]
+
+            # The expansion bottoms out at a single entry, and the empty matrix has determinant 1
+            if n == 1:
+                return self[0][0]
+            if n == 0:
+                return 1
+
             det = 0
-            for i in range(self.row_length()):
+            for i in range(n):
+                Cancellation.checkpoint(i, n)
                 scalar = self[0][i]
 
-                reduced_matrix = self.copy()
-                reduced_matrix.delete_row_vector(0)
-                reduced_matrix.delete_column_vector(i)
+                # A view of the minor, rather than a copy with the row and column deleted. Nothing changes the
+                # matrix during the expansion, so the view doesn't need to be given a copy of its entries
+                reduced_matrix = self._view(Views.Omit(0), Views.Omit(i))
 
-                det += (-1)**i * scalar * reduced_matrix.determinant()
+                # Each minor is an equal share of the expansion
+                with Cancellation.part(i, i + 1, n):
+                    det += (-1)**i * scalar * reduced_matrix.determinant(method)
 
             return det
 
     def transpose(self):
-        return Matrix(self.column_vectors())
+        """Get a new matrix with the rows and columns swapped"""
+        # A compact matrix is transposed by copying its buffer with the strides swapped
+        if self.is_compact():
+            return Matrix.from_storage(self._storage.transpose().copy())
+        return Matrix._from_lists(Backend.for_dtype(self.dtype).transpose(self._row_entries()), self.dtype)
+
+    def transposed_view(self):
+        """Get a copy-on-write view with the rows and columns swapped, which reads through to this matrix until either
+        is changed"""
+        return self._track(self._view(slice(None), slice(None), True))
+
+    def cofactor_matrix(self, workers=None, method="lu"):
+        """The matrix of the signed determinants of every minor, the n^2 minors can be spread over workers processes
+        (by default the amount set with Parallel.set_workers), or with method "exact" computed exactly from the table
+        of minors determinant(method="exact") builds, in O(2^n * n) for all of them"""
+        if not self.is_square():
+            raise ArithmeticError("Cannot compute the cofactor matrix of a non-square matrix")
 
-    def cofactor_matrix(self):
+        if method == "exact":
+            return Matrix._from_entries(self.minors().cofactor_rows(), self.dtype)
+        elif method != "lu":
+            raise ValueError("Unknown cofactor method: " + str(method))
 
-        vectors = []
-        for i in range(self.column_length()):
-            entries = []
-            for j in range(self.row_length()):
-                cofactor_matrix = self.copy()
-                cofactor_matrix.delete_row_vector(i)
-                cofactor_matrix.delete_column_vector(j)
+        # Exact entries have their cofactors computed fraction-free
+        if Dtypes.is_exact(self.dtype):
+            return Matrix._from_entries(self.bareiss().cofactor_rows(), self.dtype)
 
-                cofactor = cofactor_matrix.determinant()
-                cofactor *= (-1)**(i + j)
+        return Matrix._from_entries(Parallel.cofactor_rows(self._row_entries(), workers))
 
-                entries += [cofactor]
+    def adjoint(self, method="lu"):
+        # Nothing else holds the cofactor matrix, so the transposed view of it is never changed underneath
+        return self.cofactor_matrix(method=method).transposed_view()
 
-            vectors += [Vector(entries)]
+    def inverse(self):
+        """Return the inverse of the matrix, computed from its LU decomposition in O(n^3), or exactly by fraction-free
+        elimination with Fraction entries if the entries are exact"""
+        if not self.is_square():
+            raise ArithmeticError("Cannot compute the inverse of a non-square matrix")
 
-        return Matrix(vectors)
+        if Dtypes.is_exact(self.dtype):
+            # The progress of the elimination counts for a quarter, the Gauss-Jordan solve for the rest
+            with Cancellation.part(0, 1, 4):
+                decomposition = self.bareiss()
+            with Cancellation.part(1, 4, 4):
+                return Matrix._from_entries(decomposition.inverse_rows(), Fraction)
 
-    def adjoint(self):
-        return self.cofactor_matrix().transpose()
+        return Matrix._from_entries(Backend.get_backend().inverse(self))
 
-    def inverse(self):
-        """Return the inverse of the matrix"""
-        # 1 / det(A) * adj(A)
-        det_inverse = 1 / self.determinant()
-        return self.adjoint() * det_inverse
+    def solve(self, b):
+        """Solve the linear system A * x = b, where b is a Vector or a Matrix with a right hand side in each column,
+        and return x of the same type"""
+        if not self.is_square():
+            raise ArithmeticError("Can only solve linear systems with a square matrix")
+
+        decomposition = self._elimination()
+        if decomposition.is_singular():
+            raise ArithmeticError("Cannot solve a linear system with a singular matrix")
+        # When both sides are exact the solution is exact too, as Fractions
+        exact = Dtypes.is_exact(self.dtype) and Dtypes.is_exact(getattr(b, "dtype", float))
+        if Dtypes.is_exact(self.dtype) and not exact:
+            decomposition = self.lu()
+
+        if isinstance(b, Vector):
+            if len(b) != self.shape[0]:
+                raise ValueError("The Vector must have as many entries as the matrix has rows.")
+            if exact:
+                return Vector([row[0] for row in decomposition.solve_rows([[entry] for entry in b.entries])], Fraction)
+            return Vector(decomposition.solve(b.entries))
+
+        elif isinstance(b, Matrix):
+            if b.shape[0] != self.shape[0]:
+                raise ValueError("The right hand side Matrix must have as many rows as the matrix.")
+            solution = decomposition.solve_rows([row.entries for row in b.row_vectors()])
+            return Matrix([Vector(entries, Fraction if exact else float) for entries in solution])
+
+        raise ValueError("Can only solve for a Vector or a Matrix of right hand sides")
 
     def __str__(self):
         """Get a string representation of this Matrix"""
@@ -283,73 +763,244 @@ class Matrix(object):
 
     def __add__(self, matrix):
         """Add the values of the matrix matrix to the values of this matrix"""
+        # Let other kinds of matrices (such as a SparseMatrix) handle the addition
+        if not isinstance(matrix, Matrix):
+            return NotImplemented
 
         # Make sure that the matrices have equal dimensions
-        if self.row_length() != matrix.row_length() or self.column_length() != matrix.column_length():
+        if self.shape != matrix.shape:
             raise ValueError("Can only add two Matrices of equal dimensions.")
 
-        # Create a new list to store the row Vectors
-        new_rows = []
-        # Iterate over all the row vectors indices
-        for i in range(self.column_length()):
-            # Get the rows for this index form each matrix
-            matrix_row1 = self.get_row_vector(i)
-            matrix_row2 = matrix.get_row_vector(i)
-            # Add the rows and save the value to the list
-            new_row_vector = matrix_row1 + matrix_row2
-            new_rows.append(new_row_vector)
-        # Create a new matrix from the list of values
-        return Matrix(new_rows)
+        # Add the rows of each matrix together
+        dtype = Dtypes.promote(self.dtype, matrix.dtype)
+        return Matrix._from_entries(Backend.for_dtype(dtype).add(self._row_entries(), matrix._row_entries()), dtype)
 
     def __sub__(self, matrix):
         """Subtract all the values of the matrix matrix from the values in this matrix"""
-        return self + (matrix * -1)
+        # Let other kinds of matrices (such as a SparseMatrix) handle the subtraction
+        if not isinstance(matrix, Matrix):
+            return NotImplemented
+
+        if self.shape != matrix.shape:
+            raise ValueError("Can only subtract two Matrices of equal dimensions.")
+
+        # Subtract entry by entry, rather than adding a negated copy
+        dtype = Dtypes.promote(self.dtype, matrix.dtype)
+        return Matrix._from_entries(Backend.for_dtype(dtype).sub(self._row_entries(), matrix._row_entries()), dtype)
+
+    def _assign_rows(self, rows, dtype):
+        """Overwrite the entries of every row in place with the given rows of values of type dtype"""
+        # Convert every row before writing any, so a value that doesn't fit leaves the matrix unchanged
+        if dtype is not self.dtype:
+            convert = Dtypes.converter(self.dtype)
+            rows = [[convert(value) for value in values] for values in rows]
+            dtype = self.dtype
+        self._detach_views()
+        for row, values in zip(self.rows, rows):
+            row._assign(values, dtype)
+
+    def __iadd__(self, matrix):
+        """Add the values of the matrix matrix to the values of this matrix in place"""
+        if not isinstance(matrix, Matrix):
+            return NotImplemented
+        if self.shape != matrix.shape:
+            raise ValueError("Can only add two Matrices of equal dimensions.")
+        dtype = Dtypes.promote(self.dtype, matrix.dtype)
+        self._assign_rows(Backend.for_dtype(dtype).add(self._row_entries(), matrix._row_entries()), dtype)
+        return self
+
+    def __isub__(self, matrix):
+        """Subtract the values of the matrix matrix from the values of this matrix in place"""
+        if not isinstance(matrix, Matrix):
+            return NotImplemented
+        if self.shape != matrix.shape:
+            raise ValueError("Can only subtract two Matrices of equal dimensions.")
+        dtype = Dtypes.promote(self.dtype, matrix.dtype)
+        self._assign_rows(Backend.for_dtype(dtype).sub(self._row_entries(), matrix._row_entries()), dtype)
+        return self
+
+    def __imul__(self, value):
+        """Scale this matrix in place, or multiply it in place by a square matrix (any other matrix changes the
+        dimensions, so the product is a new matrix)"""
+        if isinstance(value, float) or isinstance(value, int) or isinstance(value, Fraction):
+            dtype = Dtypes.promote(self.dtype, Dtypes.of(value))
+            self._assign_rows(Backend.for_dtype(dtype).scale(self._row_entries(), value), dtype)
+            return self
+        elif isinstance(value, Matrix):
+            if not value.is_square() or self.shape[1] != value.shape[0]:
+                return NotImplemented
+            if value.dtype is self.dtype:
+                # The product is written over the rows as they are finished
+                return matmul_into(self, value, self)
+            self._assign_rows(self.multiply(value)._row_entries(), Dtypes.promote(self.dtype, value.dtype))
+            return self
+        return NotImplemented
+
+    def add_scaled(self, matrix, alpha):
+        """Add alpha times the matrix matrix to this matrix in place, in one pass without a scaled temporary"""
+        if not isinstance(matrix, Matrix):
+            raise ValueError("Can only add a scaled Matrix to a Matrix")
+        if self.shape != matrix.shape:
+            raise ValueError("Can only add two Matrices of equal dimensions.")
+        dtype = Dtypes.promote(self.dtype, matrix.dtype, Dtypes.of(alpha))
+        self._assign_rows(Backend.for_dtype(dtype).axpy(alpha, matrix._row_entries(), self._row_entries()), dtype)
+        return self
 
     def __mul__(self, value):
         """Multiply a matrix by another matrix, or scale up the matrix according to a numerical scale"""
         # If the value is numerical we want to scale every value in the matrix
-        if isinstance(value, float) or isinstance(value, int):
+        if isinstance(value, float) or isinstance(value, int) or isinstance(value, Fraction):
             # Scale every row in the matrix by the value and return the answer as a new matrix
-            rows = []
-            for i in range(self.column_length()):
-                new_row = self.get_row_vector(i) * value
-                rows.append(new_row)
-
-            return Matrix(rows)
+            dtype = Dtypes.promote(self.dtype, Dtypes.of(value))
+            return Matrix._from_entries(Backend.for_dtype(dtype).scale(self._row_entries(), value), dtype)
         # If the other value is a matrix, we need to multiply the two matrices
         # together
         elif isinstance(value, Matrix):
-            # Make sure the length of the rows for one matrix matches the column
-            # length
-            # of the other,
-            # Otherwise we can't comput the multiplication
-            if self.row_length() != value.column_length():
-                return None
+            return self.multiply(value)
+        # A Vector is multiplied as a column, giving a Vector
+        elif isinstance(value, Vector):
+            return self.matvec(value)
+        # Let other kinds of values (such as a SparseMatrix) handle the multiplication
+        return NotImplemented
+
+    def __matmul__(self, value):
+        """Multiply a matrix by another matrix, or by a Vector (A @ x) giving a Vector"""
+        if isinstance(value, Matrix):
+            return self.multiply(value)
+        elif isinstance(value, Vector):
+            return self.matvec(value)
+        return NotImplemented
+
+    def matvec(self, vector):
+        """Multiply the matrix by a Vector, returning the Vector of the dot products of each row with it, which reads
+        the rows as they are stored and never builds the columns"""
+        if len(vector) != self.shape[1]:
+            raise ValueError("The Vector must have as many entries as the matrix has columns.")
+        dtype = Dtypes.promote(self.dtype, vector.dtype)
+        return Vector(Backend.for_dtype(dtype).matvec(self._row_entries(), vector.entries), dtype)
+
+    def lazy(self):
+        """Start a lazy expression from this matrix: +, - and * on it build up an expression graph instead of
+        computing each intermediate Matrix, and evaluate() computes it, with chains of products multiplied in the
+        cheapest order, sums of scaled matrices fused into one pass and repeated parts computed once"""
+        return Expression.lazy(self)
+
+    def multiply(self, matrix, method="classic", workers=None):
+        """Multiply this matrix by another matrix, where method is "classic", "strassen" (for square matrices), or
+        "auto" to use Strassen's method only where it pays off, the classic method can spread the rows of the product
+        over workers processes"""
+        # Make sure the length of the rows for one matrix matches the column
+        # length
+        # of the other,
+        # Otherwise we can't comput the multiplication
+        if self.shape[1] != matrix.shape[0]:
+            return None
 
-            # Get the rows from the first matrix
-            matrix1_rows = self.row_vectors()
-            # Get the columns from the other matrix
-            matrix2_columns = value.column_vectors()
-            # Save the vector of dot products of each row and column in this
-            # array
-            product_rows = []
-
-            # Iterate over every row in the first matrix
-            for row in matrix1_rows:
-
-                # Find the dot product of this row with every column in the
-                # other matrix
-                entries = []
-                for column in matrix2_columns:
-                    product = row * column
-                    # Save the answer in the entries list for this row vector
-                    entries.append(product)
-                # Unpack and convert the list to a vector
-                new_row = Vector(entries)
-                # Add the vector to the list of row vector
-                product_rows.append(new_row)
-            # Convert the list of rows to a matrix and return it
-            return Matrix(product_rows)
+        # Find the dot product of every row in the first matrix with every column in the other matrix
+        dtype = Dtypes.promote(self.dtype, matrix.dtype)
+        if Dtypes.is_exact(dtype):
+            # The worker processes share the operands as doubles, so exact entries are multiplied in this process
+            workers = 1
+        rows = Backend.for_dtype(dtype).matmul(self._row_entries(), matrix._row_entries(), method, workers)
+        return Matrix._from_entries(rows, dtype)
+
+    def _identity_like(self):
+        """A float identity matrix with the dimensions of this square matrix"""
+        n = self.column_length()
+        return Matrix._from_entries([[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)])
+
+    def eigenvalues(self):
+        """Get the eigenvalues of the matrix by the shifted QR algorithm, from the largest magnitude to the smallest,
+        complex ones as complex numbers, they are cached until the matrix changes"""
+        if not self.is_square():
+            raise ArithmeticError("Cannot compute the eigenvalues of a non-square matrix")
+        cache = self._results_cache()
+        if "eigenvalues" not in cache:
+            cache["eigenvalues"] = Backend.get_backend().eigenvalues(self._row_entries())
+        return list(cache["eigenvalues"])
+
+    def eigenvector(self, eigenvalue):
+        """Get an eigenvector of unit length for a real eigenvalue of the matrix (such as one from eigenvalues()), by
+        inverse iteration"""
+        if not self.is_square():
+            raise ArithmeticError("Cannot compute the eigenvectors of a non-square matrix")
+        if isinstance(eigenvalue, complex):
+            raise ValueError("Only the eigenvectors of real eigenvalues can be stored in a Vector")
+        return Vector(Eigen.inverse_iteration(self._row_entries(), eigenvalue))
+
+    def dominant_eigenvector(self, tolerance=1e-10, max_iterations=1000, start=None):
+        """Get an eigenvector of unit length for the eigenvalue of largest magnitude by power iteration, starting from
+        the Vector start (random by default), which converges quickly when that eigenvalue is well separated from the
+        others, an ArithmeticError is raised if it doesn't converge in max_iterations steps"""
+        if not self.is_square():
+            raise ArithmeticError("Cannot compute the eigenvectors of a non-square matrix")
+        if start is not None:
+            start = start.entries
+        _, entries = Eigen.power_iteration(self._row_entries(), start, tolerance, max_iterations)
+        return Vector(entries)
+
+    def matrix_power(self, power):
+        """Raise the matrix to an integer power by repeated squaring, with about 2 * log2(power) products (which use
+        Strassen's method when they are large enough), a negative power raises the inverse, which is computed once"""
+        if not self.is_square():
+            raise ArithmeticError("Can only raise a square matrix to a power")
+        # Every product (and the inverse, for a negative power) is an equal share of the progress
+        steps = max(abs(power).bit_length() - 1, 0) + max(bin(abs(power)).count("1") - 1, 0)
+        if power < 0:
+            with Cancellation.part(0, 1, steps + 1):
+                inverse = self.inverse()
+            with Cancellation.part(1, steps + 1, steps + 1):
+                return inverse.matrix_power(-power)
+
+        result = None
+        square = self
+        step = 0
+        while power > 0:
+            if power & 1 and result is None:
+                result = square
+            elif power & 1:
+                with Cancellation.part(step, step + 1, steps):
+                    result = result.multiply(square, "auto")
+                step += 1
+            power >>= 1
+            if power > 0:
+                with Cancellation.part(step, step + 1, steps):
+                    square = square.multiply(square, "auto")
+                step += 1
+        if result is None:
+            return Matrix._from_entries([[1 if i == j else 0 for j in range(self.row_length())]
+                                         for i in range(self.column_length())], self.dtype)
+        return result
+
+    def expm(self):
+        """Get the matrix exponential e^A, by scaling and squaring: A is scaled down by a power of 2 until its norm is
+        at most 1/2, where a degree 6 Pade approximant is accurate to double precision, and the approximation is then
+        squared back up"""
+        if not self.is_square():
+            raise ArithmeticError("Cannot compute the exponential of a non-square matrix")
+
+        # The infinity norm, the largest row sum of absolute values
+        norm = max([sum(abs(entry) for entry in row) for row in self._row_entries()] + [0.0])
+        squarings = max(0, int(math.floor(math.log2(norm))) + 2) if norm > 0 else 0
+        a = self * (1.0 / 2 ** squarings)
+
+        # The numerator and denominator of the Pade approximant, N(A) = sum c_k A^k and D(A) = N(-A)
+        q = 6
+        c = 1.0
+        power = self._identity_like()
+        numerator = self._identity_like()
+        denominator = self._identity_like()
+        for k in range(1, q + 1):
+            c = c * (q - k + 1) / (k * (2 * q - k + 1))
+            power = a * power
+            numerator = numerator + power * c
+            denominator = denominator + power * (c if k % 2 == 0 else -c)
+
+        # e^A is about D(A)^-1 * N(A), squared back up
+        result = denominator.solve(numerator)
+        for _ in range(squarings):
+            result = result * result
+        return result
 
     def __pow__(self, power):
         """Compute the value of the matrix raised to the power of power"""
@@ -363,7 +1014,7 @@ class Matrix(object):
             if not self.is_square():
                 return None
             # Return the identity matrix for this value
-            return Matrix.identity(self.row_length())
+            return Matrix.identity(self.row_length(), self.dtype)
 
         # If the power is 1, the matrix doesn't change
         if power == 1:
@@ -371,15 +1022,166 @@ class Matrix(object):
 
         # If the power is negative, we find the inverse of the matrix to the
         # power as
-        # a positive
+        # a positive, the inverse comes from the (cached) LU decomposition
         if power < 0:
             return (self.inverse())**-power
 
         # If the power is even, multiply the matrix by itself and by the matrix
         # to the
-        # half power less 1
+        # half power less 1, large squares are multiplied with Strassen's method
         if power % 2 == 0:
-            return (self * self)**(power // 2)
+            return self.multiply(self, "auto")**(power // 2)
         # Otherwise multiply the matrix by itself to the power less 1
         else:
-            return self * (self**(power - 1))
+            return self.multiply(self**(power - 1), "auto")
+
+    async def adeterminant(self, method="lu", **options):
+        """Compute the determinant in an executor, so the event loop keeps running: await matrix.adeterminant(). The
+        options (timeout, deadline, progress, token and executor) are those of Async.run"""
+        return await Async.determinant(self, method, **options)
+
+    async def ainverse(self, **options):
+        """Compute the inverse in an executor, with the options of Async.run"""
+        return await Async.inverse(self, **options)
+
+    async def amatmul(self, matrix, method="classic", workers=None, **options):
+        """Multiply this matrix by another matrix in an executor, with the options of Async.run"""
+        return await Async.matmul(self, matrix, method, workers, **options)
+
+    async def amatrix_power(self, power, **options):
+        """Raise the matrix to an integer power in an executor, with the options of Async.run"""
+        return await Async.power(self, power, **options)
+
+
+class MatrixView(Matrix):
+    """A Matrix that reads its entries through from part of another Matrix, (optionally) with the rows and columns
+    swapped, so taking a transpose, slice or minor doesn't copy anything
+
+    The view is copy-on-write: writing to one of its rows copies just that row out of the source, so the source is
+    never changed through a view. Changing the source, through its methods or its row Vectors (source[i][j] = x),
+    first gives the view a copy of everything it shows, so the view never changes underneath."""
+
+    def __init__(self, source: Matrix, row_indices, column_indices, transposed=False):
+        """Create a view of the rows row_indices and the columns column_indices of source"""
+        self._source = source
+        self._row_indices = row_indices
+        self._column_indices = column_indices
+        self._transposed = transposed
+        # The row Vectors of the view, made the first time they are needed
+        self._view_rows = None
+        # The cache of the source, which is replaced when the source changes
+        self._source_cache = None
+
+    @property
+    def rows(self):
+        """The row vectors of the view, each one reads through to the source until it's written to"""
+        if self._view_rows is None:
+            source_rows = self._source.rows
+            if self._transposed:
+                # Row i of a transposed view is part of column i of the source
+                self._view_rows = [Vector.view(Views.ColumnEntries(source_rows, j, self._row_indices), self.dtype)
+                                   for j in self._column_indices]
+            else:
+                self._view_rows = [Vector.view(Views.RowEntries(source_rows, i, self._column_indices), self.dtype)
+                                   for i in self._row_indices]
+        return self._view_rows
+
+    @property
+    def dtype(self):
+        # The entries are the source's until the rows have been made
+        if self._view_rows is None:
+            return self._source.dtype
+        return Matrix.dtype.fget(self)
+
+    @rows.setter
+    def rows(self, rows):
+        self._view_rows = rows
+
+    @property
+    def shape(self):
+        # Until the rows have been made, the dimensions are the amounts of indices selected from the source
+        if self._view_rows is None:
+            if self._transposed:
+                return len(self._column_indices), len(self._row_indices)
+            return len(self._row_indices), len(self._column_indices)
+        return Matrix.shape.fget(self)
+
+    def _view(self, rows, columns, transposed=False):
+        # Once the rows have been made they might have been changed, so the new view reads through to them
+        if self._view_rows is not None:
+            return Matrix._view(self, rows, columns, transposed)
+
+        # Otherwise the selections are applied to the indices of the source, in the same orientation as the source
+        if self._transposed:
+            rows, columns = columns, rows
+        return MatrixView(self._source, Views.select(self._row_indices, rows),
+                          Views.select(self._column_indices, columns), self._transposed != transposed)
+
+    def _track(self, view):
+        # Until the rows have been made, views of this view read straight from the source
+        if self._view_rows is None:
+            return self._source._track(view)
+        return Matrix._track(self, view)
+
+    def _detach(self):
+        """Copy every entry the view shows out of the source, so the view no longer reads through to it"""
+        for row in self.rows:
+            if isinstance(row.entries, Views.EntriesView):
+                row.entries._detach()
+
+    def __getitem__(self, column_index):
+        # Read single entries straight from the source while the rows haven't been made
+        if isinstance(column_index, tuple) and self._view_rows is None:
+            i, j = column_index
+            if not isinstance(i, slice) and not isinstance(j, slice):
+                if self._transposed:
+                    i, j = j, i
+                return self._source.rows[self._row_indices[i]].entries[self._column_indices[j]]
+        return Matrix.__getitem__(self, column_index)
+
+    def _results_cache(self):
+        # Results computed from the view are also stale once the source changes
+        source_cache = self._source._results_cache()
+        if source_cache is not self._source_cache:
+            self._source_cache = source_cache
+            self._cache_state = None
+        return Matrix._results_cache(self)
+
+    def _shares_entries(self, other):
+        # Compare the matrices the views read from
+        if isinstance(other, MatrixView):
+            other = other._source
+        return self._source is other or self._source._shares_entries(other)
+
+
+def matmul_into(a, b, out):
+    """Multiply the Matrix a by the Matrix b and write the product into the rows of the existing Matrix out, so no
+    new Matrix is allocated, out may be a itself"""
+    a_rows = a._row_entries()
+    b_rows = b._row_entries()
+
+    # Make sure the length of the rows of a matches the column length of b, and out has the shape of the product
+    inner = len(a_rows[0]) if len(a_rows) > 0 else 0
+    width = len(b_rows[0]) if len(b_rows) > 0 else 0
+    if inner != len(b_rows):
+        raise ValueError("Can only multiply a Matrix by a Matrix with as many rows as it has columns.")
+    if len(out.rows) != len(a_rows) or (len(out.rows) > 0 and len(out.rows[0]) != width):
+        raise ValueError("The output Matrix must have the dimensions of the product.")
+
+    out._detach_views()
+    blocks = Kernels.matmul_row_blocks(a_rows, b_rows)
+    # Every row of b is needed for every row of the product, so if out shares b's rows nothing can be written
+    # until the whole product is known
+    if out._shares_entries(b):
+        blocks = list(blocks)
+
+    # Write each tile of rows as soon as it's done, a tile only depends on the same rows of a
+    i = 0
+    for block in blocks:
+        for values in block:
+            row = out.rows[i]
+            Kernels.write_row(row.entries, values)
+            row._version += 1
+            i += 1
+
+    return out
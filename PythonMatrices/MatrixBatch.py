@@ -0,0 +1,348 @@
+from array import array
+
+import Kernels
+import LUDecomposition
+from FlatStorage import FlatStorage
+from Matrix import Matrix as Matrix
+from VectorBatch import VectorBatch as VectorBatch
+
+
+def _det2(m):
+    """The determinant of a 2*2 matrix given as its 4 entries row by row"""
+    a, b, c, d = m
+    return a * d - b * c
+
+
+def _det3(m):
+    """The determinant of a 3*3 matrix given as its 9 entries row by row, expanded along the first row"""
+    a, b, c, d, e, f, g, h, i = m
+    return a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+
+
+def _minors4(m):
+    """The 2*2 determinants of the top two rows (s) and the bottom two rows (c) of a 4*4 matrix, that both its
+    determinant and its inverse are built from"""
+    m00, m01, m02, m03, m10, m11, m12, m13, m20, m21, m22, m23, m30, m31, m32, m33 = m
+    s = (m00 * m11 - m10 * m01, m00 * m12 - m10 * m02, m00 * m13 - m10 * m03,
+         m01 * m12 - m11 * m02, m01 * m13 - m11 * m03, m02 * m13 - m12 * m03)
+    c = (m20 * m31 - m30 * m21, m20 * m32 - m30 * m22, m20 * m33 - m30 * m23,
+         m21 * m32 - m31 * m22, m21 * m33 - m31 * m23, m22 * m33 - m32 * m23)
+    return s, c
+
+
+def _det4(m):
+    """The determinant of a 4*4 matrix given as its 16 entries row by row, by the Laplace expansion along its top two
+    rows"""
+    s, c = _minors4(m)
+    return s[0] * c[5] - s[1] * c[4] + s[2] * c[3] + s[3] * c[2] - s[4] * c[1] + s[5] * c[0]
+
+
+def _singular():
+    return ZeroDivisionError("Cannot compute the inverse of a singular matrix")
+
+
+def _inverse2(m):
+    """The 4 entries of the inverse of a 2*2 matrix, from its adjugate"""
+    a, b, c, d = m
+    det = a * d - b * c
+    if det == 0:
+        raise _singular()
+    scale = 1.0 / det
+    return (d * scale, -b * scale, -c * scale, a * scale)
+
+
+def _inverse3(m):
+    """The 9 entries of the inverse of a 3*3 matrix, from its adjugate"""
+    a, b, c, d, e, f, g, h, i = m
+    # The cofactors of the first column, which also give the determinant
+    A = e * i - f * h
+    B = f * g - d * i
+    C = d * h - e * g
+    det = a * A + b * B + c * C
+    if det == 0:
+        raise _singular()
+    scale = 1.0 / det
+    return (A * scale, (c * h - b * i) * scale, (b * f - c * e) * scale,
+            B * scale, (a * i - c * g) * scale, (c * d - a * f) * scale,
+            C * scale, (b * g - a * h) * scale, (a * e - b * d) * scale)
+
+
+def _inverse4(m):
+    """The 16 entries of the inverse of a 4*4 matrix, from its adjugate built out of the 2*2 minors"""
+    m00, m01, m02, m03, m10, m11, m12, m13, m20, m21, m22, m23, m30, m31, m32, m33 = m
+    s, c = _minors4(m)
+    det = s[0] * c[5] - s[1] * c[4] + s[2] * c[3] + s[3] * c[2] - s[4] * c[1] + s[5] * c[0]
+    if det == 0:
+        raise _singular()
+    scale = 1.0 / det
+    return ((m11 * c[5] - m12 * c[4] + m13 * c[3]) * scale,
+            (-m01 * c[5] + m02 * c[4] - m03 * c[3]) * scale,
+            (m31 * s[5] - m32 * s[4] + m33 * s[3]) * scale,
+            (-m21 * s[5] + m22 * s[4] - m23 * s[3]) * scale,
+            (-m10 * c[5] + m12 * c[2] - m13 * c[1]) * scale,
+            (m00 * c[5] - m02 * c[2] + m03 * c[1]) * scale,
+            (-m30 * s[5] + m32 * s[2] - m33 * s[1]) * scale,
+            (m20 * s[5] - m22 * s[2] + m23 * s[1]) * scale,
+            (m10 * c[4] - m11 * c[2] + m13 * c[0]) * scale,
+            (-m00 * c[4] + m01 * c[2] - m03 * c[0]) * scale,
+            (m30 * s[4] - m31 * s[2] + m33 * s[0]) * scale,
+            (-m20 * s[4] + m21 * s[2] - m23 * s[0]) * scale,
+            (-m10 * c[3] + m11 * c[1] - m12 * c[0]) * scale,
+            (m00 * c[3] - m01 * c[1] + m02 * c[0]) * scale,
+            (-m30 * s[3] + m31 * s[1] - m32 * s[0]) * scale,
+            (m20 * s[3] - m21 * s[1] + m22 * s[0]) * scale)
+
+
+# The closed forms, by the size of the square matrices they apply to
+_DETERMINANTS = {2: _det2, 3: _det3, 4: _det4}
+_INVERSES = {2: _inverse2, 3: _inverse3, 4: _inverse4}
+
+
+class MatrixBatch(object):
+    """Many Matrices of the same dimensions stored one after another (each row by row) in a single buffer of doubles,
+    so one call multiplies, inverts... all of them without the overhead of a Matrix object for each one
+
+    Small square matrices (2*2, 3*3 and 4*4) have their determinants and inverses computed in closed form. A batch
+    holding a single Matrix is broadcast against every Matrix or Vector of a larger batch, to transform a whole batch
+    by one Matrix."""
+
+    def __init__(self, matrices: list):
+        """Create a batch by copying a list of Matrices (or lists of rows) of equal dimensions into one buffer"""
+        self.count = len(matrices)
+        self.buffer = array("d")
+        self.shape = (0, 0)
+        for k in range(self.count):
+            matrix = matrices[k]
+            rows = matrix.row_vectors() if isinstance(matrix, Matrix) else matrix
+            shape = (len(rows), len(rows[0]) if len(rows) > 0 else 0)
+            if k == 0:
+                self.shape = shape
+            elif shape != self.shape:
+                raise ValueError("Every Matrix in a batch must have the same dimensions.")
+            for row in rows:
+                if len(row) != shape[1]:
+                    raise BaseException("Matrix must have row vectors of equal length.")
+                # A Vector is copied straight from its entries
+                self.buffer.extend(getattr(row, "entries", row))
+
+    @staticmethod
+    def from_buffer(buffer, count: int, shape: tuple):
+        """Create a batch of count Matrices of the given (rows, columns) shape using a buffer of doubles, without
+        copying it"""
+        view = memoryview(buffer)
+        # Reinterpret raw bytes as doubles
+        if view.format != "d":
+            view = view.cast("B").cast("d")
+        if len(view) != count * shape[0] * shape[1]:
+            raise ValueError("The buffer must hold exactly " + str(count * shape[0] * shape[1]) + " entries.")
+        batch = MatrixBatch.__new__(MatrixBatch)
+        batch.count = count
+        batch.shape = (shape[0], shape[1])
+        batch.buffer = view
+        return batch
+
+    @staticmethod
+    def zeros(count: int, shape: tuple):
+        """Create a batch of count Matrices of the given (rows, columns) shape, all zero"""
+        return MatrixBatch.from_buffer(array("d", bytes(8 * count * shape[0] * shape[1])), count, shape)
+
+    @staticmethod
+    def _from_components(components: list, count: int, shape: tuple):
+        """Create a batch from one list per entry position (row by row), holding that entry of every Matrix"""
+        size = shape[0] * shape[1]
+        batch = MatrixBatch.zeros(count, shape)
+        view = memoryview(batch.buffer)
+        for p in range(size):
+            view[p::size] = array("d", components[p])
+        return batch
+
+    @staticmethod
+    def _from_items(items, count: int, shape: tuple):
+        """Create a batch from the entries of each Matrix in turn (row by row)"""
+        buffer = array("d")
+        for entries in items:
+            buffer.extend(entries)
+        return MatrixBatch.from_buffer(buffer, count, shape)
+
+    def _size(self):
+        """The amount of entries in each Matrix"""
+        return self.shape[0] * self.shape[1]
+
+    def components(self):
+        """Get one list per entry position (row by row), holding that entry of every Matrix in the batch"""
+        size = self._size()
+        view = memoryview(self.buffer)
+        return [view[p::size].tolist() for p in range(size)]
+
+    def _items(self):
+        """Iterate over the entries of each Matrix in turn, as a tuple row by row"""
+        return zip(*self.components())
+
+    def __len__(self):
+        """Return the amount of Matrices in the batch"""
+        return self.count
+
+    def __getitem__(self, k):
+        """Get Matrix k of the batch, a compact Matrix that shares the batch's buffer so writes to it go to the
+        batch"""
+        if k < 0:
+            k += self.count
+        if k < 0 or k >= self.count:
+            raise IndexError()
+        size = self._size()
+        return Matrix.from_storage(FlatStorage(memoryview(self.buffer)[k * size:(k + 1) * size], self.shape))
+
+    def __iter__(self):
+        for k in range(self.count):
+            yield self[k]
+
+    def to_matrices(self):
+        """Copy the batch out into a list of Matrices"""
+        return [self[k].copy() for k in range(self.count)]
+
+    def is_square(self):
+        """A check to see whether the matrices have equal column and row dimensions"""
+        return self.shape[0] == self.shape[1]
+
+    def _broadcast_count(self, count):
+        """The amount of results of combining with a batch of count entries, where a batch of one is repeated"""
+        if self.count == count or count == 1:
+            return self.count
+        if self.count == 1:
+            return count
+        raise ValueError("Can only combine batches of the same size, or a batch of a single Matrix or Vector.")
+
+    def _broadcast_components(self, count):
+        """The components of the batch, with a single Matrix repeated count times"""
+        components = self.components()
+        if self.count == 1 and count != 1:
+            return [component * count for component in components]
+        return components
+
+    def matmul(self, other):
+        """Multiply each Matrix in the batch by the matching Matrix of the other batch"""
+        n, inner = self.shape
+        if other.shape[0] != inner:
+            raise ValueError("Can only multiply by Matrices with as many rows as these Matrices have columns.")
+        m = other.shape[1]
+        count = self._broadcast_count(other.count)
+        a = self._broadcast_components(count)
+        b = other._broadcast_components(count)
+
+        # Entry (i, j) of every product is summed across the whole batch at once
+        components = []
+        for i in range(n):
+            for j in range(m):
+                if inner == 0:
+                    components.append([0.0] * count)
+                    continue
+                total = [x * y for x, y in zip(a[i * inner], b[j])]
+                for k in range(1, inner):
+                    total = [t + x * y for t, x, y in zip(total, a[i * inner + k], b[k * m + j])]
+                components.append(total)
+        return MatrixBatch._from_components(components, count, (n, m))
+
+    def matvec(self, vectors: VectorBatch):
+        """Multiply each Matrix in the batch by the matching Vector of a VectorBatch"""
+        n, inner = self.shape
+        if vectors.size != inner:
+            raise ValueError("The Vectors must have as many entries as the Matrices have columns.")
+        count = self._broadcast_count(vectors.count)
+        a = self._broadcast_components(count)
+        x = vectors.components()
+        if vectors.count == 1 and count != 1:
+            x = [component * count for component in x]
+
+        components = []
+        for i in range(n):
+            if inner == 0:
+                components.append([0.0] * count)
+                continue
+            total = [p * q for p, q in zip(a[i * inner], x[0])]
+            for k in range(1, inner):
+                total = [t + p * q for t, p, q in zip(total, a[i * inner + k], x[k])]
+            components.append(total)
+        return VectorBatch._from_components(components, count)
+
+    def __mul__(self, value):
+        """Scale every Matrix by a number, or multiply them by a MatrixBatch or a VectorBatch"""
+        if isinstance(value, float) or isinstance(value, int):
+            return MatrixBatch.from_buffer(array("d", [x * value for x in self.buffer]), self.count, self.shape)
+        elif isinstance(value, MatrixBatch):
+            return self.matmul(value)
+        elif isinstance(value, VectorBatch):
+            return self.matvec(value)
+        return NotImplemented
+
+    def __rmul__(self, value):
+        if isinstance(value, float) or isinstance(value, int):
+            return self.__mul__(value)
+        return NotImplemented
+
+    def __matmul__(self, value):
+        return self.__mul__(value)
+
+    def __add__(self, other):
+        """Add two batches Matrix by Matrix"""
+        if not isinstance(other, MatrixBatch):
+            return NotImplemented
+        if self.count != other.count or self.shape != other.shape:
+            raise ValueError("Can only add batches of the same amount of Matrices of equal dimensions.")
+        return MatrixBatch.from_buffer(array("d", [x + y for x, y in zip(self.buffer, other.buffer)]),
+                                       self.count, self.shape)
+
+    def __sub__(self, other):
+        """Subtract two batches Matrix by Matrix"""
+        if not isinstance(other, MatrixBatch):
+            return NotImplemented
+        if self.count != other.count or self.shape != other.shape:
+            raise ValueError("Can only subtract batches of the same amount of Matrices of equal dimensions.")
+        return MatrixBatch.from_buffer(array("d", [x - y for x, y in zip(self.buffer, other.buffer)]),
+                                       self.count, self.shape)
+
+    def transpose(self):
+        """Swap the rows and columns of every Matrix in the batch"""
+        n, m = self.shape
+        components = self.components()
+        return MatrixBatch._from_components([components[i * m + j] for j in range(m) for i in range(n)],
+                                            self.count, (m, n))
+
+    def _rows(self, entries):
+        """Split the entries of one Matrix into its rows"""
+        width = self.shape[1]
+        return [list(entries[i * width:(i + 1) * width]) for i in range(self.shape[0])]
+
+    def determinant(self):
+        """Get the determinant of every Matrix in the batch, as a list"""
+        if not self.is_square():
+            raise ArithmeticError("Cannot calculate the determinant of a non-square matrix")
+        n = self.shape[0]
+        if n == 0:
+            return [1.0] * self.count
+        if n == 1:
+            return self.components()[0]
+        closed_form = _DETERMINANTS.get(n)
+        if closed_form is not None:
+            return [closed_form(entries) for entries in self._items()]
+        return [Kernels.determinant_rows(self._rows(entries)) for entries in self._items()]
+
+    def inverse(self):
+        """Get the inverse of every Matrix in the batch, a ZeroDivisionError is raised if any of them is singular"""
+        if not self.is_square():
+            raise ArithmeticError("Cannot compute the inverse of a non-square matrix")
+        n = self.shape[0]
+        closed_form = _INVERSES.get(n)
+        if closed_form is not None:
+            return MatrixBatch._from_items((closed_form(entries) for entries in self._items()), self.count,
+                                           self.shape)
+
+        inverses = []
+        for entries in self._items():
+            decomposition = LUDecomposition.LUDecomposition(self._rows(entries))
+            if decomposition.is_singular():
+                raise _singular()
+            inverse = []
+            for row in decomposition.inverse_rows():
+                inverse += row
+            inverses.append(inverse)
+        return MatrixBatch._from_items(inverses, self.count, self.shape)
@@ -0,0 +1,128 @@
+import mmap
+import struct
+import sys
+from array import array
+
+from FlatStorage import FlatStorage
+
+# The file starts with this header: a magic string, the format version, the type code of the entries (always "d",
+# float64), padding so the entries start 8 byte aligned, then the amount of rows and columns. The entries follow
+# row by row, as little-endian float64
+MAGIC = b"PYMATRIX"
+VERSION = 1
+HEADER = struct.Struct("<8sBc6xQQ")
+
+# The ways a file can be memory-mapped, as in numpy: read only, read and write through to the file, or copy-on-write
+# (writes stay in memory and never reach the file)
+MMAP_MODES = {"r": mmap.ACCESS_READ, "r+": mmap.ACCESS_WRITE, "c": mmap.ACCESS_COPY}
+
+# The entries are stored little-endian, so they only need swapping on big-endian machines
+_SWAP = sys.byteorder != "little"
+
+
+def write_header(file, shape: tuple):
+    """Write the header for a matrix of the given (rows, columns) shape"""
+    file.write(HEADER.pack(MAGIC, VERSION, b"d", shape[0], shape[1]))
+
+
+def read_header(file):
+    """Read the header of a matrix file, returning its (rows, columns) shape"""
+    data = file.read(HEADER.size)
+    if len(data) != HEADER.size:
+        raise ValueError("The file is too short to hold a matrix.")
+    magic, version, dtype, rows, columns = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("The file is not a matrix file.")
+    if version != VERSION:
+        raise ValueError("Unsupported matrix file version: " + str(version))
+    if dtype != b"d":
+        raise ValueError("Unsupported matrix file entry type: " + dtype.decode("ascii", "replace"))
+    return rows, columns
+
+
+def write_rows(file, rows):
+    """Write rows of entries (lists, memoryviews or Vectors) after the header"""
+    for row in rows:
+        entries = array("d", getattr(row, "entries", row))
+        if _SWAP:
+            entries.byteswap()
+        entries.tofile(file)
+
+
+def save(path, storage: FlatStorage):
+    """Write the entries of a FlatStorage to a matrix file"""
+    with open(path, "wb") as file:
+        write_header(file, storage.shape)
+        if storage.is_contiguous() and not _SWAP:
+            # The buffer is already laid out as the file wants it, so it's written in one go
+            file.write(storage.buffer.cast("B"))
+        else:
+            write_rows(file, [storage.row(i) for i in range(storage.shape[0])])
+
+
+def load(path, mmap_mode=None):
+    """Read a matrix file into a FlatStorage
+
+    By default every entry is read into memory. With an mmap_mode of "r", "r+" or "c" (see MMAP_MODES) the file is
+    memory-mapped instead, so it opens instantly whatever its size and the operating system pages the entries in as
+    they are read."""
+    # A map that writes through to the file needs it opened for writing
+    with open(path, "r+b" if mmap_mode == "r+" else "rb") as file:
+        shape = read_header(file)
+        size = shape[0] * shape[1]
+
+        if mmap_mode is None or _SWAP or size == 0:
+            entries = array("d")
+            entries.fromfile(file, size)
+            if _SWAP:
+                entries.byteswap()
+            return FlatStorage(entries, shape)
+
+        return _map(file, shape, mmap_mode)
+
+
+def _map(file, shape, mmap_mode):
+    """Memory-map the entries of an open matrix file into a FlatStorage"""
+    if mmap_mode not in MMAP_MODES:
+        raise ValueError("Unknown mmap mode: " + str(mmap_mode))
+    size = shape[0] * shape[1]
+    # The map stays open for as long as the storage (and anything viewing it) is alive
+    mapped = mmap.mmap(file.fileno(), 0, access=MMAP_MODES[mmap_mode])
+    view = memoryview(mapped)[HEADER.size:HEADER.size + 8 * size]
+    if len(view) != 8 * size:
+        raise ValueError("The file is too short to hold a " + str(shape[0]) + "*" + str(shape[1]) + " matrix.")
+    return FlatStorage(view, shape)
+
+
+def create(path, shape: tuple):
+    """Create a matrix file of the given (rows, columns) shape filled with zeros, and memory-map it for writing
+
+    The file is sized without writing the entries, so on most file systems it takes no disk space until it is written
+    to, and only the pages written to are held in memory."""
+    size = shape[0] * shape[1]
+    with open(path, "w+b") as file:
+        write_header(file, shape)
+        file.truncate(HEADER.size + 8 * size)
+        if size == 0:
+            return FlatStorage(array("d"), shape)
+        return _map(file, shape, "r+")
+
+
+def flush(storage: FlatStorage):
+    """Make sure every change to a memory-mapped FlatStorage has been written to its file"""
+    if isinstance(storage.buffer.obj, mmap.mmap):
+        storage.buffer.obj.flush()
+
+
+def load_rows(path, start, stop):
+    """Read only the rows start to stop of a matrix file into a FlatStorage, without reading the rest of the file"""
+    with open(path, "rb") as file:
+        rows, columns = read_header(file)
+        start, stop, _ = slice(start, stop).indices(rows)
+        stop = max(start, stop)
+        file.seek(HEADER.size + 8 * start * columns)
+        entries = array("d")
+        entries.fromfile(file, (stop - start) * columns)
+        if _SWAP:
+            entries.byteswap()
+        return FlatStorage(entries, (stop - start, columns))
@@ -0,0 +1,158 @@
+import contextvars
+import threading
+
+import Matrix
+from FrozenMatrix import FrozenMatrix as FrozenMatrix
+from LRUCache import LRUCache
+
+# The amount of results a Memo remembers when it isn't told
+MAXSIZE = 256
+
+# The Matrix methods a Memo stands in for while it is active, and the Memo method that computes each one
+MEMOIZED = {
+    "determinant": "determinant",
+    "inverse": "inverse",
+    "lu": "lu",
+    "__pow__": "_pow",
+    "matrix_power": "power",
+}
+
+# The methods as the Matrix class defines them, which compute the results the Memo remembers
+_ORIGINALS = dict((name, Matrix.Matrix.__dict__[name]) for name in MEMOIZED)
+
+# Marks a result that isn't in the cache, since a determinant can be any value
+_MISSING = object()
+
+# The Memos entered in the current context (thread, or asyncio task), the innermost last. Each thread and task has
+# its own, so Memos entered in different ones never see each other's calls or undo each other on exit
+_active = contextvars.ContextVar("active_memos", default=())
+
+
+class Memo(object):
+    """Remembers the determinants, inverses, LU decompositions and powers of matrices in a bounded LRU cache, so
+    asking for the same result again costs a dictionary lookup instead of an O(n^3) computation
+
+    A FrozenMatrix is looked up by its content and entry type, so any equal FrozenMatrix of the same dtype finds its
+    results (an int matrix doesn't get the float results of an equal float matrix). Any other Matrix is looked up by
+    its identity and the state of its rows, so changing the matrix makes the old results unreachable (they are
+    evicted in time). Matrix results (inverses and powers) are returned as FrozenMatrices, so the copy in the cache
+    can't be changed through them.
+
+    The methods can be called directly, memo.determinant(matrix), or the Memo can be entered as a context manager,
+    which makes Matrix.determinant, inverse, lu, __pow__ and matrix_power go through it until it exits. Those give
+    back a copy of a remembered Matrix that can be modified, as they would without the Memo. Only the calls made in
+    the thread or asyncio task that entered the Memo go through it (and the calls of the Async functions awaited
+    there), and with Memos entered in one another the innermost is used:
+
+        memo = Memo.Memo(maxsize=1024)
+        with memo:
+            pipeline()
+        print(memo.stats())
+    """
+
+    def __init__(self, maxsize=MAXSIZE):
+        """Create a Memo remembering at most maxsize results, None for no bound"""
+        self.cache = LRUCache(maxsize)
+        # Held while the cache is read or written, the calls it remembers can come from several threads
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _operand(matrix):
+        """The part of a key that identifies the matrix, or None if its results can't be remembered"""
+        if isinstance(matrix, FrozenMatrix):
+            return matrix.dtype, matrix
+        # A view reads through to another matrix, which can change without the view's rows knowing
+        if isinstance(matrix, Matrix.MatrixView):
+            return None
+        return id(matrix), tuple((id(row), row._version) for row in matrix.rows)
+
+    def _lookup(self, operation, matrix, arguments, compute):
+        """Get the remembered result of the operation on the matrix, or compute it and remember it"""
+        operand = self._operand(matrix)
+        if operand is None:
+            return compute()
+        key = (operation, operand) + arguments
+        with self._lock:
+            entry = self.cache.get(key, _MISSING)
+        if entry is not _MISSING:
+            return entry[0]
+        result = compute()
+        # The matrix is kept alive along with its result, so its identity can't be reused by another matrix
+        with self._lock:
+            self.cache[key] = (result, matrix)
+        return result
+
+    @staticmethod
+    def _freeze(result):
+        return FrozenMatrix(result) if isinstance(result, Matrix.Matrix) else result
+
+    def determinant(self, matrix, method="lu"):
+        """The determinant of the matrix, computed with method the first time"""
+        return self._lookup("determinant", matrix, (method,),
+                            lambda: _ORIGINALS["determinant"](matrix, method))
+
+    def inverse(self, matrix):
+        """The inverse of the matrix, as a FrozenMatrix"""
+        return self._lookup("inverse", matrix, (), lambda: self._freeze(_ORIGINALS["inverse"](matrix)))
+
+    def lu(self, matrix):
+        """The LU decomposition of the matrix, which must not be modified"""
+        return self._lookup("lu", matrix, (), lambda: _ORIGINALS["lu"](matrix))
+
+    def power(self, matrix, power):
+        """The matrix raised to an integer power (by repeated squaring), as a FrozenMatrix"""
+        return self._lookup("power", matrix, (power,),
+                            lambda: self._freeze(_ORIGINALS["matrix_power"](matrix, power)))
+
+    def _pow(self, matrix, power):
+        # Any other case (such as the power 0 of a non-square matrix) keeps the original behaviour
+        if not matrix.is_square() or not isinstance(power, int):
+            return _ORIGINALS["__pow__"](matrix, power)
+        return self.power(matrix, power)
+
+    def stats(self):
+        """Get the hits, misses, evictions, size, maxsize and hit rate of the cache"""
+        return self.cache.stats()
+
+    def clear(self):
+        """Forget every result, the stats are kept"""
+        self.cache.clear()
+
+    def __enter__(self):
+        _active.set(_active.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        memos = _active.get()
+        if len(memos) == 0 or memos[-1] is not self:
+            raise RuntimeError("A Memo must exit in the context that entered it, after the Memos entered inside it.")
+        _active.set(memos[:-1])
+        return False
+
+
+def _memoized(name, method):
+    """A Matrix method that calls the Memo method of the innermost active Memo, or the original method when there is
+    none, with the name and docstring of the original"""
+    original = _ORIGINALS[name]
+
+    def memoized(matrix, *args, **kwargs):
+        memos = _active.get()
+        if len(memos) == 0:
+            return original(matrix, *args, **kwargs)
+        result = getattr(memos[-1], method)(matrix, *args, **kwargs)
+        # Callers of the Matrix methods may modify what they get, which mustn't change the remembered result
+        if isinstance(result, FrozenMatrix):
+            return result.thaw()
+        return result
+
+    memoized.__name__ = original.__name__
+    memoized.__doc__ = original.__doc__
+    memoized.__wrapped__ = original
+    return memoized
+
+
+# The Matrix methods are replaced once, when this module is imported, rather than on each enter and exit, since a
+# Memo entered in one thread can't know whether one is active in another. Without an active Memo each costs a context
+# variable lookup on top of the original method
+for _name, _method in MEMOIZED.items():
+    setattr(Matrix.Matrix, _name, _memoized(_name, _method))
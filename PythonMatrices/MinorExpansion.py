@@ -0,0 +1,131 @@
+import Cancellation
+
+
+class MinorExpansion(object):
+    """Exact determinants of a square matrix and of its minors, by Laplace expansion with every minor computed once
+
+    Expanding a determinant along its first row leads to minors of the rows below it, and the same minor is reached
+    through many different orders of deleting columns. So the minors are built up level by level from the bottom
+    row: a level holds the determinant of every choice of columns for the rows from some row down, identified by the
+    bitmask of the columns it keeps, and each one is expanded from the level below. This turns the n! of plain
+    Laplace expansion into O(2^n * n) for the determinant. Only multiplication, addition and subtraction are used,
+    with no pivoting and no division, so the result is exact for entries that are exact (integers, Fractions...).
+
+    Every level is kept in one table (2^n minors in all), which the cofactors are read from too: the minor without
+    row i and column j is expanded along its first i rows, pairing the minors of the rows above row i (built level by
+    level from the top row the same way) with the minors of the rows below it. So all n^2 cofactors together cost
+    O(2^n * n) as well, rather than a whole expansion for each row."""
+
+    def __init__(self, rows):
+        """Copy out the square matrix given as a list of rows"""
+        self.rows = [list(row) for row in rows]
+        self.size = len(self.rows)
+        for row in self.rows:
+            if len(row) != self.size:
+                raise ArithmeticError("Cannot compute the determinant of a non-square matrix")
+        # below[k] holds the minors of the rows from k down, above[k] those of the rows above k, both by column mask.
+        # Each is built the first time it's needed
+        self._below = None
+        self._above = None
+        self._cofactors = None
+
+    def _expand(self, rows, columns, downwards=False):
+        """The levels of minors of the given rows (indices from the top down) and every choice of as many of the
+        columns whose bits are set in the mask columns, by the bitmask of the columns each one keeps
+
+        The first level is the empty minor, and each next level adds one more row: the rows are added from the
+        bottom up, each one above the rows before it, or with downwards set from the top down, each one below them.
+        Minors that are zero are left out."""
+        levels = [{0: 1}]
+        positions = [j for j in range(self.size) if columns >> j & 1]
+        order = rows if downwards else list(reversed(rows))
+        for done, i in enumerate(order):
+            Cancellation.checkpoint(done, len(rows))
+            row = self.rows[i]
+            expanded = {}
+            for mask, value in levels[-1].items():
+                # The sign of each entry alternates along the columns the minor keeps, and a row added below the
+                # others is done rows further down
+                below = done if downwards else 0
+                for j in positions:
+                    bit = 1 << j
+                    if mask & bit:
+                        below += 1
+                        continue
+                    entry = row[j]
+                    # A zero entry doesn't need the minor it multiplies
+                    if entry == 0:
+                        continue
+                    key = mask | bit
+                    if below & 1:
+                        expanded[key] = expanded.get(key, 0) - entry * value
+                    else:
+                        expanded[key] = expanded.get(key, 0) + entry * value
+            levels.append(dict((mask, value) for mask, value in expanded.items() if value != 0))
+        return levels
+
+    def minor(self, rows, columns):
+        """The determinant of the submatrix keeping the rows and the columns whose bits are set in the two masks,
+        which must have as many bits set as each other"""
+        indices = [i for i in range(self.size) if rows >> i & 1]
+        return self._expand(indices, columns)[-1].get(columns, 0)
+
+    def _all(self):
+        """The mask with a bit set for every row (or column)"""
+        return (1 << self.size) - 1
+
+    def _levels_below(self):
+        """below[k], the minors of the rows from row k down, for every k from 0 (the whole matrix) to n (none)"""
+        if self._below is None:
+            # The levels come out from the bottom row up, so the last one is the whole matrix
+            self._below = list(reversed(self._expand(list(range(self.size)), self._all())))
+        return self._below
+
+    def determinant(self):
+        """The determinant of the whole matrix"""
+        return self._levels_below()[0].get(self._all(), 0)
+
+    def _cofactor_rows(self):
+        """Every cofactor, from the minors of the rows above and below each row"""
+        if self._cofactors is None:
+            n = self.size
+            everything = self._all()
+            with Cancellation.part(0, 1, 3):
+                below = self._levels_below()
+            with Cancellation.part(1, 2, 3):
+                if self._above is None:
+                    self._above = self._expand(list(range(n)), everything, downwards=True)
+            above = self._above
+
+            cofactors = []
+            with Cancellation.part(2, 3, 3):
+                for i in range(n):
+                    Cancellation.checkpoint(i, n)
+                    minors = [0] * n
+                    rows_below = below[i + 1]
+                    for top, value in above[i].items():
+                        # The columns of the top minor are at the positions they take among the n - 1 columns left
+                        # without column j, the sign of the pairing depends on their sum
+                        total = sum(j for j in range(n) if top >> j & 1) - i * (i - 1) // 2
+                        for j in range(n):
+                            if top >> j & 1:
+                                continue
+                            bottom = rows_below.get(everything ^ top ^ (1 << j))
+                            if bottom is None:
+                                continue
+                            after = bin(top >> (j + 1)).count("1")
+                            if (total - after) & 1:
+                                minors[j] -= value * bottom
+                            else:
+                                minors[j] += value * bottom
+                    cofactors.append([minor if (i + j) % 2 == 0 else -minor for j, minor in enumerate(minors)])
+            self._cofactors = cofactors
+        return self._cofactors
+
+    def cofactor(self, i, j):
+        """The signed determinant of the minor left after deleting row i and column j"""
+        return self._cofactor_rows()[i][j]
+
+    def cofactor_rows(self):
+        """The rows of the cofactor matrix"""
+        return [list(row) for row in self._cofactor_rows()]
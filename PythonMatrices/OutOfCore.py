@@ -0,0 +1,95 @@
+from array import array
+
+import Kernels
+import MatrixFile
+from Matrix import Matrix as Matrix
+
+# The memory the tiles of a product are allowed to take up when a call doesn't say, in bytes
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# What one entry costs while it's being computed with, a float object and the list slot pointing at it
+ENTRY_BYTES = 32
+
+
+def _open(matrix):
+    """Get a Matrix as it is, or a matrix file (given by its path) memory-mapped so nothing is read until it's
+    needed"""
+    if not isinstance(matrix, Matrix):
+        return Matrix.load(matrix, "r")
+    return matrix
+
+
+def _floats(entries):
+    """Copy a slice of entries out as floats"""
+    return [float(entry) for entry in entries]
+
+
+def tile_sizes(height, inner, width, memory_budget=None):
+    """The (rows, inner, columns) dimensions of the tiles a height*inner by inner*width product is computed in
+
+    Half the budget goes to the block of result rows being accumulated, and a quarter each to the tile of A and the
+    tile of B multiplied into it, so the rows of the result block are made as tall as possible (every block of rows
+    reads all of B once)."""
+    if memory_budget is None:
+        memory_budget = DEFAULT_MEMORY_BUDGET
+    quarter = max(1, memory_budget // (4 * ENTRY_BYTES))
+    rows = max(1, min(height, 2 * quarter // max(width, 1)))
+    depth = max(1, min(inner, quarter // rows))
+    columns = max(1, min(width, quarter // depth))
+    return rows, depth, columns
+
+
+def matmul_blocks(a, b, memory_budget=None):
+    """Multiply a by b, where each is a Matrix (such as one memory-mapped with Matrix.load) or the path of a matrix
+    file, yielding (start, block) for each block of rows of the product as soon as it's finished
+
+    Only a tile of each operand and the block of rows being computed are held in memory at once, within memory_budget
+    bytes (roughly, see tile_sizes), so the operands can be larger than memory and the product can be consumed (or
+    written out) a block at a time. The blocks are float Matrices that adopt the rows they were accumulated in."""
+    a = _open(a)
+    b = _open(b)
+    a_rows = a._row_entries()
+    b_rows = b._row_entries()
+    # Exact entries are read as floats, so every block only ever holds floats
+    a_read = list if a.dtype is float else _floats
+    b_read = list if b.dtype is float else _floats
+    height = len(a_rows)
+    inner = len(b_rows)
+    width = len(b_rows[0]) if inner > 0 else 0
+    if height > 0 and len(a_rows[0]) != inner:
+        raise ValueError("Can only multiply by a Matrix with as many rows as this matrix has columns.")
+
+    block_rows, depth, block_columns = tile_sizes(height, inner, width, memory_budget)
+    for i0 in range(0, height, block_rows):
+        i1 = min(i0 + block_rows, height)
+        block = [[0.0] * width for _ in range(i1 - i0)]
+        for j0 in range(0, width, block_columns):
+            j1 = min(j0 + block_columns, width)
+            for k0 in range(0, inner, depth):
+                k1 = min(k0 + depth, inner)
+                # Reading the tiles is what pages the entries in from disk
+                a_tile = [a_read(a_rows[i][k0:k1]) for i in range(i0, i1)]
+                b_tile = [b_read(b_rows[k][j0:j1]) for k in range(k0, k1)]
+                product = Kernels.matmul_rows(a_tile, b_tile)
+                for row, values in zip(block, product):
+                    if k0 == 0:
+                        row[j0:j1] = values
+                    else:
+                        row[j0:j1] = [x + y for x, y in zip(row[j0:j1], values)]
+        yield i0, Matrix._from_lists(block, float)
+
+
+def matmul_to_file(a, b, path, memory_budget=None):
+    """Multiply a by b (Matrices or the paths of matrix files) into a new matrix file at path, a block of rows at a
+    time, and return the product memory-mapped from that file"""
+    a = _open(a)
+    b = _open(b)
+    # Checked before the file is created, so a mismatch doesn't leave an empty file behind
+    if a.shape[1] != b.shape[0]:
+        raise ValueError("Can only multiply by a Matrix with as many rows as this matrix has columns.")
+    out = MatrixFile.create(path, (a.shape[0], b.shape[1]))
+    for start, block in matmul_blocks(a, b, memory_budget):
+        for i, row in enumerate(block._row_entries()):
+            out.row(start + i)[:] = array("d", row)
+    # Make sure every block has reached the file before it's reopened
+    MatrixFile.flush(out)
+    return Matrix.load(path, "r")
@@ -0,0 +1,188 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import Cancellation
+import Kernels
+
+# Products with fewer multiply-adds than this are done serially, since starting the tasks would cost more
+PARALLEL_THRESHOLD = 64 ** 3
+
+# The amount of processes used when a call doesn't say, 1 (or None) runs everything serially
+_workers = None
+# The process pool, which is started the first time it's needed and reused afterwards
+_executor = None
+_executor_workers = None
+
+
+def set_workers(workers):
+    """Set the amount of processes that matrix products and cofactor matrices are spread over by default, None or 1
+    to run serially, or 0 to use every CPU"""
+    global _workers
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    _workers = workers
+
+
+def get_workers(workers=None):
+    """The amount of processes a call should use, given what it asked for"""
+    if workers is None:
+        workers = _workers
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    return workers if workers is not None else 1
+
+
+def _get_executor(workers):
+    """Get a process pool with the given amount of workers, replacing the current one if its size differs"""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+
+def _share(rows, width):
+    """Copy a matrix (a list of rows) into a new block of shared memory, which the workers read without it being
+    pickled for each of them"""
+    size = max(8 * len(rows) * width, 8)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    view = block.buf.cast("d")
+    for i in range(len(rows)):
+        view[i * width:(i + 1) * width] = array("d", rows[i])
+    view.release()
+    return block
+
+
+def _attach(name):
+    """Open a block of shared memory created by the parent process, which stays responsible for removing it"""
+    # The workers share the parent's resource tracker, so attaching doesn't hand the block over to this process
+    return shared_memory.SharedMemory(name=name)
+
+
+def _rows_of(view, height, width):
+    """Split a flat view of shared doubles into a view for each row"""
+    return [view[i * width:(i + 1) * width] for i in range(height)]
+
+
+def _matmul_task(a_name, b_name, out_name, a_shape, b_shape, start, stop):
+    """Compute the rows start to stop of the product in a worker, writing them straight into the shared output"""
+    a_block = _attach(a_name)
+    b_block = _attach(b_name)
+    out_block = _attach(out_name)
+    a_view = a_block.buf.cast("d")
+    b_view = b_block.buf.cast("d")
+    out_view = out_block.buf.cast("d")
+    try:
+        a_rows = _rows_of(a_view, a_shape[0], a_shape[1])
+        b_rows = _rows_of(b_view, b_shape[0], b_shape[1])
+        width = b_shape[1]
+        i = start
+        # The same kernel as the serial product, so the results are identical
+        for block in Kernels.matmul_row_blocks(a_rows, b_rows, start=start, stop=stop):
+            for values in block:
+                out_view[i * width:(i + 1) * width] = array("d", values)
+                i += 1
+        del a_rows, b_rows
+    finally:
+        a_view.release()
+        b_view.release()
+        out_view.release()
+        a_block.close()
+        b_block.close()
+        out_block.close()
+
+
+def _cofactor_task(name, n, start, stop, out_name):
+    """Compute the rows start to stop of the cofactor matrix in a worker, writing them into the shared output"""
+    block = _attach(name)
+    out_block = _attach(out_name)
+    view = block.buf.cast("d")
+    out_view = out_block.buf.cast("d")
+    try:
+        rows = [row.tolist() for row in _rows_of(view, n, n)]
+        for i in range(start, stop):
+            out_view[i * n:(i + 1) * n] = array("d", Kernels.cofactor_row(rows, i))
+    finally:
+        view.release()
+        out_view.release()
+        block.close()
+        out_block.close()
+
+
+def _split(count, parts):
+    """Split range(count) into up to parts contiguous (start, stop) ranges of nearly equal size"""
+    parts = max(1, min(parts, count))
+    ranges = []
+    for p in range(parts):
+        ranges.append((count * p // parts, count * (p + 1) // parts))
+    return ranges
+
+
+def _collect(block, height, width):
+    """Copy the rows of a shared output block into lists"""
+    view = block.buf.cast("d")
+    rows = [view[i * width:(i + 1) * width].tolist() for i in range(height)]
+    view.release()
+    return rows
+
+
+def _release(blocks):
+    """Close and remove blocks of shared memory"""
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def matmul_rows(a, b, workers=None):
+    """Multiply the matrix a by the matrix b (lists of rows), with the rows of the product split between processes
+
+    The result is identical to Kernels.matmul_rows, which is what each process runs on its share of the rows."""
+    workers = get_workers(workers)
+    height = len(a)
+    inner = len(b)
+    width = len(b[0]) if inner > 0 else 0
+    if workers <= 1 or height < 2 or height * inner * width < PARALLEL_THRESHOLD:
+        return Kernels.matmul_rows(a, b)
+
+    blocks = [_share(a, inner), _share(b, width), shared_memory.SharedMemory(create=True, size=8 * height * width)]
+    try:
+        executor = _get_executor(workers)
+        futures = []
+        for start, stop in _split(height, workers):
+            futures.append(executor.submit(_matmul_task, blocks[0].name, blocks[1].name, blocks[2].name,
+                                           (height, inner), (inner, width), start, stop))
+        # A computation can only be stopped between the shares of the processes
+        for done, future in enumerate(futures):
+            future.result()
+            Cancellation.checkpoint(done + 1, len(futures))
+        return _collect(blocks[2], height, width)
+    finally:
+        _release(blocks)
+
+
+def cofactor_rows(rows, workers=None):
+    """The rows of the cofactor matrix of the square matrix rows, with the n^2 minors split between processes
+
+    The result is identical to computing Kernels.cofactor_row for each row, which is what each process runs."""
+    workers = get_workers(workers)
+    n = len(rows)
+    if workers <= 1 or n < 2 or n ** 4 < PARALLEL_THRESHOLD:
+        return [Kernels.cofactor_row(rows, i) for i in range(n)]
+
+    blocks = [_share(rows, n), shared_memory.SharedMemory(create=True, size=8 * n * n)]
+    try:
+        executor = _get_executor(workers)
+        futures = []
+        for start, stop in _split(n, workers):
+            futures.append(executor.submit(_cofactor_task, blocks[0].name, n, start, stop, blocks[1].name))
+        # A computation can only be stopped between the shares of the processes
+        for done, future in enumerate(futures):
+            future.result()
+            Cancellation.checkpoint(done + 1, len(futures))
+        return _collect(blocks[1], n, n)
+    finally:
+        _release(blocks)
@@ -0,0 +1,336 @@
+import inspect
+import json
+import marshal
+import sys
+import threading
+import time
+import tracemalloc
+
+import Matrix
+import Vector
+
+
+def _dimensions(matrix):
+    """The amount of rows and columns of a Matrix, read without calling any of the operations being profiled"""
+    return matrix.shape
+
+
+def _matrix_product_flops(matrix, value=None, *args, **kwargs):
+    n, m = _dimensions(matrix)
+    if isinstance(value, Matrix.Matrix):
+        return 2 * n * m * _dimensions(value)[1]
+    if isinstance(value, Vector.Vector):
+        return 2 * n * m
+    return n * m
+
+
+def _elementwise_flops(matrix, *args, **kwargs):
+    n, m = _dimensions(matrix)
+    return n * m
+
+
+def _scaled_flops(matrix, *args, **kwargs):
+    n, m = _dimensions(matrix)
+    return 2 * n * m
+
+
+def _factorisation_flops(matrix, *args, **kwargs):
+    n, _ = _dimensions(matrix)
+    return 2 * n ** 3 // 3
+
+
+def _inverse_flops(matrix, *args, **kwargs):
+    n, _ = _dimensions(matrix)
+    return 2 * n ** 3
+
+
+def _solve_flops(matrix, b=None, *args, **kwargs):
+    n, _ = _dimensions(matrix)
+    columns = _dimensions(b)[1] if isinstance(b, Matrix.Matrix) else 1
+    return 2 * n ** 3 // 3 + 2 * n * n * columns
+
+
+def _eigenvalue_flops(matrix, *args, **kwargs):
+    n, _ = _dimensions(matrix)
+    return 10 * n ** 3
+
+
+def _vector_flops(vector, *args, **kwargs):
+    return len(vector.entries)
+
+
+def _vector_product_flops(vector, value=None, *args, **kwargs):
+    if isinstance(value, Vector.Vector):
+        return 2 * len(vector.entries)
+    return len(vector.entries)
+
+
+def _double_vector_flops(vector, *args, **kwargs):
+    return 2 * len(vector.entries)
+
+
+def _cross_flops(*args, **kwargs):
+    return 9
+
+
+def _no_flops(*args, **kwargs):
+    return 0
+
+
+# The operations that are instrumented, and how to estimate the floating point operations of a call from its
+# arguments. The estimates include the operations of the calls each one makes, just like its time does
+OPERATIONS = {
+    Matrix.Matrix: {
+        "__mul__": _matrix_product_flops,
+        "multiply": _matrix_product_flops,
+        "__matmul__": _matrix_product_flops,
+        "matvec": _scaled_flops,
+        "__imul__": _matrix_product_flops,
+        "__add__": _elementwise_flops,
+        "__sub__": _elementwise_flops,
+        "__iadd__": _elementwise_flops,
+        "__isub__": _elementwise_flops,
+        "add_scaled": _scaled_flops,
+        "__pow__": _no_flops,
+        "matrix_power": _no_flops,
+        "expm": _no_flops,
+        "determinant": _factorisation_flops,
+        "lu": _factorisation_flops,
+        "rank": _factorisation_flops,
+        "inverse": _inverse_flops,
+        "solve": _solve_flops,
+        "cofactor_matrix": _inverse_flops,
+        "eigenvalues": _eigenvalue_flops,
+        "transpose": _no_flops,
+        "copy": _no_flops,
+        "identity": _no_flops,
+        "row_vectors": _no_flops,
+        "column_vectors": _no_flops,
+        "get_row_vector": _no_flops,
+        "get_column_vector": _no_flops,
+        "row_length": _no_flops,
+        "column_length": _no_flops,
+        "__len__": _no_flops,
+        "minor": _no_flops,
+    },
+    Vector.Vector: {
+        "__add__": _vector_flops,
+        "__sub__": _vector_flops,
+        "__iadd__": _vector_flops,
+        "__isub__": _vector_flops,
+        "__imul__": _vector_flops,
+        "add_scaled": _double_vector_flops,
+        "__mul__": _vector_product_flops,
+        "dot": _double_vector_flops,
+        "cross": _cross_flops,
+        "sqr_magnitude": _double_vector_flops,
+        "magnitude": _double_vector_flops,
+    },
+}
+
+# The small Vectors override the operations with unrolled ones, which are instrumented as well
+for _cls in (Vector.Vector2, Vector.Vector3, Vector.Vector4):
+    OPERATIONS[_cls] = dict((method, flops) for method, flops in OPERATIONS[Vector.Vector].items()
+                            if method in _cls.__dict__)
+del _cls
+
+# The Profiles currently recording, the newest last
+_profiles = []
+# The methods that were replaced by wrappers, by class and name, to put back when profiling stops
+_originals = {}
+# The (file, line, name) that identifies each operation in cProfile's format
+_functions = {}
+
+
+class _Local(threading.local):
+    def __init__(self):
+        # The instrumented calls in progress in this thread, the innermost last, each as [name, seconds spent in
+        # instrumented calls it made]
+        self.stack = []
+
+
+_local = _Local()
+# Held while the Profiles record a call, which can finish in any thread
+_lock = threading.Lock()
+
+
+class Profile(object):
+    """The statistics of the operations called while the Profile is active (entered as a context manager)
+
+    Nothing is measured outside a Profile. While one is active, each operation listed in OPERATIONS is replaced on its
+    class by a wrapper that counts its calls and records the wall time, an estimate of the floating point operations
+    and the memory blocks (with track_allocations, also the bytes) the call leaves allocated. When the last Profile
+    exits the original methods are put back, so with profiling off the operations run as if this module didn't
+    exist. For example:
+
+        with Profiling.Profile() as profile:
+            matrix.determinant()
+        print(profile.to_json())
+        profile.dump_stats("matrices.prof")  # for pstats.Stats("matrices.prof").sort_stats("cumtime").print_stats()
+    """
+
+    def __init__(self, track_allocations=False):
+        """With track_allocations set the bytes each call leaves allocated are traced too, with tracemalloc, which
+        slows everything down a lot more than the other measurements"""
+        self.track_allocations = track_allocations
+        self._started_tracing = False
+        # The totals for each operation by name: primitive (not recursive) calls, calls, time not spent in other
+        # instrumented calls, total time, flops, blocks and bytes
+        self.records = {}
+        # The same totals (without the flops and memory) for each operation, split up by the operation that called it
+        self.callers = {}
+
+    def __enter__(self):
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if len(_profiles) == 0:
+            _install()
+        _profiles.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _profiles.remove(self)
+        if len(_profiles) == 0:
+            _uninstall()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    def _record(self, name, caller, primitive, seconds, own_seconds, flops, blocks, size):
+        record = self.records.get(name)
+        if record is None:
+            record = self.records[name] = [0, 0, 0.0, 0.0, 0, 0, 0]
+        record[0] += primitive
+        record[1] += 1
+        record[2] += own_seconds
+        # The time of a recursive call is already part of the outermost call's time
+        if primitive:
+            record[3] += seconds
+        record[4] += flops
+        record[5] += blocks
+        record[6] += size
+
+        if caller is not None:
+            callers = self.callers.setdefault(name, {})
+            totals = callers.get(caller)
+            if totals is None:
+                totals = callers[caller] = [0, 0, 0.0, 0.0]
+            totals[0] += primitive
+            totals[1] += 1
+            totals[2] += own_seconds
+            totals[3] += seconds
+
+    def stats(self):
+        """Get the statistics of each operation by name ("Matrix.determinant"...): the calls, the total seconds
+        (including the instrumented calls it made) and its own seconds (excluding them), the estimated floating point
+        operations, and the memory blocks and bytes (only with track_allocations) left allocated by the calls"""
+        stats = {}
+        for name, (_, calls, own_seconds, seconds, flops, blocks, size) in self.records.items():
+            stats[name] = {
+                "calls": calls,
+                "seconds": seconds,
+                "own_seconds": own_seconds,
+                "flops": flops,
+                "blocks": blocks,
+                "bytes": size,
+            }
+        return stats
+
+    def to_json(self, path=None):
+        """Get the statistics as a JSON document, and write it to the file at path if one is given"""
+        document = json.dumps(self.stats(), indent=2, sort_keys=True)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(document)
+        return document
+
+    def dump_stats(self, path):
+        """Write the call counts and times to the file at path in the format cProfile writes, so they can be read
+        (and merged with a cProfile run) by pstats.Stats"""
+        stats = {}
+        for name, (primitive, calls, own_seconds, seconds, _, _, _) in self.records.items():
+            callers = {}
+            for caller, totals in self.callers.get(name, {}).items():
+                callers[_functions[caller]] = tuple(totals)
+            stats[_functions[name]] = (primitive, calls, own_seconds, seconds, callers)
+        with open(path, "wb") as file:
+            marshal.dump(stats, file)
+
+
+def enabled():
+    """Check whether the operations are being profiled"""
+    return len(_profiles) > 0
+
+
+def _count(signature, flops, args, kwargs):
+    """Estimate the floating point operations of a call, with any arguments given by keyword passed to the estimate
+    in their positions, or 0 for a call the function wouldn't accept"""
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return 0
+    return flops(*bound.args, **bound.kwargs)
+
+
+def _wrap(name, function, flops):
+    """Wrap the function of an operation so each call is recorded by the active Profiles"""
+    signature = inspect.signature(function)
+
+    def profiled(*args, **kwargs):
+        stack = _local.stack
+        recursive = False
+        for frame in stack:
+            if frame[0] == name:
+                recursive = True
+                break
+        frame = [name, 0.0]
+        stack.append(frame)
+        tracing = tracemalloc.is_tracing()
+        size = tracemalloc.get_traced_memory()[0] if tracing else 0
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            blocks = sys.getallocatedblocks() - blocks
+            size = tracemalloc.get_traced_memory()[0] - size if tracing else 0
+            stack.pop()
+            caller = None
+            if len(stack) > 0:
+                stack[-1][1] += seconds
+                caller = stack[-1][0]
+            count = _count(signature, flops, args, kwargs)
+            with _lock:
+                for profile in _profiles:
+                    profile._record(name, caller, not recursive, seconds, seconds - frame[1], count, blocks, size)
+
+    profiled.__name__ = function.__name__
+    profiled.__doc__ = function.__doc__
+    profiled.__wrapped__ = function
+    return profiled
+
+
+def _install():
+    """Replace every operation in OPERATIONS with a profiled wrapper"""
+    for cls, operations in OPERATIONS.items():
+        for method, flops in operations.items():
+            original = cls.__dict__[method]
+            name = cls.__name__ + "." + method
+            static = isinstance(original, staticmethod)
+            function = original.__func__ if static else original
+            code = function.__code__
+            _functions[name] = (code.co_filename, code.co_firstlineno, name)
+            wrapper = _wrap(name, function, flops)
+            _originals[(cls, method)] = original
+            setattr(cls, method, staticmethod(wrapper) if static else wrapper)
+
+
+def _uninstall():
+    """Put back the original operations"""
+    for (cls, method), original in _originals.items():
+        setattr(cls, method, original)
+    _originals.clear()
+    del _local.stack[:]
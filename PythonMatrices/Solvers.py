@@ -0,0 +1,271 @@
+import math
+
+import Matrix
+from Vector import Vector as Vector
+
+# The solvers stop once the residual b - A * x is this small relative to b, when a call doesn't say
+TOLERANCE = 1e-10
+# GMRES starts over from its latest solution after this many steps, so the basis it keeps doesn't grow without bound
+RESTART = 50
+
+
+class ConvergenceError(ArithmeticError):
+    """Raised when an iterative solver doesn't reach its tolerance within the iterations it was allowed, the latest
+    solution is kept in solution (a Vector) so another call can be warm started from it"""
+
+    def __init__(self, message, solution, residual):
+        ArithmeticError.__init__(self, message)
+        self.solution = solution
+        self.residual = residual
+
+
+class LinearOperator(object):
+    """A matrix that is never stored, only applied to vectors by a function, for the iterative solvers
+
+    The function is given the entries of a vector as a list and returns the entries of the product, the diagonal (a
+    list of entries) is only needed by the Jacobi method."""
+
+    def __init__(self, shape: tuple, matvec, diagonal=None):
+        self.shape = (shape[0], shape[1])
+        self._matvec = matvec
+        self._diagonal = diagonal
+
+    def matvec(self, vector: Vector):
+        """Multiply the operator by a Vector"""
+        if len(vector) != self.shape[1]:
+            raise ValueError("The Vector must have as many entries as the operator has columns.")
+        return Vector(list(self._matvec(list(vector.entries))))
+
+    def __matmul__(self, value):
+        if isinstance(value, Vector):
+            return self.matvec(value)
+        return NotImplemented
+
+    def diagonal(self):
+        """The entries on the diagonal of the operator"""
+        if self._diagonal is None:
+            raise ValueError("The diagonal of this operator wasn't given.")
+        return list(self._diagonal)
+
+
+def _dot(x, y):
+    total = 0.0
+    for a, b in zip(x, y):
+        total += a * b
+    return total
+
+
+def _norm(x):
+    return math.sqrt(_dot(x, x))
+
+
+def _apply(operator, x):
+    """The entries of the operator times the entries x"""
+    return operator.matvec(Vector.view(x)).entries
+
+
+def _residual(operator, b, x):
+    """The entries of b - A * x"""
+    return [bi - ai for bi, ai in zip(b, _apply(operator, x))]
+
+
+def _start(b, x0, tolerance, max_iterations):
+    """The entries of b, of the starting guess x0 (zero by default), the residual size to stop at and the amount of
+    iterations allowed (10 times the size of the system by default)"""
+    entries = [float(entry) for entry in b.entries]
+    if x0 is None:
+        x = [0.0] * len(entries)
+    else:
+        if len(x0) != len(entries):
+            raise ValueError("The starting guess must have as many entries as the right hand side.")
+        x = [float(entry) for entry in x0.entries]
+    if max_iterations is None:
+        max_iterations = 10 * max(len(entries), 1)
+    return entries, x, tolerance * _norm(entries), max_iterations
+
+
+def _fail(name, iterations, x, residual):
+    raise ConvergenceError(name + " did not converge in " + str(iterations) + " iterations", Vector(x), residual)
+
+
+def _diagonal(operator, n):
+    """The entries on the diagonal of the operator, a Matrix, a SparseMatrix or anything with a diagonal method"""
+    if hasattr(operator, "diagonal"):
+        diagonal = list(operator.diagonal())
+    elif hasattr(operator, "row_entries"):
+        diagonal = [dict(operator.row_entries(i)).get(i, 0.0) for i in range(n)]
+    elif isinstance(operator, Matrix.Matrix):
+        diagonal = [operator.rows[i].entries[i] for i in range(n)]
+    else:
+        raise ValueError("The Jacobi method needs the diagonal of the operator.")
+    for entry in diagonal:
+        if entry == 0:
+            raise ZeroDivisionError("The Jacobi and Gauss-Seidel methods need a diagonal without zeros")
+    return diagonal
+
+
+def _row_pairs(operator):
+    """Get a function giving the (column, entry) pairs of row i of a Matrix or a SparseMatrix"""
+    if hasattr(operator, "row_entries"):
+        return operator.row_entries
+    elif isinstance(operator, Matrix.Matrix):
+        rows = operator.rows
+        return lambda i: enumerate(rows[i].entries)
+    raise ValueError("The Gauss-Seidel method needs the rows of the operator, a Matrix or a SparseMatrix.")
+
+
+def conjugate_gradient(operator, b: Vector, x0: Vector = None, tolerance=TOLERANCE, max_iterations=None):
+    """Solve A * x = b for a symmetric positive definite operator A by the conjugate gradient method, starting from the
+    guess x0 (zero by default, pass an earlier solution to warm start)
+
+    The operator can be anything with a matvec method (a Matrix, a SparseMatrix, a LinearOperator...), each iteration
+    multiplies it by one vector, so a sparse system takes far less than the O(n^3) of a direct solve. Stops when the
+    residual is within tolerance of b (relatively), or raises a ConvergenceError after max_iterations."""
+    b, x, target, max_iterations = _start(b, x0, tolerance, max_iterations)
+    r = _residual(operator, b, x)
+    rr = _dot(r, r)
+    if math.sqrt(rr) <= target:
+        return Vector(x)
+
+    p = list(r)
+    for _ in range(max_iterations):
+        q = _apply(operator, p)
+        pq = _dot(p, q)
+        if pq <= 0:
+            raise ArithmeticError("The conjugate gradient method needs a positive definite operator")
+        alpha = rr / pq
+        x = [xi + alpha * pi for xi, pi in zip(x, p)]
+        r = [ri - alpha * qi for ri, qi in zip(r, q)]
+        previous = rr
+        rr = _dot(r, r)
+        if math.sqrt(rr) <= target:
+            return Vector(x)
+        # The next direction is conjugate to all the earlier ones
+        beta = rr / previous
+        p = [ri + beta * pi for ri, pi in zip(r, p)]
+
+    _fail("The conjugate gradient method", max_iterations, x, math.sqrt(rr))
+
+
+def gmres(operator, b: Vector, x0: Vector = None, tolerance=TOLERANCE, max_iterations=None, restart=RESTART):
+    """Solve A * x = b for any square operator A (with a matvec method) by the generalised minimal residual method,
+    restarted every restart steps, starting from the guess x0 (zero by default, pass an earlier solution to warm
+    start)
+
+    Each step extends an orthonormal basis of the Krylov space b, A * b, A^2 * b... by one multiplication, and the
+    solution is the one in that space with the smallest residual, found with Givens rotations as the basis grows.
+    Stops when the residual is within tolerance of b (relatively), or raises a ConvergenceError after max_iterations
+    steps in total."""
+    b, x, target, max_iterations = _start(b, x0, tolerance, max_iterations)
+    r = _residual(operator, b, x)
+    beta = _norm(r)
+    iterations = 0
+    while beta > target:
+        if iterations >= max_iterations:
+            _fail("GMRES", max_iterations, x, beta)
+
+        basis = [[ri / beta for ri in r]]
+        # The columns of the Hessenberg matrix of the Arnoldi process, made upper triangular by the rotations
+        columns = []
+        cosines = []
+        sines = []
+        # The right hand side of the least squares problem, rotated along with the columns
+        g = [beta]
+        for k in range(min(restart, max_iterations - iterations)):
+            # Orthogonalise the next Krylov vector against the basis (modified Gram-Schmidt)
+            w = list(_apply(operator, basis[k]))
+            column = []
+            for v in basis:
+                h = _dot(w, v)
+                w = [wi - h * vi for wi, vi in zip(w, v)]
+                column.append(h)
+            norm = _norm(w)
+            column.append(norm)
+
+            # Apply the earlier rotations to the new column, then find the rotation that zeroes its last entry
+            for i in range(k):
+                a, c = column[i], column[i + 1]
+                column[i] = cosines[i] * a + sines[i] * c
+                column[i + 1] = -sines[i] * a + cosines[i] * c
+            length = math.hypot(column[k], column[k + 1])
+            cosine, sine = (1.0, 0.0) if length == 0 else (column[k] / length, column[k + 1] / length)
+            column[k] = length
+            column[k + 1] = 0.0
+            cosines.append(cosine)
+            sines.append(sine)
+            g.append(-sine * g[k])
+            g[k] = cosine * g[k]
+            columns.append(column)
+            iterations += 1
+
+            # The rotated right hand side's last entry is the residual of the best solution so far
+            if abs(g[k + 1]) <= target or norm == 0:
+                break
+            basis.append([wi / norm for wi in w])
+
+        # Back substitute for the coefficients of the basis vectors in the update
+        m = len(columns)
+        y = [0.0] * m
+        for i in range(m - 1, -1, -1):
+            total = g[i]
+            for j in range(i + 1, m):
+                total -= columns[j][i] * y[j]
+            if columns[i][i] == 0:
+                raise ArithmeticError("GMRES broke down, the operator is singular")
+            y[i] = total / columns[i][i]
+        for j in range(m):
+            x = [xi + y[j] * vi for xi, vi in zip(x, basis[j])]
+
+        r = _residual(operator, b, x)
+        beta = _norm(r)
+    return Vector(x)
+
+
+def jacobi(operator, b: Vector, x0: Vector = None, tolerance=TOLERANCE, max_iterations=None):
+    """Solve A * x = b by the Jacobi method, which converges for diagonally dominant operators, starting from the guess
+    x0 (zero by default, pass an earlier solution to warm start)
+
+    Each iteration corrects every entry by its residual over the diagonal entry, so only a multiplication and the
+    diagonal are needed (the operator is a Matrix, a SparseMatrix, or has a diagonal method). Stops when the residual
+    is within tolerance of b (relatively), or raises a ConvergenceError after max_iterations."""
+    b, x, target, max_iterations = _start(b, x0, tolerance, max_iterations)
+    diagonal = _diagonal(operator, len(b))
+    r = _residual(operator, b, x)
+    for _ in range(max_iterations):
+        if _norm(r) <= target:
+            return Vector(x)
+        x = [xi + ri / di for xi, ri, di in zip(x, r, diagonal)]
+        r = _residual(operator, b, x)
+    residual = _norm(r)
+    if residual <= target:
+        return Vector(x)
+    _fail("The Jacobi method", max_iterations, x, residual)
+
+
+def gauss_seidel(operator, b: Vector, x0: Vector = None, tolerance=TOLERANCE, max_iterations=None):
+    """Solve A * x = b by the Gauss-Seidel method, which converges for diagonally dominant or symmetric positive
+    definite operators, starting from the guess x0 (zero by default, pass an earlier solution to warm start)
+
+    Unlike Jacobi, each entry is updated in place using the entries already updated in the same sweep, which usually
+    converges about twice as fast, but it needs the rows of the operator (a Matrix or a SparseMatrix). Stops when the
+    residual is within tolerance of b (relatively), or raises a ConvergenceError after max_iterations sweeps."""
+    b, x, target, max_iterations = _start(b, x0, tolerance, max_iterations)
+    _diagonal(operator, len(b))
+    pairs = _row_pairs(operator)
+    residual = _norm(_residual(operator, b, x))
+    for _ in range(max_iterations):
+        if residual <= target:
+            return Vector(x)
+        for i in range(len(b)):
+            total = b[i]
+            diagonal = 0.0
+            for j, entry in pairs(i):
+                if j == i:
+                    diagonal = entry
+                else:
+                    total -= entry * x[j]
+            x[i] = total / diagonal
+        residual = _norm(_residual(operator, b, x))
+    if residual <= target:
+        return Vector(x)
+    _fail("The Gauss-Seidel method", max_iterations, x, residual)
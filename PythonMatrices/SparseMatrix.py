@@ -0,0 +1,321 @@
+from array import array
+from bisect import bisect_left
+from fractions import Fraction
+
+from Matrix import Matrix as Matrix
+from Vector import Vector as Vector
+
+
+class SparseMatrix(object):
+    """A Matrix that only stores its non-zero entries, in compressed sparse row (CSR) form
+
+    The column indices and values of the non-zero entries are stored row after row, and row_starts[i] is where the
+    entries of row i begin (so row_starts[i + 1] is where they end). Memory and the cost of every operation scale with
+    the amount of non-zero entries rather than with the size of the matrix."""
+
+    def __init__(self, shape: tuple, values, columns, row_starts):
+        """Create a SparseMatrix of the given (rows, columns) shape directly from its CSR arrays"""
+        self.shape = (shape[0], shape[1])
+        self.values = array("d", values)
+        self.columns = array("q", columns)
+        self.row_starts = array("q", row_starts)
+
+        if len(self.row_starts) != self.shape[0] + 1:
+            raise ValueError("There must be one more row start than there are rows.")
+        if len(self.values) != len(self.columns) or self.row_starts[-1] != len(self.values):
+            raise ValueError("There must be a column index for every value.")
+
+    @staticmethod
+    def from_coo(shape: tuple, rows, columns, values):
+        """Create a SparseMatrix from coordinate (COO) form, three lists holding the row, column and value of each
+        entry, duplicate entries are added together and zeros are dropped"""
+        if not len(rows) == len(columns) == len(values):
+            raise ValueError("There must be a row, column and value for every entry.")
+
+        # Gather the entries of every row, adding up any duplicates
+        gathered = [{} for _ in range(shape[0])]
+        for i, j, value in zip(rows, columns, values):
+            if i < 0 or i >= shape[0] or j < 0 or j >= shape[1]:
+                raise IndexError()
+            row = gathered[i]
+            row[j] = row.get(j, 0.0) + float(value)
+
+        return SparseMatrix._from_row_dicts(shape, gathered)
+
+    @staticmethod
+    def _from_row_dicts(shape, rows):
+        """Create a SparseMatrix from a dictionary of {column: value} for every row, dropping zeros"""
+        values = array("d")
+        columns = array("q")
+        row_starts = array("q", [0])
+        for row in rows:
+            for j in sorted(row):
+                value = row[j]
+                if value != 0:
+                    columns.append(j)
+                    values.append(value)
+            row_starts.append(len(values))
+        return SparseMatrix(shape, values, columns, row_starts)
+
+    @staticmethod
+    def from_dense(matrix: Matrix):
+        """Create a SparseMatrix holding the non-zero entries of a Matrix"""
+        rows = matrix.row_vectors()
+        width = len(rows[0]) if len(rows) > 0 else 0
+        values = array("d")
+        columns = array("q")
+        row_starts = array("q", [0])
+        for row in rows:
+            entries = row.entries
+            for j in range(width):
+                if entries[j] != 0:
+                    columns.append(j)
+                    values.append(entries[j])
+            row_starts.append(len(values))
+        return SparseMatrix((len(rows), width), values, columns, row_starts)
+
+    @staticmethod
+    def identity(size):
+        """Create a sparse square identity matrix of the given dimensions"""
+        return SparseMatrix((size, size), [1.0] * size, range(size), range(size + 1))
+
+    def to_dense(self):
+        """Get a Matrix holding every entry of this matrix, zeros included"""
+        rows = []
+        for i in range(self.shape[0]):
+            entries = [0.0] * self.shape[1]
+            for p in range(self.row_starts[i], self.row_starts[i + 1]):
+                entries[self.columns[p]] = self.values[p]
+            rows.append(entries)
+        return Matrix._from_entries(rows)
+
+    def to_coo(self):
+        """Get the (rows, columns, values) lists of the coordinate form of this matrix"""
+        rows = []
+        for i in range(self.shape[0]):
+            rows += [i] * (self.row_starts[i + 1] - self.row_starts[i])
+        return rows, list(self.columns), list(self.values)
+
+    def nnz(self):
+        """The amount of stored (non-zero) entries"""
+        return len(self.values)
+
+    def row_length(self):
+        """Return the amount of horizontal entries in the matrix"""
+        return self.shape[1]
+
+    def column_length(self):
+        """Return the amount of vertical entries in the matrix"""
+        return self.shape[0]
+
+    def is_square(self):
+        """A check to see whether the matrix has equal column and row dimensions"""
+        return self.shape[0] == self.shape[1]
+
+    def is_zero(self):
+        """A Check to see whether the Matrix has all zero entries"""
+        for value in self.values:
+            if value != 0:
+                return False
+        return True
+
+    def row_entries(self, i):
+        """Get the (column, value) pairs of the non-zero entries in row i"""
+        start = self.row_starts[i]
+        stop = self.row_starts[i + 1]
+        return zip(self.columns[start:stop], self.values[start:stop])
+
+    def __getitem__(self, index):
+        """Get the entry m[i, j], which is zero if it isn't stored"""
+        i, j = index
+        if i < 0:
+            i += self.shape[0]
+        if j < 0:
+            j += self.shape[1]
+        if i < 0 or i >= self.shape[0] or j < 0 or j >= self.shape[1]:
+            raise IndexError()
+
+        # The columns in each row are sorted, so the entry can be found by bisection
+        start = self.row_starts[i]
+        stop = self.row_starts[i + 1]
+        p = bisect_left(self.columns, j, start, stop)
+        if p < stop and self.columns[p] == j:
+            return self.values[p]
+        return 0.0
+
+    def transpose(self):
+        """Swap the rows and columns of the matrix, in O(nnz) time"""
+        rows, width = self.shape
+        # Count the entries in each column, which become the rows of the transpose
+        counts = [0] * (width + 1)
+        for j in self.columns:
+            counts[j + 1] += 1
+        for j in range(width):
+            counts[j + 1] += counts[j]
+
+        row_starts = array("q", counts)
+        values = array("d", bytes(8 * self.nnz()))
+        columns = array("q", bytes(8 * self.nnz()))
+        # Walking the rows in order keeps the columns of the transpose sorted
+        for i in range(rows):
+            for p in range(self.row_starts[i], self.row_starts[i + 1]):
+                j = self.columns[p]
+                q = counts[j]
+                columns[q] = i
+                values[q] = self.values[p]
+                counts[j] += 1
+
+        return SparseMatrix((width, rows), values, columns, row_starts)
+
+    def matvec(self, vector: Vector):
+        """Multiply the matrix by a Vector, returning the Vector of the dot products of each row with it"""
+        if len(vector) != self.shape[1]:
+            raise ValueError("The Vector must have as many entries as the matrix has columns.")
+
+        x = vector.entries
+        entries = []
+        for i in range(self.shape[0]):
+            total = 0.0
+            for p in range(self.row_starts[i], self.row_starts[i + 1]):
+                total += self.values[p] * x[self.columns[p]]
+            entries.append(total)
+        return Vector(entries)
+
+    def _scale(self, scalar):
+        """Multiply every entry by a number"""
+        if scalar == 0:
+            return SparseMatrix(self.shape, [], [], [0] * (self.shape[0] + 1))
+        values = array("d", [value * scalar for value in self.values])
+        return SparseMatrix(self.shape, values, self.columns, self.row_starts)
+
+    def _matmul_sparse(self, other):
+        """Multiply by another SparseMatrix, row by row (Gustavson's method), keeping the result sparse"""
+        rows = []
+        for i in range(self.shape[0]):
+            accumulator = {}
+            for k, a in self.row_entries(i):
+                for j, b in other.row_entries(k):
+                    accumulator[j] = accumulator.get(j, 0.0) + a * b
+            rows.append(accumulator)
+        return SparseMatrix._from_row_dicts((self.shape[0], other.shape[1]), rows)
+
+    def _matmul_dense(self, matrix):
+        """Multiply by a dense Matrix, each row of the product is a sum of scaled rows of the Matrix"""
+        b = matrix._row_entries()
+        width = len(b[0]) if len(b) > 0 else 0
+        rows = []
+        for i in range(self.shape[0]):
+            acc = [0.0] * width
+            for k, a in self.row_entries(i):
+                acc = [x + a * y for x, y in zip(acc, b[k])]
+            rows.append(acc)
+        return Matrix._from_entries(rows)
+
+    def _rmatmul_dense(self, matrix):
+        """Multiply a dense Matrix by this matrix, only the non-zero rows of this matrix are visited"""
+        rows = []
+        for a_row in matrix._row_entries():
+            acc = [0.0] * self.shape[1]
+            for k in range(self.shape[0]):
+                a = a_row[k]
+                if a != 0:
+                    for j, b in self.row_entries(k):
+                        acc[j] += a * b
+            rows.append(acc)
+        return Matrix._from_entries(rows)
+
+    def __mul__(self, value):
+        """Multiply by a number, a Vector, a SparseMatrix (the result is sparse) or a Matrix (the result is dense), the
+        entries are stored as floats, so a Fraction scales them like a float would"""
+        if isinstance(value, float) or isinstance(value, int) or isinstance(value, Fraction):
+            return self._scale(value)
+        elif isinstance(value, Vector):
+            return self.matvec(value)
+        elif isinstance(value, SparseMatrix) or isinstance(value, Matrix):
+            if self.shape[1] != value.shape[0]:
+                raise ValueError("Can only multiply by a Matrix with as many rows as this matrix has columns.")
+            if isinstance(value, SparseMatrix):
+                return self._matmul_sparse(value)
+            return self._matmul_dense(value)
+        return NotImplemented
+
+    def __rmul__(self, value):
+        """Multiply a number or a Matrix by this matrix"""
+        if isinstance(value, float) or isinstance(value, int) or isinstance(value, Fraction):
+            return self._scale(value)
+        elif isinstance(value, Matrix):
+            if value.shape[1] != self.shape[0]:
+                raise ValueError("Can only multiply by a Matrix with as many columns as this matrix has rows.")
+            return self._rmatmul_dense(value)
+        return NotImplemented
+
+    def __matmul__(self, value):
+        return self.__mul__(value)
+
+    def __rmatmul__(self, value):
+        """Multiply a Matrix by this matrix, Matrix @ SparseMatrix"""
+        # Only matrices can be multiplied with @, so a number is left to fail
+        if isinstance(value, Matrix):
+            return self.__rmul__(value)
+        return NotImplemented
+
+    def _merge(self, other, sign):
+        """Add sign times another SparseMatrix, merging the sorted entries of each row"""
+        rows = []
+        for i in range(self.shape[0]):
+            row = dict(self.row_entries(i))
+            for j, b in other.row_entries(i):
+                row[j] = row.get(j, 0.0) + sign * b
+            rows.append(row)
+        return SparseMatrix._from_row_dicts(self.shape, rows)
+
+    def _add_to_dense(self, matrix, sign, dense_sign=1):
+        """Add sign times this matrix to a copy of a dense Matrix (scaled by dense_sign), only visiting the non-zero
+        entries of this matrix"""
+        rows = []
+        for row in matrix._row_entries():
+            rows.append([dense_sign * entry for entry in row])
+        for i in range(self.shape[0]):
+            row = rows[i]
+            for j, value in self.row_entries(i):
+                row[j] += sign * value
+        return Matrix._from_entries(rows)
+
+    def _check_shape(self, other):
+        """Make sure the other matrix has the same dimensions as this one"""
+        if self.shape != other.shape:
+            raise ValueError("Can only add two Matrices of equal dimensions.")
+
+    def __add__(self, other):
+        """Add a SparseMatrix (the result is sparse) or a Matrix (the result is dense)"""
+        if isinstance(other, SparseMatrix):
+            self._check_shape(other)
+            return self._merge(other, 1)
+        elif isinstance(other, Matrix):
+            self._check_shape(other)
+            return self._add_to_dense(other, 1)
+        return NotImplemented
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """Subtract a SparseMatrix (the result is sparse) or a Matrix (the result is dense)"""
+        if isinstance(other, SparseMatrix):
+            self._check_shape(other)
+            return self._merge(other, -1)
+        elif isinstance(other, Matrix):
+            self._check_shape(other)
+            return self._add_to_dense(other, 1, -1)
+        return NotImplemented
+
+    def __rsub__(self, other):
+        """Subtract this matrix from a Matrix"""
+        if isinstance(other, Matrix):
+            self._check_shape(other)
+            return self._add_to_dense(other, -1)
+        return NotImplemented
+
+    def __str__(self):
+        """Get a string representation of this matrix, with the zeros filled in"""
+        return str(self.to_dense())
@@ -1,17 +1,28 @@
 import math
+import weakref
+from fractions import Fraction
 
-import Matrix
+import Backend
+import Dtypes
+import Kernels
 
 
 class Vector(object):
     """A Vector class to be used in rows of the Matrix, or just as a General Vector class"""
 
-    # The entries in the Vector
-    entries = []
+    # Each Vector stores its entries (a list, or a view of a Matrix buffer), the type every entry is stored as (int,
+    # Fraction or float), a count of the modifications to the entries, so cached results computed from them can
+    # tell when they are stale, and the matrices with views reading through to the entries (weak references by id,
+    # None when there are none), which are told before the entries change. Slots keep millions of small Vectors from
+    # each carrying a __dict__
+    __slots__ = ("entries", "dtype", "_version", "_watchers")
 
-    def __init__(self, values: list):
+    def __init__(self, values: list, dtype=float):
 
-        """Create a new Vector taking in an arbitrary amount of numerical entries as the values in the vector"""
+        """Create a new Vector taking in an arbitrary amount of numerical entries as the values in the vector, which
+        are stored as dtype (int, Fraction or float)"""
+        self._version = 0
+        self._watchers = None
         # Convert the given tuple to a list:
         values = list(values)
 
@@ -23,12 +34,26 @@ class Vector(object):
         if isinstance(values[0], Vector):
             vector = values[0]
             self.entries = vector.entries
+            self.dtype = vector.dtype
             return
 
-        # Iterate over all given values and make sure they are floats
+        # Iterate over all given values and make sure they are of the entry type
+        convert = Dtypes.converter(dtype)
         for i in range(len(values)):
-            values[i] = float(values[i])
+            values[i] = convert(values[i])
         self.entries = values
+        self.dtype = dtype
+
+    @staticmethod
+    def view(entries, dtype=float):
+        """Create a Vector that shares the given sequence of entries (such as a memoryview of a Matrix buffer) rather
+        than copying it, so writes to the Vector go to the shared entries, which must already be of type dtype"""
+        vector = Vector.__new__(Vector)
+        vector.entries = entries
+        vector.dtype = dtype
+        vector._version = 0
+        vector._watchers = None
+        return vector
 
     def __len__(self):
         """Return the number of entries in the Vector"""
@@ -47,13 +72,16 @@ class Vector(object):
         # Make sure the index is not out of range
         if not self.index_in_range(i):
             raise IndexError()
-        # Make sure the value is numerical
+        # Make sure the value is numerical, and of the entry type
         try:
-            value = float(value)
-        except ValueError:
+            value = Dtypes.converter(self.dtype)(value)
+        except (ValueError, TypeError):
             raise ValueError("Cannot assign a non numerical value to a vector")
 
+        if self._watchers is not None:
+            self._detach_watchers()
         self.entries[i] = value
+        self._version += 1
 
     def __delitem__(self, i):
         """Delete the entry at index i of the Vector"""
@@ -61,7 +89,10 @@ class Vector(object):
         if not self.index_in_range(i):
             raise IndexError()
         # Otherwise delete the value
+        if self._watchers is not None:
+            self._detach_watchers()
         del self.entries[i]
+        self._version += 1
 
     def index_in_range(self, index):
         return index < len(self) or index > 0
@@ -83,8 +114,12 @@ class Vector(object):
         s = "["
         # Iterate over all values and add them to the string
         for i in range(len(self)):
-            spaced_string = "{:" + spacing + ".2f}"
-            s += spaced_string.format(self.entries[i])
+            # Exact entries are shown in full, rather than rounded
+            if Dtypes.is_exact(self.dtype):
+                s += str(self.entries[i]).rjust(int(spacing))
+            else:
+                spaced_string = "{:" + spacing + ".2f}"
+                s += spaced_string.format(self.entries[i])
             if i < len(self.entries) - 1:
                 s += ", "
 
@@ -104,39 +139,110 @@ class Vector(object):
         # Create a new list of entries, where each entry is the sum of he
         # individual
         # entries
-        entries = []
-        for i in range(len(vector)):
-            entries.append(self[i] + vector[i])
+        dtype = Dtypes.promote(self.dtype, vector.dtype)
+        entries = Backend.for_dtype(dtype).vector_add(self.entries, vector.entries)
         # Unpack and convert the list to a vector
-        return Vector(entries)
+        return Vector(entries, dtype)
 
     def __sub__(self, vector):
         """Subtract a vector from the current vector, and return it as a new instance."""
-        return self + (vector * -1)
+        # If the other value isn't a vector it can't be subtracted
+        if not isinstance(vector, Vector):
+            return None
+
+        if len(self) != len(vector):
+            raise ValueError("Cannot subtract vectors of different lengths.")
+
+        # Subtract entry by entry, rather than adding a negated copy
+        dtype = Dtypes.promote(self.dtype, vector.dtype)
+        return Vector(Backend.for_dtype(dtype).vector_sub(self.entries, vector.entries), dtype)
+
+    def _assign(self, values, dtype):
+        """Overwrite the entries in place with the given values of type dtype, converted to the type of this Vector's
+        entries (an in-place operation can't change it)"""
+        if dtype is not self.dtype:
+            convert = Dtypes.converter(self.dtype)
+            values = [convert(value) for value in values]
+        if self._watchers is not None:
+            self._detach_watchers()
+        Kernels.write_row(self.entries, values)
+        self._version += 1
+
+    def _watch(self, matrix):
+        """Have the views of the matrix (which reads its entries from this Vector) detached before the entries change
+        """
+        if self._watchers is None:
+            self._watchers = {}
+        self._watchers[id(matrix)] = weakref.ref(matrix)
+
+    def _unwatch(self, matrix):
+        """Stop telling the matrix about changes to the entries"""
+        if self._watchers is not None:
+            self._watchers.pop(id(matrix), None)
+            if len(self._watchers) == 0:
+                self._watchers = None
+
+    def _detach_watchers(self):
+        """Give the views of every matrix reading from this Vector their own copy, before the entries are changed"""
+        for reference in list(self._watchers.values()):
+            matrix = reference()
+            if matrix is not None:
+                matrix._detach_views()
+        self._watchers = None
+
+    def __iadd__(self, vector):
+        """Add a vector to this vector in place"""
+        if not isinstance(vector, Vector):
+            return NotImplemented
+        if len(self) != len(vector):
+            raise ValueError("Cannot add vectors of different lengths.")
+        dtype = Dtypes.promote(self.dtype, vector.dtype)
+        self._assign(Backend.for_dtype(dtype).vector_add(self.entries, vector.entries), dtype)
+        return self
+
+    def __isub__(self, vector):
+        """Subtract a vector from this vector in place"""
+        if not isinstance(vector, Vector):
+            return NotImplemented
+        if len(self) != len(vector):
+            raise ValueError("Cannot subtract vectors of different lengths.")
+        dtype = Dtypes.promote(self.dtype, vector.dtype)
+        self._assign(Backend.for_dtype(dtype).vector_sub(self.entries, vector.entries), dtype)
+        return self
+
+    def __imul__(self, value):
+        """Scale this vector in place, multiplying by a vector is still the dot product"""
+        if isinstance(value, float) or isinstance(value, int) or isinstance(value, Fraction):
+            dtype = Dtypes.promote(self.dtype, Dtypes.of(value))
+            self._assign([entry * value for entry in self.entries], dtype)
+            return self
+        return NotImplemented
+
+    def add_scaled(self, vector, alpha):
+        """Add alpha times a vector to this vector in place, in one pass without a scaled temporary"""
+        if not isinstance(vector, Vector):
+            raise ValueError("Can only add a scaled Vector to a Vector")
+        if len(self) != len(vector):
+            raise ValueError("Cannot add vectors of different lengths.")
+        dtype = Dtypes.promote(self.dtype, vector.dtype, Dtypes.of(alpha))
+        self._assign(Backend.for_dtype(dtype).vector_axpy(alpha, vector.entries, self.entries), dtype)
+        return self
 
     def cross(self, vector):
+        """Find the cross product of two 3 dimensional vectors"""
         if not isinstance(vector, Vector):
             raise ValueError("Can only compute cross products between vectors")
 
-        if len(self) != 3 and len(vector) != 3:
+        if len(self) != 3 or len(vector) != 3:
             raise AssertionError("Can only compute cross products between 3*3 vectors")
 
-        width = len(self)
-        cross_matrix = Matrix.Matrix([Vector([1] * width), self, vector])
-
-        i = cross_matrix.copy()
-        i.delete_row_vector(0)
-        i.delete_column_vector(0)
-
-        j = cross_matrix.copy()
-        j.delete_row_vector(0)
-        j.delete_column_vector(1)
-
-        k = cross_matrix.copy()
-        k.delete_row_vector(0)
-        k.delete_column_vector(2)
-
-        return Vector([i.determinant(), -j.determinant(), k.determinant()])
+        # The cross product is the cofactor expansion of the matrix [[i, j, k], self, vector] along its first row.
+        # Each cofactor is the determinant of a 2*2 minor, which is written out in closed form rather than building a
+        # Matrix for it
+        a0, a1, a2 = self.entries
+        b0, b1, b2 = vector.entries
+        dtype = Dtypes.promote(self.dtype, vector.dtype)
+        return Vector([a1 * b2 - a2 * b1, a2 * b0 - a0 * b2, a0 * b1 - a1 * b0], dtype)
 
     def dot(self, vector):
         """Find the dot product of one vector with another"""
@@ -149,11 +255,7 @@ class Vector(object):
                 raise ValueError("Cannot perform a dot product on Vectors of different length.")
             # The dot product is the sum of all the individual values by each
             # other
-            dot = 0
-            for i in range(len(vector)):
-                dot += self[i] * vector[i]
-            # Return the dot
-            return dot
+            return Backend.for_dtype(Dtypes.promote(self.dtype, vector.dtype)).dot(self.entries, vector.entries)
 
     def __mul__(self, value):
         """Find the dot product of one vector with another, or scale the vector by a given value"""
@@ -165,14 +267,14 @@ class Vector(object):
         # If the provided value was numerical, we want to scale the vector by
         # the
         # given amount
-        elif isinstance(value, float) or isinstance(value, int):
+        elif isinstance(value, float) or isinstance(value, int) or isinstance(value, Fraction):
             # Scale each entry and return a new vector of the entries
             values = []
             for i in range(len(self)):
                 values.append(self[i] * value)
 
             # Convert the unpacked list to a vector
-            return Vector(values)
+            return Vector(values, Dtypes.promote(self.dtype, Dtypes.of(value)))
 
     def __lt__(self, other):
         """Check whether one vector is less than the other"""
@@ -199,7 +301,15 @@ class Vector(object):
             return False
         else:
             # Compare the list entries
-            return self.entries == other.entries
+            if isinstance(self.entries, list) and isinstance(other.entries, list):
+                return self.entries == other.entries
+            # Views of a Matrix buffer are compared entry by entry
+            if len(self) != len(other):
+                return False
+            for a, b in zip(self.entries, other.entries):
+                if a != b:
+                    return False
+            return True
 
     def __ne__(self, other):
         """Check whether two vectors are not equal, they are not equal if one of thier entries don't match"""
@@ -240,3 +350,171 @@ class Vector(object):
         """Check whether or not this vector is a zero vector"""
         # A zero vector has zero magnitude
         return self.sqr_magnitude() == 0
+
+
+def _small(cls, entries, dtype):
+    """Make a small Vector of class cls around a new list of entries of type dtype, without converting them"""
+    vector = cls.__new__(cls)
+    vector.entries = entries
+    vector.dtype = dtype
+    vector._version = 0
+    vector._watchers = None
+    return vector
+
+
+def _is_number(value):
+    return isinstance(value, float) or isinstance(value, int) or isinstance(value, Fraction)
+
+
+class Vector2(Vector):
+    """A Vector with exactly 2 entries, whose arithmetic with other Vector2s is written out entry by entry"""
+
+    __slots__ = ()
+
+    def __init__(self, values: list, dtype=float):
+        Vector.__init__(self, values, dtype)
+        if len(self.entries) != 2:
+            raise ValueError("A Vector2 must have 2 entries.")
+
+    def __add__(self, vector):
+        if isinstance(vector, Vector2):
+            a0, a1 = self.entries
+            b0, b1 = vector.entries
+            return _small(Vector2, [a0 + b0, a1 + b1], Dtypes.promote(self.dtype, vector.dtype))
+        return Vector.__add__(self, vector)
+
+    def __sub__(self, vector):
+        if isinstance(vector, Vector2):
+            a0, a1 = self.entries
+            b0, b1 = vector.entries
+            return _small(Vector2, [a0 - b0, a1 - b1], Dtypes.promote(self.dtype, vector.dtype))
+        return Vector.__sub__(self, vector)
+
+    def __mul__(self, value):
+        if _is_number(value):
+            a0, a1 = self.entries
+            return _small(Vector2, [a0 * value, a1 * value], Dtypes.promote(self.dtype, Dtypes.of(value)))
+        return Vector.__mul__(self, value)
+
+    def dot(self, vector):
+        if isinstance(vector, Vector2):
+            a0, a1 = self.entries
+            b0, b1 = vector.entries
+            return a0 * b0 + a1 * b1
+        return Vector.dot(self, vector)
+
+    def sqr_magnitude(self):
+        a0, a1 = self.entries
+        return a0 * a0 + a1 * a1
+
+    def magnitude(self):
+        a0, a1 = self.entries
+        return math.sqrt(a0 * a0 + a1 * a1)
+
+
+class Vector3(Vector):
+    """A Vector with exactly 3 entries, whose arithmetic with other Vector3s (the cross product included) is written
+    out entry by entry"""
+
+    __slots__ = ()
+
+    def __init__(self, values: list, dtype=float):
+        Vector.__init__(self, values, dtype)
+        if len(self.entries) != 3:
+            raise ValueError("A Vector3 must have 3 entries.")
+
+    def __add__(self, vector):
+        if isinstance(vector, Vector3):
+            a0, a1, a2 = self.entries
+            b0, b1, b2 = vector.entries
+            return _small(Vector3, [a0 + b0, a1 + b1, a2 + b2], Dtypes.promote(self.dtype, vector.dtype))
+        return Vector.__add__(self, vector)
+
+    def __sub__(self, vector):
+        if isinstance(vector, Vector3):
+            a0, a1, a2 = self.entries
+            b0, b1, b2 = vector.entries
+            return _small(Vector3, [a0 - b0, a1 - b1, a2 - b2], Dtypes.promote(self.dtype, vector.dtype))
+        return Vector.__sub__(self, vector)
+
+    def __mul__(self, value):
+        if _is_number(value):
+            a0, a1, a2 = self.entries
+            return _small(Vector3, [a0 * value, a1 * value, a2 * value], Dtypes.promote(self.dtype, Dtypes.of(value)))
+        return Vector.__mul__(self, value)
+
+    def dot(self, vector):
+        if isinstance(vector, Vector3):
+            a0, a1, a2 = self.entries
+            b0, b1, b2 = vector.entries
+            return a0 * b0 + a1 * b1 + a2 * b2
+        return Vector.dot(self, vector)
+
+    def cross(self, vector):
+        if isinstance(vector, Vector3):
+            a0, a1, a2 = self.entries
+            b0, b1, b2 = vector.entries
+            return _small(Vector3, [a1 * b2 - a2 * b1, a2 * b0 - a0 * b2, a0 * b1 - a1 * b0],
+                          Dtypes.promote(self.dtype, vector.dtype))
+        return Vector.cross(self, vector)
+
+    def sqr_magnitude(self):
+        a0, a1, a2 = self.entries
+        return a0 * a0 + a1 * a1 + a2 * a2
+
+    def magnitude(self):
+        a0, a1, a2 = self.entries
+        return math.sqrt(a0 * a0 + a1 * a1 + a2 * a2)
+
+
+class Vector4(Vector):
+    """A Vector with exactly 4 entries (such as homogeneous coordinates), whose arithmetic with other Vector4s is
+    written out entry by entry"""
+
+    __slots__ = ()
+
+    def __init__(self, values: list, dtype=float):
+        Vector.__init__(self, values, dtype)
+        if len(self.entries) != 4:
+            raise ValueError("A Vector4 must have 4 entries.")
+
+    def __add__(self, vector):
+        if isinstance(vector, Vector4):
+            a0, a1, a2, a3 = self.entries
+            b0, b1, b2, b3 = vector.entries
+            return _small(Vector4, [a0 + b0, a1 + b1, a2 + b2, a3 + b3], Dtypes.promote(self.dtype, vector.dtype))
+        return Vector.__add__(self, vector)
+
+    def __sub__(self, vector):
+        if isinstance(vector, Vector4):
+            a0, a1, a2, a3 = self.entries
+            b0, b1, b2, b3 = vector.entries
+            return _small(Vector4, [a0 - b0, a1 - b1, a2 - b2, a3 - b3], Dtypes.promote(self.dtype, vector.dtype))
+        return Vector.__sub__(self, vector)
+
+    def __mul__(self, value):
+        if _is_number(value):
+            a0, a1, a2, a3 = self.entries
+            return _small(Vector4, [a0 * value, a1 * value, a2 * value, a3 * value],
+                          Dtypes.promote(self.dtype, Dtypes.of(value)))
+        return Vector.__mul__(self, value)
+
+    def dot(self, vector):
+        if isinstance(vector, Vector4):
+            a0, a1, a2, a3 = self.entries
+            b0, b1, b2, b3 = vector.entries
+            return a0 * b0 + a1 * b1 + a2 * b2 + a3 * b3
+        return Vector.dot(self, vector)
+
+    def sqr_magnitude(self):
+        a0, a1, a2, a3 = self.entries
+        return a0 * a0 + a1 * a1 + a2 * a2 + a3 * a3
+
+    def magnitude(self):
+        a0, a1, a2, a3 = self.entries
+        return math.sqrt(a0 * a0 + a1 * a1 + a2 * a2 + a3 * a3)
+
+
+def axpy(a, x, y):
+    """Compute y = a * x + y in place (the BLAS axpy), where x and y are both Vectors or both Matrices, and return y"""
+    return y.add_scaled(x, a)
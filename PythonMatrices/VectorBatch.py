@@ -0,0 +1,139 @@
+import math
+from array import array
+
+from Vector import Vector as Vector
+
+
+class VectorBatch(object):
+    """Many Vectors of the same length stored one after another in a single buffer of doubles, so one call applies an
+    operation to all of them without making a Vector object (or coercing entries with float()) for each one"""
+
+    def __init__(self, vectors: list):
+        """Create a batch by copying a list of Vectors (or lists of numbers) of equal length into one buffer"""
+        self.count = len(vectors)
+        self.size = len(vectors[0]) if self.count > 0 else 0
+        self.buffer = array("d")
+        for vector in vectors:
+            if len(vector) != self.size:
+                raise ValueError("Every Vector in a batch must have the same amount of entries.")
+            # A Vector is copied straight from its entries
+            self.buffer.extend(getattr(vector, "entries", vector))
+
+    @staticmethod
+    def from_buffer(buffer, count: int, size: int):
+        """Create a batch of count Vectors of size entries using a buffer of doubles (an array('d'), a memoryview...)
+        without copying it"""
+        view = memoryview(buffer)
+        # Reinterpret raw bytes as doubles
+        if view.format != "d":
+            view = view.cast("B").cast("d")
+        if len(view) != count * size:
+            raise ValueError("The buffer must hold exactly " + str(count * size) + " entries.")
+        batch = VectorBatch.__new__(VectorBatch)
+        batch.count = count
+        batch.size = size
+        batch.buffer = view
+        return batch
+
+    @staticmethod
+    def zeros(count: int, size: int):
+        """Create a batch of count Vectors of size entries, all zero"""
+        return VectorBatch.from_buffer(array("d", bytes(8 * count * size)), count, size)
+
+    @staticmethod
+    def _from_components(components: list, count: int):
+        """Create a batch from one list per position in the Vectors, holding that entry of every Vector"""
+        size = len(components)
+        batch = VectorBatch.zeros(count, size)
+        view = memoryview(batch.buffer)
+        for p in range(size):
+            view[p::size] = array("d", components[p])
+        return batch
+
+    def components(self):
+        """Get one list per position in the Vectors, holding that entry of every Vector in the batch
+
+        Working on whole components at a time is what makes the batched operations fast, each one is a single pass
+        over the batch rather than a pass per Vector."""
+        view = memoryview(self.buffer)
+        return [view[p::self.size].tolist() for p in range(self.size)]
+
+    def _check_shape(self, other):
+        """Make sure the other batch holds as many Vectors of the same length"""
+        if self.count != other.count or self.size != other.size:
+            raise ValueError("Can only combine batches of the same amount of Vectors of equal length.")
+
+    def __len__(self):
+        """Return the amount of Vectors in the batch"""
+        return self.count
+
+    def __getitem__(self, k):
+        """Get Vector k of the batch, which is a view so writes to it go to the batch"""
+        if k < 0:
+            k += self.count
+        if k < 0 or k >= self.count:
+            raise IndexError()
+        return Vector.view(memoryview(self.buffer)[k * self.size:(k + 1) * self.size])
+
+    def __iter__(self):
+        for k in range(self.count):
+            yield self[k]
+
+    def to_vectors(self):
+        """Copy the batch out into a list of Vectors"""
+        view = memoryview(self.buffer)
+        return [Vector.view(view[k * self.size:(k + 1) * self.size].tolist()) for k in range(self.count)]
+
+    def __add__(self, other):
+        """Add two batches Vector by Vector"""
+        if not isinstance(other, VectorBatch):
+            return NotImplemented
+        self._check_shape(other)
+        return VectorBatch.from_buffer(array("d", [x + y for x, y in zip(self.buffer, other.buffer)]),
+                                       self.count, self.size)
+
+    def __sub__(self, other):
+        """Subtract two batches Vector by Vector"""
+        if not isinstance(other, VectorBatch):
+            return NotImplemented
+        self._check_shape(other)
+        return VectorBatch.from_buffer(array("d", [x - y for x, y in zip(self.buffer, other.buffer)]),
+                                       self.count, self.size)
+
+    def __mul__(self, value):
+        """Scale every Vector by a number"""
+        if isinstance(value, float) or isinstance(value, int):
+            return VectorBatch.from_buffer(array("d", [x * value for x in self.buffer]), self.count, self.size)
+        return NotImplemented
+
+    def __rmul__(self, value):
+        return self.__mul__(value)
+
+    def dot(self, other):
+        """Get the dot product of each pair of Vectors in the two batches, as a list"""
+        self._check_shape(other)
+        if self.size == 0:
+            return [0.0] * self.count
+        a = self.components()
+        b = other.components()
+        totals = [x * y for x, y in zip(a[0], b[0])]
+        for p in range(1, self.size):
+            totals = [t + x * y for t, x, y in zip(totals, a[p], b[p])]
+        return totals
+
+    def cross(self, other):
+        """Get the cross product of each pair of 3 dimensional Vectors in the two batches"""
+        self._check_shape(other)
+        if self.size != 3:
+            raise ValueError("Can only get the cross product of 3 dimensional Vectors.")
+        ax, ay, az = self.components()
+        bx, by, bz = other.components()
+        return VectorBatch._from_components([
+            [y1 * z2 - z1 * y2 for y1, z1, y2, z2 in zip(ay, az, by, bz)],
+            [z1 * x2 - x1 * z2 for x1, z1, x2, z2 in zip(ax, az, bx, bz)],
+            [x1 * y2 - y1 * x2 for x1, y1, x2, y2 in zip(ax, ay, bx, by)],
+        ], self.count)
+
+    def magnitude(self):
+        """Get the length of each Vector in the batch, as a list"""
+        return [math.sqrt(total) for total in self.dot(self)]
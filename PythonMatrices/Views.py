@@ -0,0 +1,136 @@
+class Skip(object):
+    """A sequence of indices with the one at position skipped left out, which doesn't copy the other indices"""
+
+    __slots__ = ("indices", "skipped")
+
+    def __init__(self, indices, skipped):
+        if skipped < 0:
+            skipped += len(indices)
+        if skipped < 0 or skipped >= len(indices):
+            raise IndexError()
+        self.indices = indices
+        self.skipped = skipped
+
+    def __len__(self):
+        return len(self.indices) - 1
+
+    def __getitem__(self, k):
+        # Slicing copies out the selected indices
+        if isinstance(k, slice):
+            return [self[x] for x in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if k < 0 or k >= len(self):
+            raise IndexError()
+        return self.indices[k + 1 if k >= self.skipped else k]
+
+    def __iter__(self):
+        for k, index in enumerate(self.indices):
+            if k != self.skipped:
+                yield index
+
+
+class Omit(object):
+    """Selects every index except the one at position, to pick out the rows or columns of a minor"""
+
+    __slots__ = ("position",)
+
+    def __init__(self, position):
+        self.position = position
+
+
+def select(indices, selection):
+    """Pick out the indices chosen by selection, which is a slice or an Omit, ranges stay ranges"""
+    if isinstance(selection, Omit):
+        return Skip(indices, selection.position)
+    return indices[selection]
+
+
+class EntriesView(object):
+    """A sequence of entries that reads through to the rows of a Matrix without copying them
+
+    It is copy-on-write: the first time it is written to (or deleted from), it copies the entries it shows into a
+    list of its own and makes the change there, so the Matrix it was taken from is never modified."""
+
+    __slots__ = ("rows", "fixed", "indices", "entries", "__weakref__")
+
+    def __init__(self, rows, fixed, indices):
+        """rows is the list of row Vectors read from, fixed is the row or column the entries lie along and indices
+        are the positions along it"""
+        self.rows = rows
+        self.fixed = fixed
+        self.indices = indices
+        # The entries copied out on the first write, which are used from then on
+        self.entries = None
+
+    def _read(self, k):
+        """Read the entry at position k (which must be in range) out of the rows"""
+        raise NotImplementedError()
+
+    def _detach(self):
+        """Copy the entries out so they can be written to"""
+        if self.entries is None:
+            self.entries = [self._read(k) for k in range(len(self.indices))]
+        return self.entries
+
+    def __len__(self):
+        if self.entries is not None:
+            return len(self.entries)
+        return len(self.indices)
+
+    def __getitem__(self, k):
+        if self.entries is not None:
+            return self.entries[k]
+        if isinstance(k, slice):
+            return [self._read(x) for x in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if k < 0 or k >= len(self):
+            raise IndexError()
+        return self._read(k)
+
+    def __setitem__(self, k, value):
+        self._detach()[k] = value
+
+    def __delitem__(self, k):
+        del self._detach()[k]
+
+    def __iter__(self):
+        if self.entries is not None:
+            return iter(self.entries)
+        return (self._read(k) for k in range(len(self.indices)))
+
+    def is_detached(self):
+        """Check whether the entries have been copied out by a write"""
+        return self.entries is not None
+
+
+class RowEntries(EntriesView):
+    """The entries of row fixed of a Matrix, at the column positions in indices"""
+
+    __slots__ = ()
+
+    def _read(self, k):
+        return self.rows[self.fixed].entries[self.indices[k]]
+
+    def __iter__(self):
+        if self.entries is not None:
+            return iter(self.entries)
+        line = self.rows[self.fixed].entries
+        return (line[j] for j in self.indices)
+
+
+class ColumnEntries(EntriesView):
+    """The entries of column fixed of a Matrix, at the row positions in indices"""
+
+    __slots__ = ()
+
+    def _read(self, k):
+        return self.rows[self.indices[k]].entries[self.fixed]
+
+    def __iter__(self):
+        if self.entries is not None:
+            return iter(self.entries)
+        rows = self.rows
+        j = self.fixed
+        return (rows[i].entries[j] for i in self.indices)
@@ -0,0 +1,94 @@
+"""Measure how long an event loop is stalled by an expensive Matrix operation, called directly in a coroutine against
+awaiting its async variant. Run it from the PythonMatrices directory:
+
+    python benchmarks/event_loop_latency.py --sizes 100 200 300
+
+A ticker coroutine asks to be woken every --interval seconds while the operation runs. The table shows the time the
+operation took and the longest and mean delays past the interval the ticker saw, which is how long every other
+coroutine in the process would have had to wait. A direct call stalls the loop for the whole operation, the async
+variants only for the gaps between the block boundaries where the work checks in. The cost of the checks and the
+hand-off to the executor is the difference in seconds.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Matrix import Matrix  # noqa: E402
+
+
+def make_cases(n):
+    """The operations that are measured at size n, by name, each as the direct call and the coroutine function"""
+    a = Matrix([[random.uniform(-1, 1) + (n if i == j else 0) for j in range(n)] for i in range(n)])
+    b = Matrix([[random.uniform(-1, 1) for _ in range(n)] for _ in range(n)])
+    # A copy each time, so neither call is given the LU decomposition the other cached
+    return {
+        "determinant": (lambda: a.copy().determinant(), lambda: a.copy().adeterminant()),
+        "inverse": (lambda: a.copy().inverse(), lambda: a.copy().ainverse()),
+        "matmul": (lambda: a.multiply(b), lambda: a.amatmul(b)),
+        "matrix_power/8": (lambda: a.matrix_power(8), lambda: a.amatrix_power(8)),
+    }
+
+
+async def ticker(interval, delays):
+    """Sleep for interval seconds over and over, recording how late each wake up is"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        delays.append(time.perf_counter() - start - interval)
+
+
+async def stalls(work, interval, awaited):
+    """Run work next to a ticker, awaiting what it returns if awaited is set, and return the seconds it took and the
+    longest and mean delays of the ticker"""
+    delays = []
+    task = asyncio.create_task(ticker(interval, delays))
+    # Let the ticker start sleeping before the work begins
+    await asyncio.sleep(interval)
+    del delays[:]
+    start = time.perf_counter()
+    result = work()
+    if awaited:
+        await result
+    seconds = time.perf_counter() - start
+    # The ticker only notices a stall once it gets to run again
+    await asyncio.sleep(interval)
+    task.cancel()
+    return seconds, max(delays + [0.0]), sum(delays) / max(len(delays), 1)
+
+
+async def measure(sizes, interval):
+    """Measure every case at every size both ways, returning rows for the table"""
+    results = []
+    for n in sizes:
+        for name, (direct, deferred) in sorted(make_cases(n).items()):
+            blocking = await stalls(direct, interval, False)
+            awaited = await stalls(deferred, interval, True)
+            results.append([name, n] + list(blocking) + list(awaited))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 300])
+    parser.add_argument("--interval", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    print("{:<16} {:>4} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+        "case", "n", "seconds", "", "max stall", "", "mean stall", ""))
+    print("{:<16} {:>4} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+        "", "", "direct", "async", "direct", "async", "direct", "async"))
+    for name, n, seconds, longest, mean, async_seconds, async_longest, async_mean in asyncio.run(
+            measure(args.sizes, args.interval)):
+        print("{:<16} {:>4} {:>9.4f} {:>9.4f} {:>9.4f} {:>9.4f} {:>9.4f} {:>9.4f}".format(
+            name, n, seconds, async_seconds, longest, async_longest, mean, async_mean))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Benchmark the Matrix and Vector hot paths over a sweep of sizes and kinds of input, and check for regressions
+against a stored baseline. Run it from the PythonMatrices directory:
+
+    python benchmarks/hot_paths.py --save benchmarks/baseline.json
+    python benchmarks/hot_paths.py --compare benchmarks/baseline.json
+
+Every case records the best of --repeat timings per call, with the noise of those timings (how much slower the
+median was than the best), and from tracemalloc the peak memory traced during one call (which grows with the
+temporaries it churns through) and the amount of memory blocks that call leaves allocated (its result and anything
+it caches), since allocation is where most of the time goes. With --compare, any case that is slower or allocates
+more than the baseline by more than --tolerance (a fraction) is reported, and the exit status is 1, so it can fail a
+check. A case is only slower when its best time is beyond the tolerance and the noise measured in either run, and
+it still is when timed again (up to --retries times), so a noisy small case isn't reported. benchmarks/baseline.json
+is the baseline the repository was last checked against. It is only meaningful on the machine (and Python version)
+it was recorded on, so record a new one with --save before comparing anywhere else.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Backend  # noqa: E402
+from Matrix import Matrix  # noqa: E402
+from Vector import Vector  # noqa: E402
+
+# The operations that are benchmarked, and the largest size each is run at by default, since the slower ones would
+# take minutes at the top of the sweep
+OPERATIONS = {
+    "matmul": 256,
+    "determinant": 256,
+    "inverse": 128,
+    "pow": 128,
+    "dot": 512,
+}
+KINDS = ["dense", "sparse", "identity"]
+# Differences smaller than these are measurement noise (tracemalloc's own bookkeeping, the timer's resolution), and
+# are never reported as regressions
+SLACK = {"seconds": 1e-6, "peak_bytes": 4096, "blocks": 16}
+# The fraction of the time a case can be slower by as noise even when its repeats agree with each other, since
+# calls lasting microseconds shift by this much between runs with nothing changed
+NOISE = 0.10
+SIZES = [4, 8, 16, 32, 64, 128, 256, 512]
+
+
+def make_rows(kind, n):
+    """The rows of an n*n matrix of the given kind"""
+    if kind == "identity":
+        return [[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)]
+    rows = [[random.uniform(-1, 1) for _ in range(n)] for _ in range(n)]
+    if kind == "sparse":
+        # Keep about 5% of the entries, and the diagonal so the matrix stays invertible
+        for i in range(n):
+            for j in range(n):
+                if i != j and random.random() > 0.05:
+                    rows[i][j] = 0.0
+            rows[i][i] += n
+    else:
+        # Make the diagonal dominant so the matrix is well conditioned
+        for i in range(n):
+            rows[i][i] += n
+    return rows
+
+
+def make_case(operation, kind, n, seed=0):
+    """A function running one call of the operation on fresh inputs of the given kind and size
+
+    The inputs only depend on the seed and the case, so a case is timed on the same entries whichever other cases
+    are run, and when it is timed again."""
+    random.seed("{}/{}/{}/{}".format(seed, operation, kind, n))
+    a = Matrix(make_rows(kind, n))
+    if operation == "matmul":
+        b = Matrix(make_rows(kind, n))
+        return lambda: a * b
+    if operation == "determinant":
+        # Each call gets a copy, so the cached LU decomposition isn't reused between calls
+        return lambda: a.copy().determinant()
+    if operation == "inverse":
+        return lambda: a.copy().inverse()
+    if operation == "pow":
+        # Scale the entries down so the powers stay finite
+        scaled = a * (1.0 / n)
+        return lambda: scaled ** 5
+    if operation == "dot":
+        x = Vector(make_rows(kind, n)[0])
+        y = Vector(make_rows(kind, n)[-1])
+        return lambda: x * y
+    raise ValueError("Unknown operation: " + operation)
+
+
+def time_call(function, repeat):
+    """The best time per call in seconds out of repeat timings, and the noise of the timings: the fraction by which
+    their median is slower than the best"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    timings = sorted(timer.repeat(repeat=repeat, number=number))
+    best = timings[0] / number
+    median = timings[len(timings) // 2] / number
+    return best, (median - best) / best if best > 0 else 0.0
+
+
+def measure(function, repeat):
+    """The best time per call in seconds and its noise, and the peak bytes traced during one call and the blocks it
+    leaves allocated"""
+    seconds, noise = time_call(function, repeat)
+
+    # Trace one call, the blocks are counted while its result is still alive
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno"))
+    del result
+    return {"seconds": seconds, "noise": noise, "peak_bytes": peak, "blocks": blocks}
+
+
+def run(operations, kinds, sizes, repeat, seed=0, verbose=True):
+    """Run every case, returning a dictionary of the results keyed by "operation/kind/size" """
+    results = {}
+    for operation in operations:
+        for kind in kinds:
+            for n in sizes:
+                if n > OPERATIONS[operation]:
+                    continue
+                key = operation + "/" + kind + "/" + str(n)
+                results[key] = measure(make_case(operation, kind, n, seed), repeat)
+                if verbose:
+                    result = results[key]
+                    print("{:<24} {:>12.6f}s {:>12} B {:>10} blocks".format(key, result["seconds"],
+                                                                            result["peak_bytes"], result["blocks"]))
+    return results
+
+
+def slower(old, new, tolerance):
+    """Check whether the time of a case went up by more than the tolerance and the noise of both measurements"""
+    threshold = max(tolerance, NOISE, old.get("noise", 0.0), new["noise"])
+    return new["seconds"] > old["seconds"] * (1 + threshold) and new["seconds"] - old["seconds"] > SLACK["seconds"]
+
+
+def compare(results, baseline, tolerance, repeat, seed=0, retries=3):
+    """Get a description of every case that regressed by more than tolerance against the baseline
+
+    A case that looks slower is timed again, up to retries times, keeping the best of every run, so a stretch where
+    the machine was busy isn't a regression."""
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        operation, kind, n = key.split("/")
+        for _ in range(retries):
+            if not slower(old, result, tolerance):
+                break
+            seconds, noise = time_call(make_case(operation, kind, int(n), seed), repeat)
+            if seconds < result["seconds"]:
+                result["seconds"], result["noise"] = seconds, noise
+        if slower(old, result, tolerance):
+            regressions.append("{}: seconds went from {} to {}".format(key, old["seconds"], result["seconds"]))
+        for metric in ("peak_bytes", "blocks"):
+            if result[metric] > old[metric] * (1 + tolerance) and result[metric] - old[metric] > SLACK[metric]:
+                regressions.append("{}: {} went from {} to {}".format(key, metric, old[metric], result[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--operations", nargs="+", choices=sorted(OPERATIONS), default=sorted(OPERATIONS))
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--max-size", type=int, help="Run every operation up to this size, instead of its default")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare the results against this baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--retries", type=int, default=3,
+                        help="How many more times a case that looks slower is timed before it is reported")
+    args = parser.parse_args()
+
+    if args.max_size is not None:
+        for operation in OPERATIONS:
+            OPERATIONS[operation] = args.max_size
+
+    results = run(args.operations, args.kinds, args.sizes, args.repeat, args.seed)
+    record = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "backend": Backend.get_backend().name,
+        "results": results,
+    }
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(record, file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.tolerance, args.repeat, args.seed, args.retries)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against " + args.compare)
+
+
+if __name__ == "__main__":
+    main()
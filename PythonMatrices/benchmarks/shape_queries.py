@@ -0,0 +1,144 @@
+"""Count the objects and memory allocated by determinant() and __add__ with the cached shape, against counting the
+columns by building the column Vectors (how row_length() used to do it). Run it from the PythonMatrices directory:
+
+    python benchmarks/shape_queries.py --sizes 4 6 8 64 256
+
+Every dimension check goes through Matrix.shape, so the old behaviour is put back for the comparison by replacing
+that property with one that builds the columns each time it is read. For each size the table shows the Vectors and
+entries views one call creates, the peak memory traced while it runs (temporaries that are freed again still count)
+and the best time per call. The Laplace expansion checks the dimensions at every level of its recursion, so it gains
+the most.
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Views  # noqa: E402
+from Matrix import Matrix  # noqa: E402
+from Vector import Vector  # noqa: E402
+
+# The Laplace expansion takes n! steps, so it is only run up to this size
+LAPLACE_LIMIT = 8
+
+
+def column_count_shape(matrix):
+    """The shape worked out the old way, by building a view of every column to count them"""
+    rows = matrix.rows
+    width = len(rows[0]) if len(rows) > 0 else 0
+    return len(rows), len([matrix.column_view(j) for j in range(width)])
+
+
+def make_cases(n):
+    """The operations that are measured at size n, by name"""
+    a = Matrix([[random.uniform(-1, 1) + (n if i == j else 0) for j in range(n)] for i in range(n)])
+    b = Matrix([[random.uniform(-1, 1) for _ in range(n)] for _ in range(n)])
+    cases = {
+        "add": lambda: a + b,
+        # A copy each time, so the cached LU decomposition isn't reused between calls
+        "determinant/lu": lambda: a.copy().determinant(),
+    }
+    if n <= LAPLACE_LIMIT:
+        cases["determinant/laplace"] = lambda: a.determinant("laplace")
+    return cases
+
+
+class ObjectCounter(object):
+    """Counts the Vectors and entries views created while it is active, by wrapping their constructors"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        self._vector_init = Vector.__init__
+        self._vector_view = Vector.__dict__["view"]
+        self._entries_init = Views.EntriesView.__init__
+        counter = self
+
+        def vector_init(vector, *args, **kwargs):
+            counter.count += 1
+            counter._vector_init(vector, *args, **kwargs)
+
+        def vector_view(*args, **kwargs):
+            counter.count += 1
+            return counter._vector_view.__func__(*args, **kwargs)
+
+        def entries_init(view, *args, **kwargs):
+            counter.count += 1
+            counter._entries_init(view, *args, **kwargs)
+
+        Vector.__init__ = vector_init
+        Vector.view = staticmethod(vector_view)
+        Views.EntriesView.__init__ = entries_init
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        Vector.__init__ = self._vector_init
+        Vector.view = self._vector_view
+        Views.EntriesView.__init__ = self._entries_init
+        return False
+
+
+def allocations(function):
+    """The amount of Vectors and entries views created by one call of function, and the peak bytes traced while it
+    runs, which counts the temporaries it frees again as well as its result"""
+    with ObjectCounter() as counter:
+        function()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return counter.count, peak
+
+
+def best_time(function, repeat):
+    """The best time per call of function, in seconds"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def measure(sizes, repeat):
+    """Measure every case at every size with the cached shape and with the old way, returning rows for the table"""
+    cached = Matrix.shape
+    results = []
+    for n in sizes:
+        for name, function in sorted(make_cases(n).items()):
+            row = [name, n]
+            for shape in (property(column_count_shape), cached):
+                Matrix.shape = shape
+                try:
+                    row += list(allocations(function)) + [best_time(function, repeat)]
+                finally:
+                    Matrix.shape = cached
+            results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 6, 8, 64, 256])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    print("{:<20} {:>4} {:>9} {:>9} {:>11} {:>11} {:>11} {:>11}".format(
+        "case", "n", "objects", "", "peak bytes", "", "seconds", ""))
+    print("{:<20} {:>4} {:>9} {:>9} {:>11} {:>11} {:>11} {:>11}".format(
+        "", "", "before", "after", "before", "after", "before", "after"))
+    for name, n, old_objects, old_peak, old_seconds, new_objects, new_peak, new_seconds in measure(args.sizes,
+                                                                                                  args.repeat):
+        print("{:<20} {:>4} {:>9} {:>9} {:>11} {:>11} {:>11.6f} {:>11.6f}".format(
+            name, n, old_objects, new_objects, old_peak, new_peak, old_seconds, new_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Time Strassen's method against the classic kernel over a range of sizes and crossovers, to find where the
+recursion starts to pay off. Run it from the PythonMatrices directory:
+
+    python benchmarks/strassen_crossover.py --sizes 64 128 192 256 384 --crossovers 16 32 64 128
+
+Each cell is the best of --repeat runs, in seconds. The "classic" column is the plain i-k-j kernel. The crossover
+with the lowest times over the sizes you care about is the one to set as Kernels.STRASSEN_CROSSOVER. One level of
+Strassen replaces 8 half-size products by 7, so it saves at most an eighth of the multiplications, and the extra
+additions take some of that back. One run on a Linux box with CPython 3.11 (--repeat 7) gave:
+
+         n    classic       c=64       c=96      c=128
+        96     0.0354     0.0385     0.0370     0.0317
+       128     0.1036     0.0866     0.0706     0.0748
+       192     0.3132     0.2422     0.2749     0.2579
+       256     0.6742     0.6388     0.6526     0.5788
+       384     2.4843     1.6836     1.6574     1.6659
+
+so one level (n = 192 with the default crossover of 96) is only about 1.1 times faster than the classic kernel, and
+it takes two levels (n = 384) to gain about 1.5 times. The times vary by 10 to 20% from run to run, and crossovers of
+64 to 128 can't be told apart within that.
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Kernels  # noqa: E402
+
+
+def random_rows(n):
+    """A square matrix of random entries, as a list of rows"""
+    return [[random.random() for _ in range(n)] for _ in range(n)]
+
+
+def best_time(function, repeat):
+    """The fastest of repeat runs of function, in seconds"""
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 96, 128, 192, 256, 384])
+    parser.add_argument("--crossovers", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    header = "{:>6} {:>10}".format("n", "classic")
+    for crossover in args.crossovers:
+        header += " {:>10}".format("c=" + str(crossover))
+    print(header)
+
+    for n in args.sizes:
+        a = random_rows(n)
+        b = random_rows(n)
+        line = "{:>6} {:>10.4f}".format(n, best_time(lambda: Kernels.matmul_rows(a, b), args.repeat))
+        for crossover in args.crossovers:
+            line += " {:>10.4f}".format(best_time(lambda: Kernels.strassen_rows(a, b, crossover), args.repeat))
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Check that every determinant method agrees, run from the PythonMatrices directory with:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+from fractions import Fraction
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Matrix import Matrix  # noqa: E402
+
+
+class DeterminantTest(unittest.TestCase):
+
+    def assert_methods_agree(self, matrix, expected):
+        """Check the determinant of the matrix by every method against the expected value"""
+        for method in ("lu", "laplace", "exact"):
+            self.assertAlmostEqual(matrix.determinant(method), expected, msg=method)
+
+    def test_one_by_one(self):
+        self.assert_methods_agree(Matrix([[[3.0]]]), 3.0)
+
+    def test_two_by_two(self):
+        self.assert_methods_agree(Matrix([[1.0, 2.0], [3.0, 4.0]]), -2.0)
+
+    def test_three_by_three(self):
+        self.assert_methods_agree(Matrix([[2.0, -1.0, 0.0], [-1.0, 2.0, -1.0], [0.0, -1.0, 2.0]]), 4.0)
+
+    def test_four_by_four(self):
+        matrix = Matrix([[4.0, 3.0, 2.0, 1.0], [0.0, 1.0, -1.0, 2.0], [1.0, 0.0, 3.0, 0.0], [2.0, 1.0, 0.0, 5.0]])
+        self.assert_methods_agree(matrix, matrix.determinant("lu"))
+
+    def test_exact_entries_stay_exact(self):
+        matrix = Matrix([[Fraction(1, 2), Fraction(1, 3)], [Fraction(1, 4), Fraction(1, 5)]], dtype=Fraction)
+        for method in ("lu", "laplace", "exact"):
+            self.assertEqual(matrix.determinant(method), Fraction(1, 60))
+        matrix = Matrix([[2, 0, 1], [1, 3, 0], [0, 1, 4]], dtype=int)
+        for method in ("lu", "laplace", "exact"):
+            self.assertEqual(matrix.determinant(method), 25)
+
+
+class CofactorTest(unittest.TestCase):
+
+    def test_exact_cofactors_match_lu(self):
+        matrix = Matrix([[2, -1, 0, 3], [1, 4, 2, 0], [0, 5, -3, 1], [2, 0, 1, 1]], dtype=int)
+        self.assertEqual(matrix.cofactor_matrix(method="exact").rows, matrix.cofactor_matrix().rows)
+
+    def test_cofactors_expand_to_the_determinant(self):
+        matrix = Matrix([[Fraction(i * j + 1, i + 2) for j in range(5)] for i in range(5)], dtype=Fraction)
+        determinant = matrix.determinant("exact")
+        cofactors = matrix.cofactor_matrix(method="exact")
+        for i in range(5):
+            self.assertEqual(sum(matrix[i][j] * cofactors[i][j] for j in range(5)), determinant)
+
+    def test_one_by_one(self):
+        self.assertEqual(Matrix([[[3.0]]]).cofactor_matrix(method="exact")[0][0], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
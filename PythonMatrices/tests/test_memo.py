@@ -0,0 +1,120 @@
+"""Check what a Memo remembers and which calls go through it, run from the PythonMatrices directory with:
+
+    python -m unittest discover tests
+"""
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Async  # noqa: E402
+import Memo  # noqa: E402
+from FrozenMatrix import FrozenMatrix  # noqa: E402
+from Matrix import Matrix  # noqa: E402
+
+
+def make_matrix():
+    return Matrix([[2.0, 1.0, 0.0], [1.0, 3.0, 0.0], [0.0, 0.0, 1.0]])
+
+
+class MemoTest(unittest.TestCase):
+
+    def test_repeated_calls_hit(self):
+        matrix = make_matrix()
+        memo = Memo.Memo()
+        with memo:
+            first = matrix.determinant()
+            misses = memo.stats()["misses"]
+            self.assertEqual(matrix.determinant(), first)
+        self.assertEqual(memo.stats()["misses"], misses)
+        self.assertEqual(memo.stats()["hits"], 1)
+
+    def test_changing_the_matrix_misses(self):
+        matrix = make_matrix()
+        with Memo.Memo():
+            before = matrix.determinant()
+            matrix[2][2] = 2.0
+            self.assertAlmostEqual(matrix.determinant(), 2 * before)
+
+    def test_results_can_be_modified(self):
+        matrix = make_matrix()
+        with Memo.Memo():
+            inverse = matrix.inverse()
+            inverse[0][0] = 100.0
+            self.assertNotEqual(matrix.inverse()[0][0], 100.0)
+
+    def test_frozen_keys_keep_the_dtype(self):
+        memo = Memo.Memo()
+        ints = FrozenMatrix(Matrix([[2, 1], [1, 3]], dtype=int))
+        floats = FrozenMatrix(Matrix([[2.0, 1.0], [1.0, 3.0]]))
+        memo.determinant(ints)
+        self.assertIs(type(memo.determinant(floats)), float)
+        self.assertIs(type(memo.determinant(ints)), int)
+
+    def test_other_threads_are_not_memoized(self):
+        matrix = make_matrix()
+        memo = Memo.Memo()
+        with memo:
+            thread = threading.Thread(target=matrix.determinant)
+            thread.start()
+            thread.join()
+        self.assertEqual(memo.stats()["misses"], 0)
+
+    def test_overlapping_tasks(self):
+        # The first task exits while the second is still inside its Memo, which mustn't leave either active
+        matrix = make_matrix()
+        first, second = Memo.Memo(), Memo.Memo()
+
+        async def use(memo, entered, go):
+            with memo:
+                entered.set()
+                await go.wait()
+                matrix.determinant()
+
+        async def main():
+            events = [asyncio.Event() for _ in range(4)]
+            task_a = asyncio.create_task(use(first, events[0], events[1]))
+            await events[0].wait()
+            task_b = asyncio.create_task(use(second, events[2], events[3]))
+            await events[2].wait()
+            events[1].set()
+            await task_a
+            events[3].set()
+            await task_b
+
+        asyncio.run(main())
+        self.assertEqual(first.stats()["misses"], second.stats()["misses"])
+        before = first.stats()
+        matrix.determinant()
+        self.assertEqual(first.stats(), before)
+        self.assertEqual(Memo._active.get(), ())
+
+    def test_awaited_calls_use_the_memo(self):
+        matrix = make_matrix()
+        memo = Memo.Memo()
+
+        async def main():
+            with memo:
+                await Async.determinant(matrix)
+                await Async.determinant(matrix)
+
+        asyncio.run(main())
+        self.assertEqual(memo.stats()["hits"], 1)
+
+    def test_exits_out_of_order_are_refused(self):
+        outer, inner = Memo.Memo(), Memo.Memo()
+        outer.__enter__()
+        inner.__enter__()
+        try:
+            with self.assertRaises(RuntimeError):
+                outer.__exit__(None, None, None)
+        finally:
+            inner.__exit__(None, None, None)
+            outer.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
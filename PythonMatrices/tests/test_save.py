@@ -0,0 +1,66 @@
+"""Check that matrices come back from a file as they were saved, run from the PythonMatrices directory with:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from fractions import Fraction
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Matrix import Matrix  # noqa: E402
+
+
+def entries(matrix):
+    """The entries of the matrix as a list of lists"""
+    return [list(row.entries) for row in matrix.rows]
+
+
+class SaveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "matrix.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        matrix = Matrix([[1.5, -2.0, 1e-300], [0.1, 3.0, 1e300]])
+        matrix.save(self.path)
+        for mmap_mode in (None, "r", "c"):
+            loaded = Matrix.load(self.path, mmap_mode)
+            self.assertEqual(loaded.shape, (2, 3))
+            self.assertEqual(entries(loaded), entries(matrix))
+
+    def test_compact_round_trip(self):
+        matrix = Matrix([[1.0, 2.0], [3.0, 4.0]]).to_compact()
+        matrix.save(self.path)
+        self.assertEqual(entries(Matrix.load(self.path)), entries(matrix))
+        self.assertEqual(entries(Matrix.load_rows(self.path, 1, 2)), [[3.0, 4.0]])
+
+    def test_exact_entries_are_refused(self):
+        for matrix in (Matrix([[1, 2], [3, 4]], dtype=int),
+                       Matrix([[Fraction(1, 3), 1], [2, 3]], dtype=Fraction)):
+            with self.assertRaises(ValueError):
+                matrix.save(self.path)
+            self.assertFalse(os.path.exists(self.path))
+
+    def test_astype_leaves_the_source_alone(self):
+        matrix = Matrix([[Fraction(1, 3), 1], [2, 3]], dtype=Fraction)
+        rows = matrix.rows
+        converted = matrix.astype(float)
+        self.assertIs(matrix.dtype, Fraction)
+        self.assertIs(matrix.rows, rows)
+        self.assertEqual(matrix[0][0], Fraction(1, 3))
+        self.assertIs(converted.dtype, float)
+        converted[0][0] = 5.0
+        self.assertEqual(matrix[0][0], Fraction(1, 3))
+        converted.save(self.path)
+        self.assertEqual(entries(Matrix.load(self.path)), [[5.0, 1.0], [2.0, 3.0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
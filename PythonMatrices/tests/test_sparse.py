@@ -0,0 +1,40 @@
+"""Check that a SparseMatrix multiplies like the dense Matrix it holds, run from the PythonMatrices directory with:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+from fractions import Fraction
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Matrix import Matrix  # noqa: E402
+from SparseMatrix import SparseMatrix  # noqa: E402
+
+
+def entries(matrix):
+    """The entries of the matrix as a list of lists"""
+    return [list(row.entries) for row in matrix.rows]
+
+
+class SparseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dense = Matrix([[3.0, 0.0, 1.5], [0.0, 0.0, -6.0]])
+        self.sparse = SparseMatrix.from_dense(self.dense)
+
+    def test_scalars(self):
+        for scalar in (2, 0.5, Fraction(1, 3)):
+            self.assertEqual(entries((self.sparse * scalar).to_dense()), entries(self.dense * scalar))
+            self.assertEqual(entries((scalar * self.sparse).to_dense()), entries(self.dense * scalar))
+
+    def test_dense_times_sparse(self):
+        other = Matrix([[1.0, 2.0], [0.0, 1.0], [4.0, 0.0]])
+        sparse = SparseMatrix.from_dense(other)
+        self.assertEqual(entries(self.dense @ sparse), entries(self.dense * other))
+        self.assertEqual(entries(self.dense * sparse), entries(self.dense * other))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Check that views keep showing the entries they were taken from when their source changes, run from the
+PythonMatrices directory with:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Matrix import Matrix  # noqa: E402
+from Vector import Vector  # noqa: E402
+
+
+def entries(matrix):
+    """The entries of the matrix as a list of lists"""
+    return [list(row.entries) for row in matrix.rows]
+
+
+class ViewTest(unittest.TestCase):
+
+    def test_entry_write_through_a_row(self):
+        for compact in (False, True):
+            matrix = Matrix([[1.0, 2.0], [3.0, 4.0]])
+            if compact:
+                matrix = matrix.to_compact()
+            view = matrix.transposed_view()
+            matrix[0][1] = 9.0
+            self.assertEqual(view[1][0], 2.0)
+            self.assertEqual(matrix[0][1], 9.0)
+
+    def test_every_kind_of_view(self):
+        matrix = Matrix([[1.0, 2.0], [3.0, 4.0]])
+        part = matrix[0:1]
+        row = matrix.row_view(0)
+        column = matrix.column_view(0)
+        minor = matrix.minor(1, 1)
+        matrix[0][0] = 7.0
+        self.assertEqual(part[0][0], 1.0)
+        self.assertEqual(row[0], 1.0)
+        self.assertEqual(column[0], 1.0)
+        self.assertEqual(minor[0][0], 1.0)
+
+    def test_matrix_setters(self):
+        matrix = Matrix([[1.0, 2.0], [3.0, 4.0]])
+        view = matrix.transposed_view()
+        matrix[0, 1] = 5.0
+        matrix.set_row_vector(1, Vector([6.0, 8.0]))
+        self.assertEqual(entries(view), [[1.0, 3.0], [2.0, 4.0]])
+
+    def test_slice_after_delete(self):
+        matrix = Matrix([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+        view = matrix[1:3]
+        del matrix[0]
+        self.assertEqual(entries(view), [[3.0, 4.0], [5.0, 6.0]])
+
+    def test_writing_a_view_leaves_the_source(self):
+        matrix = Matrix([[1.0, 2.0], [3.0, 4.0]])
+        view = matrix.transposed_view()
+        view[0][1] = 9.0
+        self.assertEqual(entries(matrix), [[1.0, 2.0], [3.0, 4.0]])
+        self.assertEqual(entries(view), [[1.0, 9.0], [2.0, 4.0]])
+
+    def test_transpose_is_a_copy(self):
+        matrix = Matrix([[1.0, 2.0], [3.0, 4.0]])
+        transposed = matrix.transpose()
+        matrix[0][1] = 9.0
+        self.assertEqual(transposed[1][0], 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()